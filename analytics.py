@@ -0,0 +1,329 @@
+"""Streaming analytics over recorded games.
+
+    python analytics.py win-rate --by hour
+    python analytics.py attempts --by theme --format json
+    python analytics.py top-players --days 7 -k 10 --jobs 4
+
+Events are read a line at a time from the archived journals in
+game_archive/ and the live game_events.jsonl. The binary backend keeps
+the same journals; with --storage sqlite they are read from the SQLite
+tables instead. Events flow through generator stages: select the event
+kind and time window, group by a key into small mergeable aggregates,
+then sort or take the top K. Memory depends on the number of groups, not
+the number of games. With --jobs the files are split into line-aligned
+byte ranges that worker processes aggregate in parallel, and the partial
+aggregates are merged.
+"""
+import csv
+import glob
+import heapq
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date as _date
+from datetime import datetime, timedelta
+
+import game_storage
+
+# Byte range handed to each worker process
+CHUNK_BYTES = 8 << 20
+
+
+# Sources
+
+def event_files(data_dir='.'):
+    """Archived journals, oldest first, then the live journal"""
+    files = sorted(glob.glob(os.path.join(data_dir, game_storage.ARCHIVE_DIR, 'events-*.jsonl')))
+    journal = os.path.join(data_dir, game_storage.JOURNAL_FILE)
+    if os.path.exists(journal):
+        files.append(journal)
+    return files
+
+
+def read_events(path, start=0, end=None, contains=None):
+    """Yield the events on lines of path that start in the byte range [start, end).
+
+    Lines without the bytes contains are skipped before parsing.
+    """
+    with open(path, 'rb') as f:
+        if start:
+            # Skip the rest of a line that began before start
+            f.seek(start - 1)
+            f.readline()
+        pos = f.tell()
+        for line in f:
+            if end is not None and pos >= end:
+                return
+            pos += len(line)
+            if contains is not None and contains not in line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # A line still being written to the live journal
+
+
+def sqlite_events(db_file, kind):
+    """Yield events of one kind from an SQLite store, a row at a time"""
+    import sqlite3
+
+    db = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        if kind == 'game':
+            for won, attempts, date, theme in db.execute(
+                    "SELECT won, attempts, date, theme FROM games ORDER BY id"):
+                yield {'type': 'game', 'won': bool(won), 'attempts': attempts, 'date': date,
+                       'theme': theme}
+        else:
+            for player, score, date in db.execute(
+                    "SELECT player, score, date FROM leaderboard ORDER BY id"):
+                yield {'type': 'score', 'entry': {'player': player, 'score': score, 'date': date}}
+    finally:
+        db.close()
+
+
+# Stages
+
+def select(events, kind, since=None):
+    """Records of one kind ('game' or 'score') dated at or after since"""
+    for event in events:
+        if event.get('type') != kind:
+            continue
+        record = event['entry'] if kind == 'score' else event
+        if since is None or record['date'] >= since:
+            yield record
+
+
+def group(records, key, aggregate):
+    """Fold records into {key(record): aggregate()}"""
+    groups = {}
+    for record in records:
+        k = key(record)
+        agg = groups.get(k)
+        if agg is None:
+            agg = groups[k] = aggregate()
+        agg.add(record)
+    return groups
+
+
+def merge(into, groups):
+    """Merge one {key: aggregate} dict into another"""
+    for k, agg in groups.items():
+        if k in into:
+            into[k].merge(agg)
+        else:
+            into[k] = agg
+    return into
+
+
+def top_k(groups, k, rank):
+    """The k (key, aggregate) pairs with the highest rank(aggregate)"""
+    return heapq.nlargest(k, groups.items(), key=lambda item: rank(item[1]))
+
+
+# Aggregates; each is small, picklable and mergeable
+
+class GameTotals:
+    __slots__ = ('games', 'wins', 'attempts')
+
+    def __init__(self):
+        self.games = self.wins = self.attempts = 0
+
+    def add(self, record):
+        self.games += 1
+        self.wins += bool(record['won'])
+        self.attempts += record['attempts']
+
+    def merge(self, other):
+        self.games += other.games
+        self.wins += other.wins
+        self.attempts += other.attempts
+
+    def rows(self):
+        yield {'games': self.games, 'wins': self.wins,
+               'win_rate': round(self.wins / self.games, 4),
+               'average_attempts': round(self.attempts / self.games, 3)}
+
+
+class AttemptHistogram:
+    __slots__ = ('counts',)
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, record):
+        if record['won']:
+            self.counts[record['attempts']] = self.counts.get(record['attempts'], 0) + 1
+
+    def merge(self, other):
+        for attempts, count in other.counts.items():
+            self.counts[attempts] = self.counts.get(attempts, 0) + count
+
+    def rows(self):
+        total = sum(self.counts.values())
+        for attempts in sorted(self.counts):
+            yield {'attempts': attempts, 'wins': self.counts[attempts],
+                   'share': round(self.counts[attempts] / total, 4)}
+
+
+class PlayerTotals:
+    __slots__ = ('wins', 'best_score', 'total_score')
+
+    def __init__(self):
+        self.wins = self.total_score = 0
+        self.best_score = None
+
+    def add(self, record):
+        self.wins += 1
+        self.total_score += record['score']
+        if self.best_score is None or record['score'] < self.best_score:
+            self.best_score = record['score']
+
+    def merge(self, other):
+        self.wins += other.wins
+        self.total_score += other.total_score
+        if self.best_score is None or (other.best_score is not None
+                                       and other.best_score < self.best_score):
+            self.best_score = other.best_score
+
+    def rank(self):
+        # Most wins first, then the best score, then the best average
+        return (self.wins, -self.best_score, -self.total_score / self.wins)
+
+    def rows(self):
+        yield {'wins': self.wins, 'best_score': self.best_score,
+               'average_score': round(self.total_score / self.wins, 3)}
+
+
+# Group keys, by name so worker processes can look them up
+
+def _hour(record):
+    return record['date'][11:13]
+
+
+def _day(record):
+    return record['date'][:10]
+
+
+def _weekday(record):
+    return _date.fromisoformat(record['date'][:10]).strftime('%a')
+
+
+def _theme(record):
+    return record.get('theme') or 'unknown'
+
+
+def _player(record):
+    return record['player']
+
+
+def _everything(record):
+    return 'all'
+
+
+KEYS = {'hour': _hour, 'day': _day, 'weekday': _weekday, 'theme': _theme,
+        'player': _player, 'all': _everything}
+
+# query name -> (event kind, aggregate)
+QUERIES = {
+    'win-rate': ('game', GameTotals),
+    'attempts': ('game', AttemptHistogram),
+    'top-players': ('score', PlayerTotals),
+}
+
+# Group keys each query supports, the default first. Game events have
+# no player and scores no theme.
+QUERY_KEYS = {
+    'win-rate': ('hour', 'day', 'weekday', 'theme', 'all'),
+    'attempts': ('hour', 'day', 'weekday', 'theme', 'all'),
+    'top-players': ('player',),
+}
+
+
+def _aggregate_range(task):
+    """Worker: aggregate the events in one byte range of one file"""
+    path, start, end, query, by, since = task
+    kind, aggregate = QUERIES[query]
+    # The journal is written without spaces, so this matches exactly
+    events = read_events(path, start, end, contains=f'"type":"{kind}"'.encode())
+    return group(select(events, kind, since), KEYS[by], aggregate)
+
+
+def split_files(files, chunk_bytes=CHUNK_BYTES):
+    """Cut files into (path, start, end) byte ranges of about chunk_bytes"""
+    for path in files:
+        size = os.path.getsize(path)
+        for start in range(0, max(size, 1), chunk_bytes):
+            yield path, start, min(start + chunk_bytes, size)
+
+
+def run(query, by, since=None, data_dir='.', storage='json', jobs=1, chunk_bytes=CHUNK_BYTES):
+    """Aggregate every event for query, grouped by the key named by"""
+    kind, aggregate = QUERIES[query]
+    if by not in QUERY_KEYS[query]:
+        raise ValueError(f"{query} can't be grouped by {by}; use one of {', '.join(QUERY_KEYS[query])}")
+    if storage == 'sqlite':
+        db_file = os.path.join(data_dir, 'game_data.db')
+        return group(select(sqlite_events(db_file, kind), kind, since), KEYS[by], aggregate)
+    tasks = [(path, start, end, query, by, since)
+             for path, start, end in split_files(event_files(data_dir), chunk_bytes)]
+    groups = {}
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(jobs) as pool:
+            for partial in pool.map(_aggregate_range, tasks):
+                merge(groups, partial)
+    else:
+        for task in tasks:
+            merge(groups, _aggregate_range(task))
+    return groups
+
+
+def to_rows(items, by):
+    """Flatten (key, aggregate) pairs into output rows"""
+    for key, agg in items:
+        for row in agg.rows():
+            yield {by: key, **row}
+
+
+def write(rows, fmt, out=sys.stdout):
+    rows = list(rows)  # Already aggregated, so this is small
+    if fmt == 'json':
+        json.dump(rows, out, indent=2)
+        out.write('\n')
+    elif rows:
+        writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analytics over recorded games")
+    parser.add_argument('query', choices=sorted(QUERIES))
+    parser.add_argument('--by', choices=sorted(KEYS), default=None,
+                        help="group key (default: hour, or player for top-players, "
+                             "which supports only player)")
+    parser.add_argument('--days', type=float, default=None, help="only the last N days")
+    parser.add_argument('-k', '--top', type=int, default=10, help="rows for top-players")
+    parser.add_argument('--format', choices=['csv', 'json'], default='csv')
+    parser.add_argument('--jobs', type=int, default=1, help="worker processes")
+    parser.add_argument('--storage', choices=['json', 'binary', 'sqlite'], default=None)
+    parser.add_argument('--data-dir', default='.')
+    args = parser.parse_args()
+
+    by = args.by or QUERY_KEYS[args.query][0]
+    if by not in QUERY_KEYS[args.query]:
+        parser.error(f"{args.query} can't be grouped by {by}; "
+                     f"use one of {', '.join(QUERY_KEYS[args.query])}")
+    since = None
+    if args.days is not None:
+        since = (datetime.now() - timedelta(days=args.days)).strftime("%Y-%m-%d %H:%M")
+    storage = args.storage or os.environ.get(game_storage.STORAGE_ENV, 'json')
+    groups = run(args.query, by, since, args.data_dir, storage, args.jobs)
+    if args.query == 'top-players':
+        items = top_k(groups, args.top, PlayerTotals.rank)
+    else:
+        items = sorted(groups.items())
+    write(to_rows(items, by), args.format)
@@ -0,0 +1,333 @@
+"""Benchmark suite for the engine, persistence and leaderboard paths.
+
+    python benchmarks.py run -o baseline.json
+    python benchmarks.py run -o after.json
+    python benchmarks.py compare baseline.json after.json
+
+Every benchmark uses fixed seeds so runs are comparable, and results are
+written as JSON. `compare` flags any metric that got worse by more than
+the threshold and exits non-zero if there is one.
+"""
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime
+
+import game_ai
+import game_engine
+import game_storage
+import snapshot
+import tournament
+from game_engine import GameEngine
+from leaderboard import Leaderboard
+
+SEED = 1234
+SIZES = (10, 100, 1000, 10000, 100000, 1000000)
+
+# Game ranges for the per-guess cost benchmark, as (label, high)
+RANGES = (('1e2', 100), ('1e6', 10 ** 6), ('2^32', 2 ** 32), ('2^64', 2 ** 64), ('2^128', 2 ** 128))
+
+
+def _timed(func, repeat=5):
+    """Run func repeat times and return the median wall time in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def _fake_entries(n, seed=SEED):
+    rng = random.Random(seed)
+    return [{
+        'player': f"Player_{i + 1}",
+        'score': rng.randint(1, game_engine.MAX_ATTEMPTS),
+        'date': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+                f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}"
+    } for i in range(n)]
+
+
+class Results:
+    """Collects metrics as {name: {'value', 'unit', 'higher_is_better'}}"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, value, unit, higher_is_better=False):
+        self.metrics[name] = {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+        print(f"  {name:<48} {value:>14.6g} {unit}", file=sys.stderr)
+
+
+def bench_engine(results, games=200000):
+    """Guess evaluation throughput, through GameEngine and the batch path"""
+    rng = random.Random(SEED)
+    guesses = [rng.randint(0, 101) for _ in range(100000)]
+    engine = GameEngine(rng=rng)
+
+    def evaluate():
+        guess = engine.guess
+        reset = engine.reset
+        for value in guesses:
+            if guess(value) >= game_engine.WON:
+                reset()
+
+    seconds = _timed(evaluate)
+    results.add('engine.guess_per_second', len(guesses) / seconds, 'guesses/s', True)
+
+    for name in ('binary', 'random'):
+        seconds = _timed(lambda: game_engine.play_games(games, name, seed=SEED), repeat=3)
+        results.add(f'engine.play_games.{name}', games / seconds, 'games/s', True)
+
+    # Tournament matches in this process, Elo updates included
+    matches = 20000
+    seconds = _timed(lambda: tournament.Tournament(matches=matches, seed=SEED).run(jobs=1), repeat=3)
+    results.add('engine.tournament.matches_per_second', matches / seconds, 'matches/s', True)
+
+    # Per-guess cost as the range grows: binary search from the engine's own
+    # bounds, with an out-of-range guess every few to exercise validation
+    for label, high in RANGES:
+        engine = GameEngine(1, high, rng=random.Random(SEED))
+        guesses = 100000
+
+        def play():
+            guess = engine.guess
+            for i in range(guesses):
+                if i % 8 == 0:
+                    guess(high + 1)
+                    continue
+                if guess((engine.lower_bound + engine.upper_bound) // 2) >= game_engine.WON:
+                    engine.reset()
+
+        seconds = _timed(play)
+        results.add(f'engine.guess_seconds[range={label}]', seconds / guesses, 's')
+
+        # Hint lookups over a game's positions, once the table is warm
+        game_ai.precompute(high, engine.max_attempts)
+        positions = []
+        engine.reset()
+        while not engine.finished:
+            positions.append(types.SimpleNamespace(lower_bound=engine.lower_bound,
+                                                   upper_bound=engine.upper_bound,
+                                                   attempts_left=engine.attempts_left))
+            engine.guess(game_ai.suggest(engine)[0])
+
+        def hint():
+            suggest = game_ai.suggest
+            for _ in range(1000):
+                for position in positions:
+                    suggest(position)
+
+        seconds = _timed(hint)
+        results.add(f'ai.suggest_seconds[range={label}]', seconds / (1000 * len(positions)), 's')
+
+
+def bench_persistence(results, sizes, backends=('json',)):
+    """Save, load and per-game append latency as the leaderboard grows"""
+    for backend in backends:
+        for n in sizes:
+            entries = _fake_entries(n)
+            with tempfile.TemporaryDirectory() as tmp:
+                options = _store_options(backend, tmp)
+                store = game_storage.open_store(backend, **options)
+                _fill_store(store, backend, entries)
+                repeat = 5 if n <= 100000 else 1
+
+                save = _timed(store.checkpoint, repeat)
+                results.add(f'persistence.{backend}.save_seconds[n={n}]', save, 's')
+
+                start = time.perf_counter()
+                for i in range(100):
+                    store.record_game(True, 4, '2025-01-01 00:00')
+                    store.add_score(4, f"Bench_{i}", '2025-01-01 00:00')
+                record = (time.perf_counter() - start) / 100
+                results.add(f'persistence.{backend}.record_game_seconds[n={n}]', record, 's')
+                store.close()
+
+                load = _timed(lambda: game_storage.open_store(backend, **options).close(), repeat)
+                results.add(f'persistence.{backend}.load_seconds[n={n}]', load, 's')
+
+                def load_top():
+                    store = game_storage.open_store(backend, **options)
+                    store.leaderboard.top(10)
+                    store.close()
+                top = _timed(load_top, repeat)
+                results.add(f'persistence.{backend}.load_top10_seconds[n={n}]', top, 's')
+
+
+def _store_options(backend, directory):
+    if backend == 'sqlite':
+        return {'db_file': os.path.join(directory, 'game_data.db')}
+    if backend == 'binary':
+        return {'data_file': os.path.join(directory, snapshot.BINARY_FILE),
+                'journal_file': os.path.join(directory, 'game_events.jsonl')}
+    return {'data_file': os.path.join(directory, 'game_data.json'),
+            'journal_file': os.path.join(directory, 'game_events.jsonl')}
+
+
+def _fill_store(store, backend, entries):
+    if backend == 'sqlite':
+        with store.db:
+            store.db.executemany("INSERT INTO leaderboard (player, score, date) VALUES (?, ?, ?)",
+                                 [(e['player'], e['score'], e['date']) for e in entries])
+    else:
+        for entry in entries:
+            store.leaderboard.add(entry)
+        store.checkpoint()
+
+
+def bench_leaderboard(results, sizes):
+    """Top-10 cost: the old sort-on-open path against the ranked Leaderboard"""
+    for n in sizes:
+        entries = _fake_entries(n)
+        repeat = 5 if n <= 100000 else 1
+        seconds = _timed(lambda: sorted(entries, key=lambda x: x['score'])[:10], repeat)
+        results.add(f'leaderboard.sorted_top10_seconds[n={n}]', seconds, 's')
+
+        board = Leaderboard(entries)
+        seconds = _timed(lambda: board.top(10), 50)
+        results.add(f'leaderboard.top10_seconds[n={n}]', seconds, 's')
+        seconds = _timed(lambda: board.rank(f"Player_{n // 2}"), 50)
+        results.add(f'leaderboard.rank_seconds[n={n}]', seconds, 's')
+
+
+def bench_render(results, sizes):
+    """Leaderboard window cost, when a display is available.
+
+    Measures building the old throwaway top-10 window, and paging through
+    the reusable LeaderboardView for each leaderboard size.
+    """
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:  # No Tk or no display
+        print(f"  skipping render benchmarks: {e}", file=sys.stderr)
+        return
+    import themes
+    import views
+
+    root.withdraw()
+    entries = Leaderboard(_fake_entries(1000)).top(10)
+
+    def render():
+        window = tk.Toplevel(root)
+        for i, entry in enumerate(entries, 1):
+            row = tk.Frame(window)
+            row.pack(fill='x', pady=2)
+            for text, width in ((f'{i}.', 8), (str(entry['score']), 8),
+                                (entry['player'], 15), (entry['date'], 15)):
+                tk.Label(row, text=text, font=('Arial', 10), width=width).pack(side='left')
+        window.update_idletasks()
+        window.destroy()
+
+    results.add('render.leaderboard_window_seconds', _timed(render, 10), 's')
+
+    for n in sizes:
+        app = types.SimpleNamespace(root=root, themed=themes.ThemeRegistry(themes.THEMES['dark']),
+                                    leaderboard=Leaderboard(_fake_entries(n)))
+        view = views.LeaderboardView(app)
+        view.show()
+        rng = random.Random(SEED)
+
+        def scroll():
+            view.scroll_to(rng.randrange(max(n, 1)))
+            view.window.update_idletasks()
+
+        results.add(f'render.leaderboard_view_scroll_seconds[n={n}]', _timed(scroll, 20), 's')
+        view.window.destroy()
+    root.destroy()
+
+
+def run(sizes=SIZES, backends=('json',), groups=('engine', 'persistence', 'leaderboard', 'render')):
+    """Run the selected benchmark groups and return the report dict"""
+    results = Results()
+    if 'engine' in groups:
+        bench_engine(results)
+    if 'persistence' in groups:
+        bench_persistence(results, sizes, backends)
+    if 'leaderboard' in groups:
+        bench_leaderboard(results, sizes)
+    if 'render' in groups:
+        bench_render(results, sizes)
+    return {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': SEED,
+            'sizes': list(sizes),
+        },
+        'metrics': results.metrics
+    }
+
+
+def compare(baseline, current, threshold=0.10):
+    """Return (name, baseline, current, change) rows and the names that regressed.
+
+    change is the relative change in the "worse" direction, so positive
+    numbers are regressions for every metric.
+    """
+    rows = []
+    regressions = []
+    for name, base in baseline['metrics'].items():
+        new = current['metrics'].get(name)
+        if new is None or not base['value']:
+            continue
+        change = (new['value'] - base['value']) / base['value']
+        if base['higher_is_better']:
+            change = -change
+        rows.append((name, base['value'], new['value'], change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Number Guessing Game benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="run the benchmarks")
+    run_parser.add_argument('-o', '--output', help="write the JSON report here (default: stdout)")
+    run_parser.add_argument('--max-size', type=int, default=100000,
+                            help="largest leaderboard size to measure (up to 1000000)")
+    run_parser.add_argument('--storage', action='append', choices=['json', 'binary', 'sqlite'],
+                            help="persistence backends to measure (default: json)")
+    run_parser.add_argument('--only', action='append',
+                            choices=['engine', 'persistence', 'leaderboard', 'render'],
+                            help="run only these groups (repeatable)")
+
+    compare_parser = subparsers.add_parser('compare', help="compare two reports")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="relative slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        report = run(sizes=[n for n in SIZES if n <= args.max_size],
+                     backends=args.storage or ['json'],
+                     groups=args.only or ['engine', 'persistence', 'leaderboard', 'render'])
+        text = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(text + '\n')
+        else:
+            print(text)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        rows, regressions = compare(baseline, current, args.threshold)
+        for name, base, new, change in rows:
+            flag = 'REGRESSION' if name in regressions else ''
+            print(f"{name:<52} {base:>12.6g} {new:>12.6g} {change:>+8.1%} {flag}")
+        raise SystemExit(1 if regressions else 0)
@@ -0,0 +1,131 @@
+"""Optimal play for the higher/lower game: hints, win chances and a computer opponent.
+
+With a attempts left, one guess can settle at most 1 number and split
+the rest into a lower and a higher part, so a attempts can find the
+secret among at most 2^a - 1 numbers. Guessing the middle of the
+remaining interval keeps both parts within reach of the attempts that
+are left, and so wins as often as any strategy can:
+
+    P(win) = min(1, (2^a - 1) / width)
+
+for a secret spread evenly over an interval of width numbers. The table
+below also holds the expected number of guesses, which needs a walk down
+the halving tree. Since only the width and the attempts left matter,
+entries are keyed by (width, attempts_left) and kept in an LRU cache. A
+game of any range only ever touches two widths per level, so a whole
+game's table is about 2 * max_attempts entries and every lookup after the
+first is a dict hit.
+"""
+from functools import lru_cache
+
+from game_engine import WON, GameEngine
+
+# Entries kept in the decision table
+TABLE_SIZE = 4096
+
+
+def win_probability(width, attempts_left):
+    """Chance that optimal play finds a secret among width numbers"""
+    if width <= 0 or attempts_left <= 0:
+        return 0.0
+    if attempts_left >= width.bit_length():
+        return 1.0  # 2^a - 1 >= width
+    return ((1 << attempts_left) - 1) / width
+
+
+@lru_cache(maxsize=TABLE_SIZE)
+def decision(width, attempts_left):
+    """Return (offset, win_probability, expected_guesses) for an interval of width numbers.
+
+    offset is the best guess counted from the bottom of the interval, and
+    expected_guesses the number of guesses optimal play will use, win or
+    lose, on average.
+    """
+    offset = (width - 1) // 2
+    if width <= 0 or attempts_left <= 0:
+        return offset, 0.0, 0.0
+    below = offset
+    above = width - 1 - offset
+    expected = 1.0
+    if attempts_left > 1:
+        if below:
+            expected += below / width * decision(below, attempts_left - 1)[2]
+        if above:
+            expected += above / width * decision(above, attempts_left - 1)[2]
+    return offset, win_probability(width, attempts_left), expected
+
+
+def precompute(width, attempts):
+    """Fill the table for every interval optimal play can reach from a game's start"""
+    widths = {width}
+    for attempts_left in range(attempts, 0, -1):
+        following = set()
+        for w in widths:
+            decision(w, attempts_left)
+            below = (w - 1) // 2
+            following.update(part for part in (below, w - 1 - below) if part)
+        widths = following
+    return decision.cache_info()
+
+
+def suggest(engine):
+    """Return (guess, win_probability, expected_guesses) for engine's next move"""
+    low, high = engine.lower_bound, engine.upper_bound
+    offset, chance, expected = decision(high - low + 1, engine.attempts_left)
+    return low + offset, chance, expected
+
+
+class Computer:
+    """A computer opponent playing its own game against the same secret"""
+
+    def __init__(self, engine):
+        self.engine = GameEngine(engine.low, engine.high, engine.max_attempts,
+                                 secret_number=engine.secret_number)
+        precompute(engine.high - engine.low + 1, engine.max_attempts)
+        self.last_guess = None
+        self.last_result = None
+
+    def reset(self, engine):
+        """Start again on engine's new secret"""
+        self.engine.reset(engine.secret_number)
+        self.last_guess = self.last_result = None
+
+    @property
+    def finished(self):
+        return self.engine.finished
+
+    @property
+    def won(self):
+        return self.last_result == WON
+
+    def play(self):
+        """Make one guess and return its result"""
+        guess, _, _ = suggest(self.engine)
+        self.last_guess = guess
+        self.last_result = self.engine.guess(guess)
+        return self.last_result
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    import game_engine
+
+    parser = argparse.ArgumentParser(description="Optimal guesses and win chances")
+    parser.add_argument('--low', type=int, default=game_engine.MIN_NUMBER)
+    parser.add_argument('--high', type=int, default=game_engine.MAX_NUMBER)
+    parser.add_argument('--attempts', type=int, default=None,
+                        help=f"attempt limit (default: ceil(log2(range + 1)) + {game_engine.SLACK})")
+    args = parser.parse_args()
+
+    width = args.high - args.low + 1
+    attempts = game_engine.attempt_budget(args.low, args.high) if args.attempts is None else args.attempts
+    info = precompute(width, attempts)
+    offset, chance, expected = decision(width, attempts)
+    print(json.dumps({
+        'first_guess': args.low + offset,
+        'win_probability': chance,
+        'expected_guesses': round(expected, 4),
+        'table_entries': info.currsize
+    }, indent=2))
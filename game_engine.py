@@ -0,0 +1,234 @@
+"""Headless rules for the Number Guessing Game.
+
+Nothing in this module touches Tkinter, so the same rules can drive the
+GUI, batch simulations and anything else that needs to play a game.
+"""
+import random
+
+MIN_NUMBER = 1
+MAX_NUMBER = 100
+MAX_ATTEMPTS = 8
+
+# Attempts allowed on top of the fewest that always suffice
+SLACK = 1
+
+# Outcomes returned by GameEngine.guess
+INVALID = 0
+TOO_LOW = 1
+TOO_HIGH = 2
+WON = 3
+LOST = 4
+
+
+def attempt_budget(low, high, slack=SLACK):
+    """Attempts allowed for a low-high game: ceil(log2(range size + 1)) plus slack.
+
+    Binary search always finds the number within ceil(log2(size + 1))
+    guesses (size.bit_length()), so this is what a perfect player needs
+    plus slack spare attempts. For the classic 1-100 game it is MAX_ATTEMPTS.
+    """
+    return (high - low + 1).bit_length() + slack
+
+
+class GameEngine:
+    """State and rules of a single game.
+
+    low and high can be any ints, 64-bit and beyond; a guess is checked with
+    a handful of comparisons, so its cost doesn't depend on the range size.
+    """
+
+    __slots__ = ('low', 'high', 'max_attempts', 'rng', 'seed', 'secret_number',
+                 'attempts', 'lower_bound', 'upper_bound', 'finished')
+
+    def __init__(self, low=MIN_NUMBER, high=MAX_NUMBER, max_attempts=None,
+                 secret_number=None, rng=random):
+        if high < low:
+            raise ValueError(f"empty range {low}-{high}")
+        self.low = low
+        self.high = high
+        # Derived from the range unless given
+        self.max_attempts = attempt_budget(low, high) if max_attempts is None else max_attempts
+        self.rng = rng
+        self.reset(secret_number)
+
+    def reset(self, secret_number=None):
+        """Start a new game, picking a random secret unless one is given"""
+        if secret_number is None:
+            secret_number = self.rng.randint(self.low, self.high)
+        self.secret_number = secret_number
+        # Seed of the game's stream, set by game_rng.RNGService.start
+        self.seed = None
+        self.attempts = 0
+        # Interval still consistent with the hints given so far
+        self.lower_bound = self.low
+        self.upper_bound = self.high
+        self.finished = False
+
+    def guess(self, value):
+        """Evaluate a guess and return one of INVALID, TOO_LOW, TOO_HIGH, WON, LOST"""
+        if self.finished:
+            raise RuntimeError("game is over, call reset() first")
+        if value < self.low or value > self.high:
+            return INVALID  # Don't count invalid attempts
+        self.attempts += 1
+        if value == self.secret_number:
+            self.finished = True
+            return WON
+        if self.attempts >= self.max_attempts:
+            self.finished = True
+            return LOST
+        if value < self.secret_number:
+            if value >= self.lower_bound:
+                self.lower_bound = value + 1
+            return TOO_LOW
+        if value <= self.upper_bound:
+            self.upper_bound = value - 1
+        return TOO_HIGH
+
+    @property
+    def attempts_left(self):
+        return self.max_attempts - self.attempts
+
+
+# Guessing strategies for headless play. A strategy is called with the
+# interval still consistent with the hints so far and the game's RNG, and
+# returns the next guess.
+
+def binary_search(low, high, rng):
+    """Always guess the middle of the remaining interval"""
+    return (low + high) // 2
+
+
+def random_guess(low, high, rng):
+    """Guess uniformly inside the remaining interval"""
+    return rng.randint(low, high)
+
+
+def human_like(low, high, rng):
+    """Guess near the middle with some noise, preferring multiples of 5"""
+    fraction = min(max(rng.gauss(0.5, 0.15), 0.0), 1.0)
+    guess = low + int((high - low) * fraction + 0.5)
+    rounded = (guess + 2) // 5 * 5
+    if low <= rounded <= high:
+        return rounded
+    return guess
+
+
+STRATEGIES = {
+    'binary': binary_search,
+    'random': random_guess,
+    'human': human_like,
+}
+
+
+class BatchResult:
+    """Aggregate outcome of a batch of headless games"""
+
+    __slots__ = ('games', 'wins', 'total_attempts', 'histogram')
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS):
+        self.games = 0
+        self.wins = 0
+        self.total_attempts = 0
+        # histogram[n] counts games won in exactly n attempts
+        self.histogram = [0] * (max_attempts + 1)
+
+    @property
+    def losses(self):
+        return self.games - self.wins
+
+    @property
+    def win_rate(self):
+        return self.wins / max(self.games, 1)
+
+    @property
+    def average_attempts(self):
+        """Average attempts per game, as shown in the statistics window"""
+        return self.total_attempts / max(self.games, 1)
+
+    def to_dict(self):
+        return {
+            'games': self.games,
+            'wins': self.wins,
+            'losses': self.losses,
+            'win_rate': self.win_rate,
+            'average_attempts': self.average_attempts,
+            'histogram': list(self.histogram)
+        }
+
+
+def play_strategy(strategy, secret, low, high, max_attempts, rng):
+    """Play one headless game and return the attempts strategy needed to win, or 0 if it lost.
+
+    This applies the same rules as GameEngine.guess, inlined so that large
+    batches don't pay for a method call per guess.
+    """
+    lo = low
+    hi = high
+    for attempts in range(1, max_attempts + 1):
+        guess = strategy(lo, hi, rng)
+        if guess < low or guess > high:
+            raise ValueError(f"strategy guessed {guess}, outside {low}-{high}")
+        if guess == secret:
+            return attempts
+        if guess < secret:
+            if guess >= lo:
+                lo = guess + 1
+        elif guess <= hi:
+            hi = guess - 1
+    return 0
+
+
+def play_games(n, strategy=binary_search, low=MIN_NUMBER, high=MAX_NUMBER,
+               max_attempts=None, seed=None):
+    """Play n headless games with the given strategy and return a BatchResult.
+
+    max_attempts defaults to attempt_budget(low, high).
+    """
+    if isinstance(strategy, str):
+        strategy = STRATEGIES[strategy]
+    if max_attempts is None:
+        max_attempts = attempt_budget(low, high)
+    rng = random.Random(seed)
+    randint = rng.randint
+    result = BatchResult(max_attempts)
+    histogram = result.histogram
+    wins = 0
+    total_attempts = 0
+
+    for _ in range(n):
+        attempts = play_strategy(strategy, randint(low, high), low, high, max_attempts, rng)
+        if attempts:
+            wins += 1
+            histogram[attempts] += 1
+            total_attempts += attempts
+        else:
+            total_attempts += max_attempts
+
+    result.games = n
+    result.wins = wins
+    result.total_attempts = total_attempts
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Play headless games in a batch")
+    parser.add_argument('-n', '--games', type=int, default=100000)
+    parser.add_argument('-s', '--strategy', choices=sorted(STRATEGIES), default='binary')
+    parser.add_argument('--low', type=int, default=MIN_NUMBER)
+    parser.add_argument('--high', type=int, default=MAX_NUMBER)
+    parser.add_argument('-a', '--attempts', type=int, default=None,
+                        help="attempt limit (default: ceil(log2(range + 1)) + %d)" % SLACK)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = play_games(args.games, args.strategy, args.low, args.high, args.attempts, args.seed)
+    elapsed = time.perf_counter() - start
+    summary = result.to_dict()
+    summary['games_per_second'] = round(args.games / elapsed) if elapsed else None
+    print(json.dumps(summary, indent=2))
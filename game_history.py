@@ -0,0 +1,303 @@
+"""Compact per-game guess history.
+
+Every game is stored as varint bytes: the secret, then each counted guess,
+all as offsets from the bottom of the range. For the classic 1-100 game
+that is one byte per guess. Games are collected into chunks that are
+appended to guess_history.bin as they fill up, or whenever the game's
+BackgroundWriter saves, so memory stays bounded while recording and a
+crash loses only the games since the last save. Appends and the repair
+of a torn tail take a lock on guess_history.bin.lock, so several game
+processes can share the file.
+
+Chunk layout (little-endian):
+
+    MAGIC, game count, data length, range length     struct CHUNK_HEADER
+    low (zigzag varint), high - low, max_attempts    range bytes (varints)
+    start of each game in data                       array('I')
+    seed of each game, -1 if none                    array('q')
+    game data                                        bytes
+
+Any game can be played again through GameEngine with replay().
+"""
+import logging
+import os
+import struct
+import sys
+import threading
+from array import array
+
+import game_engine
+from game_engine import GameEngine
+from game_storage import StoreLock
+
+HISTORY_FILE = 'guess_history.bin'
+
+MAGIC = b'GHC1'
+CHUNK_HEADER = struct.Struct('<4sIIH')
+
+# Games per chunk written to disk
+CHUNK_GAMES = 4096
+
+NO_SEED = -1
+
+log = logging.getLogger(__name__)
+
+
+def _varint(value, out):
+    """Append the LEB128 encoding of a non-negative int to bytearray out"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _varints(data, pos, end):
+    """Decode the varints in data[pos:end]"""
+    value = shift = 0
+    while pos < end:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield value
+            value = shift = 0
+
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+class HistoryChunk:
+    """Games of one range: a byte buffer plus an index of where each game starts"""
+
+    __slots__ = ('low', 'high', 'max_attempts', 'offsets', 'seeds', 'data')
+
+    def __init__(self, low, high, max_attempts, offsets=None, seeds=None, data=None):
+        self.low = low
+        self.high = high
+        self.max_attempts = max_attempts
+        self.offsets = array('I') if offsets is None else offsets
+        self.seeds = array('q') if seeds is None else seeds
+        self.data = bytearray() if data is None else data
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def add(self, secret, guesses, seed=None):
+        """Append one game; guesses are the counted (in-range) guesses in order"""
+        low = self.low
+        self.offsets.append(len(self.data))
+        self.seeds.append(NO_SEED if seed is None else seed)
+        _varint(secret - low, self.data)
+        for guess in guesses:
+            _varint(guess - low, self.data)
+
+    def game(self, index):
+        """Return (secret, guesses, seed) of game index"""
+        start = self.offsets[index]
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else len(self.data)
+        values = [value + self.low for value in _varints(self.data, start, end)]
+        seed = self.seeds[index]
+        return values[0], values[1:], None if seed == NO_SEED else seed
+
+    def to_bytes(self):
+        range_bytes = bytearray()
+        _varint(_zigzag(self.low), range_bytes)
+        _varint(self.high - self.low, range_bytes)
+        _varint(self.max_attempts, range_bytes)
+        offsets, seeds = self.offsets, self.seeds
+        if sys.byteorder == 'big':
+            offsets, seeds = array('I', offsets), array('q', seeds)
+            offsets.byteswap()
+            seeds.byteswap()
+        return b''.join((CHUNK_HEADER.pack(MAGIC, len(offsets), len(self.data), len(range_bytes)),
+                         range_bytes, offsets.tobytes(), seeds.tobytes(), self.data))
+
+
+class HistoryWriter:
+    """Collects finished games and appends them to the history file a chunk at a time.
+
+    add_game() and flush() may be called from different threads, e.g. the
+    game's and BackgroundWriter's.
+    """
+
+    def __init__(self, path=HISTORY_FILE, chunk_games=CHUNK_GAMES):
+        self.path = path
+        self.chunk_games = chunk_games
+        self.chunk = None
+        self.games_written = 0
+        # End of the chunks known to be complete; later ones are checked
+        # before each append
+        self._good_end = 0
+        self._file_lock = None  # StoreLock, opened on the first write
+        self._chunk_lock = threading.Lock()  # Guards chunk only
+
+    def add_game(self, engine, guesses):
+        """Record the game engine just finished; guesses are its counted guesses"""
+        rules = (engine.low, engine.high, engine.max_attempts)
+        with self._chunk_lock:
+            chunk = self.chunk
+            stale = chunk is not None and (chunk.low, chunk.high, chunk.max_attempts) != rules
+        if stale:
+            self.flush()  # A chunk holds games with one set of rules
+        with self._chunk_lock:
+            if self.chunk is None:
+                self.chunk = HistoryChunk(*rules)
+            self.chunk.add(engine.secret_number, guesses, engine.seed)
+            full = len(self.chunk) >= self.chunk_games
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Append the current chunk to the file and return how many games it had"""
+        with self._chunk_lock:
+            if self.chunk is None:
+                return 0
+            if self._file_lock is None:
+                self._file_lock = StoreLock(f"{self.path}.lock")
+        # Under the file lock, so chunks are appended in the order they
+        # were taken and no other process is halfway through an append
+        with self._file_lock:
+            with self._chunk_lock:
+                chunk, self.chunk = self.chunk, None
+            if not chunk:
+                return 0
+            # Appending after a torn chunk would hide everything written later
+            self._good_end = _truncate_damaged_tail(self.path, self._good_end)
+            data = chunk.to_bytes()
+            with open(self.path, 'ab') as f:
+                f.write(data)
+            self._good_end += len(data)
+        self.games_written += len(chunk)
+        return len(chunk)
+
+    def close(self):
+        self.flush()
+        if self._file_lock is not None:
+            self._file_lock.close()
+            self._file_lock = None
+
+
+def _truncate_damaged_tail(path, start=0):
+    """Cut the file back to its last complete chunk and return its size.
+
+    Only headers are read, from start, which must be the end of a
+    complete chunk.
+    """
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+    good_end = start if start <= size else 0
+    with open(path, 'rb') as f:
+        f.seek(good_end)
+        while good_end < size:
+            header = f.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                break
+            magic, games, data_length, range_length = CHUNK_HEADER.unpack(header)
+            end = good_end + CHUNK_HEADER.size + range_length + 12 * games + data_length
+            if magic != MAGIC or end > size:
+                break
+            good_end = end
+            f.seek(good_end)
+    if good_end < size:
+        log.warning("truncating damaged tail of %s at byte %d", path, good_end)
+        os.truncate(path, good_end)
+    return good_end
+
+
+def read_chunks(path=HISTORY_FILE):
+    """Yield the HistoryChunks in a history file, stopping at a torn tail"""
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if not header:
+                return
+            try:
+                if len(header) < CHUNK_HEADER.size:
+                    raise ValueError("incomplete header")
+                magic, games, data_length, range_length = CHUNK_HEADER.unpack(header)
+                if magic != MAGIC:
+                    raise ValueError("bad magic")
+                range_bytes = f.read(range_length)
+                offsets = array('I')
+                offsets.frombytes(f.read(4 * games))
+                seeds = array('q')
+                seeds.frombytes(f.read(8 * games))
+                data = bytearray(f.read(data_length))
+                if sys.byteorder == 'big':
+                    offsets.byteswap()
+                    seeds.byteswap()
+                if len(offsets) < games or len(seeds) < games or len(data) < data_length:
+                    raise ValueError("incomplete chunk")
+                zigzag_low, width, max_attempts = _varints(range_bytes, 0, len(range_bytes))
+            except ValueError as e:
+                # Only the last, interrupted write can be damaged
+                log.warning("ignoring damaged tail of %s (%s)", path, e)
+                return
+            low = _unzigzag(zigzag_low)
+            yield HistoryChunk(low, low + width, max_attempts, offsets, seeds, data)
+
+
+def iter_games(path=HISTORY_FILE):
+    """Yield (low, high, max_attempts, secret, guesses, seed) for every recorded game"""
+    for chunk in read_chunks(path):
+        for i in range(len(chunk)):
+            yield (chunk.low, chunk.high, chunk.max_attempts) + chunk.game(i)
+
+
+def replay(low, high, max_attempts, secret, guesses):
+    """Play a recorded game through GameEngine and return its results, one per guess"""
+    engine = GameEngine(low, high, max_attempts, secret_number=secret)
+    return [engine.guess(guess) for guess in guesses]
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Inspect and replay recorded games")
+    parser.add_argument('--file', default=HISTORY_FILE)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('summary', help="count games and guesses, and check every game replays")
+    replay_parser = subparsers.add_parser('replay', help="replay one game step by step")
+    replay_parser.add_argument('index', type=int, help="game number, from 0")
+    args = parser.parse_args()
+
+    names = {game_engine.INVALID: 'INVALID', game_engine.TOO_LOW: 'too low',
+             game_engine.TOO_HIGH: 'too high', game_engine.WON: 'WON', game_engine.LOST: 'LOST'}
+    if args.command == 'replay':
+        for i, (low, high, max_attempts, secret, guesses, seed) in enumerate(iter_games(args.file)):
+            if i == args.index:
+                print(f"range {low}-{high}, {max_attempts} attempts, secret {secret}, seed {seed}")
+                for guess, result in zip(guesses, replay(low, high, max_attempts, secret, guesses)):
+                    print(f"  {guess:>6}  {names[result]}")
+                break
+        else:
+            raise SystemExit(f"no game {args.index} in {args.file}")
+    else:
+        games = guesses = wins = 0
+        for low, high, max_attempts, secret, game_guesses, seed in iter_games(args.file):
+            results = replay(low, high, max_attempts, secret, game_guesses)
+            games += 1
+            guesses += len(game_guesses)
+            wins += bool(results) and results[-1] == game_engine.WON
+        size = os.path.getsize(args.file) if os.path.exists(args.file) else 0
+        print(json.dumps({
+            'games': games,
+            'wins': wins,
+            'guesses': guesses,
+            'file_bytes': size,
+            'bytes_per_guess': round(size / guesses, 2) if guesses else None
+        }, indent=2))
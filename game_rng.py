@@ -0,0 +1,228 @@
+"""Seedable random number streams for games.
+
+An RNGService hands every game its own seed, derived from one root seed
+and the game's number, so games are independent of each other and any
+game can be played again from its seed alone. Two generators are
+available for the per-game streams:
+
+    'mt'        random.Random (Mersenne Twister) seeded with the game seed
+    'splitmix'  SplitMix64, a counter-based generator: output n is a hash
+                of seed + n * GAMMA, so a stream needs no state beyond its
+                counter and whole arrays of games can be drawn at once
+
+fill_secrets() draws the secrets of many games straight into a
+preallocated array; with 'splitmix' and NumPy installed this is fully
+vectorized and gives exactly the numbers the per-game streams would.
+"""
+import itertools
+import random
+import secrets as _secrets
+
+# NumPy, imported by _numpy() the first time a block of secrets is drawn; it
+# is only needed for vectorized fill_secrets and is slow to import
+np = None
+_numpy_checked = False
+
+GENERATORS = ('mt', 'splitmix')
+DEFAULT_GENERATOR = 'mt'
+
+MASK64 = (1 << 64) - 1
+GAMMA = 0x9E3779B97F4A7C15
+
+
+def _numpy():
+    """Return the numpy module, or None if it is not installed"""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+    return np
+
+
+def mix64(z):
+    """SplitMix64 finalizer: a bijective hash of a 64-bit int"""
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+class SplitMixRandom(random.Random):
+    """random.Random API on top of a SplitMix64 stream"""
+
+    def __init__(self, seed=0):
+        self.counter = 0
+        super().__init__(seed)
+
+    def seed(self, a=0, version=2):
+        self.key = int(a) & MASK64
+        self.counter = 0
+        self.gauss_next = None
+
+    def _next64(self):
+        self.counter += 1
+        return mix64((self.key + self.counter * GAMMA) & MASK64)
+
+    def getrandbits(self, k):
+        if k <= 64:
+            return self._next64() >> (64 - k) if k else 0
+        words = (k + 63) // 64
+        value = 0
+        for i in range(words):
+            value |= self._next64() << (64 * i)
+        return value >> (64 * words - k)
+
+    def random(self):
+        return (self._next64() >> 11) * (1.0 / (1 << 53))
+
+    def getstate(self):
+        return (self.key, self.counter, self.gauss_next)
+
+    def setstate(self, state):
+        self.key, self.counter, self.gauss_next = state
+
+
+def stream(seed, generator=DEFAULT_GENERATOR):
+    """Return the random.Random-compatible stream for a game seed"""
+    if generator == 'splitmix':
+        return SplitMixRandom(seed)
+    if generator == 'mt':
+        return random.Random(seed)
+    raise ValueError(f"unknown generator: {generator}")
+
+
+def secret_for(seed, low, high, generator=DEFAULT_GENERATOR):
+    """The secret number a game with this seed was played with"""
+    return stream(seed, generator).randint(low, high)
+
+
+class RNGService:
+    """Issues per-game seeds and streams from one root seed"""
+
+    def __init__(self, seed=None, generator=DEFAULT_GENERATOR):
+        if generator not in GENERATORS:
+            raise ValueError(f"unknown generator: {generator}")
+        self.root_seed = _secrets.randbits(63) if seed is None else seed
+        self.generator = generator
+        self._games = itertools.count()
+
+    def seed_at(self, index):
+        """Seed of game number index; 63 bits, so it fits an SQLite INTEGER"""
+        return mix64((self.root_seed + (index + 1) * GAMMA) & MASK64) >> 1
+
+    def next_seed(self):
+        return self.seed_at(next(self._games))
+
+    def stream(self, seed):
+        return stream(seed, self.generator)
+
+    def start(self, engine):
+        """Reset engine for a new game on a fresh stream and return its seed"""
+        seed = self.next_seed()
+        engine.rng = self.stream(seed)
+        engine.reset()
+        engine.seed = seed
+        return seed
+
+    def fill_secrets(self, out, low, high, seeds_out=None):
+        """Draw the secrets of the next len(out) games into out.
+
+        out (and seeds_out, which receives the game seeds) can be NumPy
+        int64 arrays or any mutable sequences. Secrets are the same as
+        secret_for(seed, low, high) for each game.
+        """
+        n = len(out)
+        first = next(self._games)
+        # Claim the rest of the block
+        self._games = itertools.count(first + n)
+        if (self.generator == 'splitmix' and _numpy() is not None and isinstance(out, np.ndarray)
+                and -2 ** 62 <= low and high < 2 ** 62):
+            seeds = _seed_array(self.root_seed, first, n)
+            out[:] = _splitmix_randint(seeds, low, high)
+            if seeds_out is not None:
+                seeds_out[:] = seeds
+            return out
+        for i in range(n):
+            seed = self.seed_at(first + i)
+            out[i] = secret_for(seed, low, high, self.generator)
+            if seeds_out is not None:
+                seeds_out[i] = seed
+        return out
+
+
+class SecretPool:
+    """Secrets for upcoming games, drawn from an RNGService a block at a time"""
+
+    def __init__(self, service, low, high, size=4096):
+        self.service = service
+        self.low = low
+        self.high = high
+        # Preallocated once and refilled in place
+        if _numpy() is not None and -2 ** 62 <= low and high < 2 ** 62:
+            self._secrets = np.empty(size, dtype=np.int64)
+            self._seeds = np.empty(size, dtype=np.int64)
+        else:
+            self._secrets = [0] * size
+            self._seeds = [0] * size
+        self._next = size
+
+    def next(self):
+        """Return (seed, secret) for the next game"""
+        if self._next == len(self._secrets):
+            self.service.fill_secrets(self._secrets, self.low, self.high, self._seeds)
+            self._next = 0
+        i = self._next
+        self._next += 1
+        return int(self._seeds[i]), int(self._secrets[i])
+
+
+# Vectorized SplitMix64, for fill_secrets. uint64 arithmetic on arrays wraps
+# around like the & MASK64 in the scalar code.
+
+def _mix64_array(z):
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _seed_array(root_seed, first, n):
+    index = np.arange(first + 1, first + n + 1, dtype=np.uint64)
+    keys = np.uint64(root_seed & MASK64) + index * np.uint64(GAMMA)
+    return (_mix64_array(keys) >> np.uint64(1)).astype(np.int64)
+
+
+def _splitmix_randint(seeds, low, high):
+    """SplitMixRandom(seed).randint(low, high) for an array of seeds.
+
+    Same rejection sampling as random.Random: draw bit_length(width) bits
+    and redraw while the value is out of range.
+    """
+    width = high - low + 1
+    shift = np.uint64(64 - width.bit_length())
+    keys = seeds.astype(np.uint64)
+    values = np.empty(len(seeds), dtype=np.uint64)
+    pending = np.arange(len(seeds))
+    counter = 1
+    while pending.size:
+        draw = _mix64_array(keys[pending] + np.uint64(counter * GAMMA & MASK64)) >> shift
+        ok = draw < np.uint64(width)
+        values[pending[ok]] = draw[ok]
+        pending = pending[~ok]
+        counter += 1
+    return values.astype(np.int64) + low
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import game_engine
+
+    parser = argparse.ArgumentParser(description="Show the secret number behind a game seed")
+    parser.add_argument('seed', type=int)
+    parser.add_argument('--low', type=int, default=game_engine.MIN_NUMBER)
+    parser.add_argument('--high', type=int, default=game_engine.MAX_NUMBER)
+    parser.add_argument('--generator', choices=GENERATORS, default=DEFAULT_GENERATOR)
+    args = parser.parse_args()
+    print(secret_for(args.seed, args.low, args.high, args.generator))
@@ -0,0 +1,284 @@
+"""Multi-session game server.
+
+Hosts many independent games over a line-based TCP protocol, all using the
+rules from game_engine and recording into one shared stats/leaderboard
+store. Each connection is one session:
+
+    server: HELLO <low> <high> <max_attempts>
+    client: GUESS <n>   ->  LOW <attempts left> | HIGH <attempts left> | INVALID
+                            | WIN <attempts> | LOSE <secret>
+    client: NAME <name> ->  OK       (name used for leaderboard entries)
+    client: NEW         ->  OK       (abandon the current game)
+    client: STATS       ->  STATS <json>
+    client: TOP [k]     ->  TOP <json>  (k is clamped to 1-100)
+    client: QUIT        ->  BYE
+
+A new game starts automatically after WIN or LOSE. Anything else gets an
+ERR line. Run `python game_server.py load` against a running server to
+generate load from local clients.
+"""
+import asyncio
+import json
+import signal
+import time
+
+import game_engine
+import game_history
+import game_rng
+import game_storage
+from game_engine import GameEngine
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 5050
+
+# Longest line a client may send before the connection is dropped
+MAX_LINE = 256
+
+# Most leaderboard entries one TOP reply holds
+MAX_TOP = 100
+
+
+class GameSession(asyncio.Protocol):
+    """One client connection and its game"""
+
+    __slots__ = ('server', 'transport', 'engine', 'guesses', 'player', 'buffer')
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.engine = GameEngine(server.low, server.high, server.max_attempts)
+        server.new_game(self.engine)
+        self.guesses = []
+        self.player = None
+        self.buffer = b''
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.sessions += 1
+        transport.write(self.server.greeting)
+
+    def connection_lost(self, exc):
+        self.server.sessions -= 1
+
+    def data_received(self, data):
+        self.buffer += data
+        while True:
+            line, sep, rest = self.buffer.partition(b'\n')
+            if not sep:
+                if len(self.buffer) > MAX_LINE:
+                    self.transport.write(b'ERR line too long\n')
+                    self.transport.close()
+                return
+            self.buffer = rest
+            reply = self.server.handle(self, line.strip())
+            self.transport.write(reply)
+            if reply == b'BYE\n':
+                self.transport.close()
+                return
+
+
+class GameServer:
+    """Shared state for all sessions: game settings, store and counters"""
+
+    def __init__(self, store, low=game_engine.MIN_NUMBER, high=game_engine.MAX_NUMBER,
+                 max_attempts=None, writer=None, rng=None, history=None):
+        self.store = store
+        # Optional game_storage.BackgroundWriter that saves the store
+        self.writer = writer
+        # Optional game_history.HistoryWriter for every finished game's guesses
+        self.history = history
+        self.low = low
+        self.high = high
+        self.max_attempts = game_engine.attempt_budget(low, high) if max_attempts is None else max_attempts
+        self.greeting = f"HELLO {low} {high} {self.max_attempts}\n".encode()
+        # Every game gets its own seed, recorded with the game
+        self.rng = rng or game_rng.RNGService()
+        self.secrets = game_rng.SecretPool(self.rng, low, high)
+        self.sessions = 0
+        self.requests = 0
+
+    def handle(self, session, line):
+        """Answer one request line from a session"""
+        self.requests += 1
+        command, _, argument = line.partition(b' ')
+        command = command.upper()
+        if command == b'GUESS':
+            try:
+                guess = int(argument)
+            except ValueError:
+                return b'ERR please enter a valid number\n'
+            return self.guess(session, guess)
+        if command == b'NAME' and argument:
+            session.player = argument.decode(errors='replace')[:32]
+            return b'OK\n'
+        if command == b'NEW':
+            self.new_game(session.engine)
+            session.guesses = []
+            return b'OK\n'
+        if command == b'STATS':
+            stats = dict(self.store.stats)
+            if stats['best_score'] == float('inf'):
+                stats['best_score'] = None  # Keep the reply valid JSON
+            return b'STATS ' + json.dumps(stats).encode() + b'\n'
+        if command == b'TOP':
+            try:
+                k = int(argument or 10)
+            except ValueError:
+                return b'ERR TOP takes a number\n'
+            k = max(1, min(k, MAX_TOP))
+            return b'TOP ' + json.dumps(self.store.leaderboard.top(k)).encode() + b'\n'
+        if command == b'QUIT':
+            return b'BYE\n'
+        return b'ERR unknown command\n'
+
+    def new_game(self, engine):
+        """Start engine on the next pre-drawn secret"""
+        seed, secret = self.secrets.next()
+        engine.reset(secret)
+        engine.seed = seed
+
+    def guess(self, session, guess):
+        engine = session.engine
+        result = engine.guess(guess)
+        if result != game_engine.INVALID:
+            session.guesses.append(guess)
+        if result == game_engine.TOO_LOW:
+            return b'LOW %d\n' % engine.attempts_left
+        if result == game_engine.TOO_HIGH:
+            return b'HIGH %d\n' % engine.attempts_left
+        if result == game_engine.INVALID:
+            return b'INVALID\n'
+        attempts = engine.attempts
+        won = result == game_engine.WON
+        self.store.record_game(won, attempts, seed=engine.seed, generator=self.rng.generator,
+                               low=engine.low, high=engine.high, max_attempts=engine.max_attempts)
+        if won:
+            self.store.add_score(attempts, player=session.player)
+            reply = b'WIN %d\n' % attempts
+        else:
+            reply = b'LOSE %d\n' % engine.secret_number
+        if self.writer is not None:
+            self.writer.mark_dirty()
+        if self.history is not None:
+            self.history.add_game(engine, session.guesses)
+        session.guesses = []
+        self.new_game(engine)
+        return reply
+
+
+async def serve(store, host=DEFAULT_HOST, port=DEFAULT_PORT, **game_options):
+    """Run the server until SIGINT or SIGTERM"""
+    game_server = GameServer(store, **game_options)
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Not on Windows; Ctrl+C still raises KeyboardInterrupt there
+    server = await loop.create_server(lambda: GameSession(game_server), host, port, backlog=4096)
+    async with server:
+        await stop.wait()
+
+
+# Load generator
+
+async def _client(host, port, games, latencies, results):
+    reader, writer = await asyncio.open_connection(host, port)
+    _, low, high, _ = (await reader.readline()).split()
+    for _ in range(games):
+        lo, hi = int(low), int(high)
+        while True:
+            guess = (lo + hi) // 2
+            start = time.perf_counter()
+            writer.write(b'GUESS %d\n' % guess)
+            reply = (await reader.readline()).split()
+            latencies.append(time.perf_counter() - start)
+            if reply[0] == b'LOW':
+                lo = guess + 1
+            elif reply[0] == b'HIGH':
+                hi = guess - 1
+            else:
+                results[reply[0].decode()] = results.get(reply[0].decode(), 0) + 1
+                break
+    writer.write(b'QUIT\n')
+    await reader.readline()
+    writer.close()
+    await writer.wait_closed()
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+async def run_load(host=DEFAULT_HOST, port=DEFAULT_PORT, clients=100, games=10):
+    """Play games from many concurrent clients and report request latency"""
+    latencies = []
+    results = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, games, latencies, results) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'clients': clients,
+        'games': clients * games,
+        'results': results,
+        'requests': len(latencies),
+        'elapsed_seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed) if elapsed else None,
+        'latency_ms': {
+            'p50': round(_percentile(latencies, 0.50) * 1000, 3),
+            'p90': round(_percentile(latencies, 0.90) * 1000, 3),
+            'p99': round(_percentile(latencies, 0.99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        }
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Number Guessing Game server")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="run the game server")
+    serve_parser.add_argument('--host', default=DEFAULT_HOST)
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--storage', choices=['json', 'binary', 'sqlite'], default=None)
+    serve_parser.add_argument('--low', type=int, default=game_engine.MIN_NUMBER)
+    serve_parser.add_argument('--high', type=int, default=game_engine.MAX_NUMBER)
+    serve_parser.add_argument('--attempts', type=int, default=None,
+                              help="attempt limit (default: derived from the range)")
+    serve_parser.add_argument('--seed', type=int, default=None,
+                              help="root seed for reproducible games (default: random)")
+    serve_parser.add_argument('--history', default=game_history.HISTORY_FILE,
+                              help="file for the guesses of every game ('' to turn off)")
+    serve_parser.add_argument('--rng', choices=game_rng.GENERATORS, default=game_rng.DEFAULT_GENERATOR,
+                              help="generator for per-game streams")
+
+    load_parser = subparsers.add_parser('load', help="generate load against a running server")
+    load_parser.add_argument('--host', default=DEFAULT_HOST)
+    load_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    load_parser.add_argument('--clients', type=int, default=100)
+    load_parser.add_argument('--games', type=int, default=10, help="games per client")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        store = game_storage.open_store(args.storage)
+        history = game_history.HistoryWriter(args.history) if args.history else None
+        writer = game_storage.BackgroundWriter(store, history=history)
+        try:
+            asyncio.run(serve(store, args.host, args.port, writer=writer, low=args.low,
+                              high=args.high, max_attempts=args.attempts,
+                              rng=game_rng.RNGService(args.seed, args.rng), history=history))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            writer.close()
+            if history is not None:
+                history.close()
+    else:
+        report = asyncio.run(run_load(args.host, args.port, args.clients, args.games))
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,141 @@
+"""Running game statistics.
+
+A stats dict holds totals, the attempts-to-win histogram, streaks and
+per-day/per-hour rollups, and record_game() folds one finished game into
+it in constant time. Rollups live in fixed-size ring buffers, one slot per
+day or hour, so memory stays bounded however long the game runs and
+nothing ever has to rescan the game history or the leaderboard.
+
+Everything in a stats dict is plain JSON, so it can go straight into a
+snapshot.
+"""
+import math
+from datetime import date as _date
+from datetime import datetime
+
+# Ring buffer sizes
+DAYS_KEPT = 30
+HOURS_KEPT = 48
+
+ROLLUPS = {'daily': DAYS_KEPT, 'hourly': HOURS_KEPT}
+
+
+def new_stats():
+    """Return an empty statistics dict"""
+    return {
+        'games_played': 0,
+        'games_won': 0,
+        'games_lost': 0,
+        'total_attempts': 0,
+        'best_score': float('inf'),
+        'average_attempts': 0,
+        'last_played': None,
+        # attempts_histogram[n] counts games won in exactly n attempts
+        'attempts_histogram': [],
+        'p50_attempts': None,
+        'p90_attempts': None,
+        # Positive for a run of wins, negative for a run of losses
+        'current_streak': 0,
+        'longest_win_streak': 0,
+        'longest_losing_streak': 0,
+        # Ring buffers of [bucket, games_played, games_won, total_attempts]
+        'daily': [None] * DAYS_KEPT,
+        'hourly': [None] * HOURS_KEPT
+    }
+
+
+def timestamp():
+    """The current time as a "%Y-%m-%d %H:%M" date, as games are recorded"""
+    return datetime.now().strftime("%Y-%m-%d %H:%M")
+
+
+def _day_number(date):
+    return _date.fromisoformat(date[:10]).toordinal()
+
+
+def _hour_number(date):
+    return _day_number(date) * 24 + int(date[11:13])
+
+
+def _bump(ring, number, bucket, won, attempts):
+    """Count a game in the ring slot for bucket, reusing the slot if it is stale"""
+    slot = ring[number % len(ring)]
+    if slot is None or slot[0] < bucket:
+        ring[number % len(ring)] = [bucket, 1, int(won), attempts]
+    elif slot[0] == bucket:
+        slot[1] += 1
+        slot[2] += won
+        slot[3] += attempts
+    # Otherwise the game is older than the window; it still counts in the totals
+
+
+def percentile(histogram, fraction):
+    """Nearest-rank percentile of an attempts histogram, or None if it is empty"""
+    total = sum(histogram)
+    if not total:
+        return None
+    target = max(math.ceil(total * fraction), 1)
+    seen = 0
+    for attempts, count in enumerate(histogram):
+        seen += count
+        if seen >= target:
+            return attempts
+    return len(histogram) - 1
+
+
+def record_game(stats, won, attempts, date=None):
+    """Fold one finished game into a statistics dict"""
+    date = date or timestamp()
+    stats['games_played'] += 1
+    stats['total_attempts'] += attempts
+    stats['average_attempts'] = stats['total_attempts'] / stats['games_played']
+    stats['last_played'] = date
+
+    streak = stats['current_streak']
+    if won:
+        stats['games_won'] += 1
+        if attempts < stats['best_score']:
+            stats['best_score'] = attempts
+        histogram = stats['attempts_histogram']
+        if attempts >= len(histogram):
+            histogram.extend([0] * (attempts + 1 - len(histogram)))
+        histogram[attempts] += 1
+        # The histogram is at most max_attempts long, so this stays cheap
+        stats['p50_attempts'] = percentile(histogram, 0.50)
+        stats['p90_attempts'] = percentile(histogram, 0.90)
+        streak = streak + 1 if streak > 0 else 1
+        stats['longest_win_streak'] = max(stats['longest_win_streak'], streak)
+    else:
+        stats['games_lost'] += 1
+        streak = streak - 1 if streak < 0 else -1
+        stats['longest_losing_streak'] = max(stats['longest_losing_streak'], -streak)
+    stats['current_streak'] = streak
+
+    try:
+        _bump(stats['daily'], _day_number(date), date[:10], won, attempts)
+        _bump(stats['hourly'], _hour_number(date), date[:13] + ':00', won, attempts)
+    except ValueError:
+        pass  # Not a "%Y-%m-%d %H:%M" date; keep it out of the rollups
+    return stats
+
+
+def rollup(stats, period='daily'):
+    """Return the buckets in the 'daily' or 'hourly' window, oldest first.
+
+    Each bucket is a dict with 'period', 'games_played', 'games_won',
+    'win_rate' and 'average_attempts'. Slots left over from before the
+    window are skipped.
+    """
+    size = ROLLUPS[period]
+    number = _day_number if period == 'daily' else _hour_number
+    slots = sorted(slot for slot in stats.get(period) or () if slot)
+    if not slots:
+        return []
+    newest = number(slots[-1][0])
+    return [{
+        'period': bucket,
+        'games_played': played,
+        'games_won': won,
+        'win_rate': won / played,
+        'average_attempts': attempts / played
+    } for bucket, played, won, attempts in slots if newest - number(bucket) < size]
@@ -0,0 +1,615 @@
+"""Persistence for statistics and the leaderboard.
+
+game_data.json holds a snapshot of the stats and leaderboard. Every game
+and leaderboard entry recorded after that snapshot is appended as one JSON
+line to game_events.jsonl, so the cost of saving a game does not depend on
+how much history there is. On startup the snapshot is loaded and the
+journal replayed on top of it; a checkpoint folds the journal back into a
+new snapshot and moves the old journal into game_archive/, where
+analytics.py can read the full event history.
+
+Several game processes can share one directory. Appends and checkpoints
+take an advisory lock on game_data.json.lock, which also holds the last
+event number, the next free entry id and the number of the newest
+snapshot, so events are numbered in journal order, entry ids never
+repeat and every process can tell when another one has checkpointed. Each process merges what the
+others saved when it syncs or checkpoints, so counters add up instead of
+the last writer winning. Games are only recorded in memory while playing;
+the lock is taken when they are written.
+
+With snapshot_format='binary' (the 'binary' backend) the snapshot is
+game_data.bin instead, memory-mapped on load; see snapshot.py.
+"""
+import json
+import logging
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import game_stats
+import snapshot
+from leaderboard import EVICT_WORST, Leaderboard
+
+DATA_FILE = 'game_data.json'
+JOURNAL_FILE = 'game_events.jsonl'
+
+# Checkpointed journals are kept here, next to the data file
+ARCHIVE_DIR = 'game_archive'
+
+# Backend used by open_store() unless one is passed in
+STORAGE_ENV = 'GUESS_STORAGE'
+
+# Compact the journal into the snapshot at startup once it is this long
+COMPACT_AT_STARTUP = 1000
+
+# Last event seq, next free entry id and the seq of the newest snapshot,
+# at the start of the lock file
+COUNTERS = struct.Struct('<QQQ')
+
+# Entry ids a process reserves at a time
+ID_BLOCK = 64
+
+log = logging.getLogger(__name__)
+
+
+def write_atomic(path, data):
+    """Replace path with data (str or bytes) so readers see either the old or the new file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb' if isinstance(data, bytes) else 'w') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _file_id(path):
+    """(device, inode) of path, which changes when the file is replaced; None if missing"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+if fcntl is not None:
+    def _lock_file(fd):
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock_file(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+else:
+    # msvcrt locks byte ranges; lock the byte after the counters so they
+    # can still be read and written
+    def _lock_file(fd):
+        os.lseek(fd, COUNTERS.size, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                pass  # LK_LOCK gives up after 10 seconds; keep waiting
+
+    def _unlock_file(fd):
+        os.lseek(fd, COUNTERS.size, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class StoreLock:
+    """Exclusive lock shared by every process using a store, and their counters.
+
+    The threads of one process share the file lock through an RLock, so
+    a locked section may take it again. The counters are one fixed-size
+    record at the start of the file, overwritten in place.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._rlock = threading.RLock()
+        self._depth = 0
+
+    def __enter__(self):
+        self._rlock.acquire()
+        if not self._depth:
+            try:
+                _lock_file(self._fd)
+            except BaseException:
+                self._rlock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if not self._depth:
+            _unlock_file(self._fd)
+        self._rlock.release()
+
+    def read(self):
+        """Return (last seq, next free id, snapshot seq), or None for a new lock file"""
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        data = os.read(self._fd, COUNTERS.size)
+        return COUNTERS.unpack(data) if len(data) == COUNTERS.size else None
+
+    def write(self, seq, next_id, snapshot_seq):
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.write(self._fd, COUNTERS.pack(seq, next_id, snapshot_seq))
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class JournalStore:
+    """Snapshot plus append-only event journal for stats and leaderboard"""
+
+    def __init__(self, data_file=None, journal_file=JOURNAL_FILE,
+                 checkpoint_every=None, fsync=False,
+                 leaderboard_capacity=None, leaderboard_evict=EVICT_WORST,
+                 archive_dir=ARCHIVE_DIR, snapshot_format='json'):
+        if snapshot_format not in ('json', 'binary'):
+            raise ValueError(f"unknown snapshot format: {snapshot_format}")
+        self.snapshot_format = snapshot_format
+        if data_file is None:
+            data_file = snapshot.BINARY_FILE if snapshot_format == 'binary' else DATA_FILE
+        self.data_file = data_file
+        self.journal_file = journal_file
+        # Where checkpointed journals go (relative to the data file's
+        # directory); None to just truncate them
+        self.archive_dir = (None if archive_dir is None else
+                            os.path.join(os.path.dirname(data_file), archive_dir))
+        # Checkpoint after this many journal events (None: only on close)
+        self.checkpoint_every = checkpoint_every
+        self.fsync = fsync
+        self.leaderboard_capacity = leaderboard_capacity
+        self.leaderboard_evict = leaderboard_evict
+        # Write each event as it happens; BackgroundWriter turns this off
+        # and calls flush() itself
+        self.autoflush = True
+        self.stats = game_stats.new_stats()
+        self.leaderboard = self._new_leaderboard()
+        self.seq = 0
+        self.journal_events = 0
+        self._journal = None
+        self._pending = []
+        self._pending_lock = threading.Lock()  # Guards _pending only
+        # Guards the journal and snapshot files, across processes too
+        self._lock = StoreLock(f"{data_file}.lock")
+        # What has been read: the snapshot, and the journal up to an offset
+        self._snapshot_seq = 0
+        self._journal_read = 0
+        # Where our last append ended
+        self._journal_end = None
+        # Seqs of events this process wrote that replay has not passed yet
+        self._own_seqs = set()
+        # Reserved entry ids, [_next_id, _id_end)
+        self._next_id = self._id_end = 0
+
+    def load(self):
+        """Load the snapshot and replay the journal on top of it"""
+        with self._lock:
+            self._snapshot_seq = self.seq = self._load_snapshot()
+            self._journal_read = 0
+            self.journal_events = self._replay_journal()
+            if self._lock.read() is None:
+                # First run, or data written before there was a lock file
+                next_id = max(self.leaderboard.total_added,
+                              max((entry.get('id', 0) for entry in self.leaderboard), default=0)) + 1
+                self._lock.write(self.seq, next_id, self._snapshot_seq)
+            self._reserve_ids()
+            if self.journal_events >= COMPACT_AT_STARTUP:
+                self.checkpoint()
+        return self
+
+    def _load_snapshot(self):
+        """Load the snapshot into stats and leaderboard and return its seq"""
+        path = self.data_file
+        binary = self.snapshot_format == 'binary'
+        json_file = os.path.join(os.path.dirname(path), DATA_FILE)
+        if binary and not os.path.exists(path) and os.path.exists(json_file):
+            # Switching to binary: start from the JSON snapshot, and the
+            # next checkpoint writes the binary one
+            path, binary = json_file, False
+        try:
+            if binary:
+                view = snapshot.SnapshotView(path)
+            else:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            # Snapshots are replaced atomically, so this is damage from
+            # outside the game. Keep the file for inspection and start over.
+            log.warning("could not read %s (%s), moving it aside", path, e)
+            os.replace(path, f"{path}.corrupt")
+            return 0
+        if binary:
+            self.stats.update(view.stats())
+            if self.leaderboard_capacity is None:
+                # Entries stay in the mapped file until they are read
+                self.leaderboard = snapshot.MappedLeaderboard(view)
+            else:
+                # Eviction needs every entry in a Leaderboard
+                self.leaderboard = self._new_leaderboard(view.entries(), view.leaderboard_total)
+                view.close()
+            seq = view.seq
+        else:
+            self.stats.update(data.get('stats', {}))
+            self.leaderboard = self._new_leaderboard(data.get('leaderboard', []),
+                                                     data.get('leaderboard_total', 0))
+            seq = data.get('seq', 0)
+        if self.stats['games_played']:
+            # Snapshots from before average_attempts was maintained have 0 here
+            self.stats['average_attempts'] = self.stats['total_attempts'] / self.stats['games_played']
+        return seq
+
+    def _release_leaderboard(self):
+        """Unmap a MappedLeaderboard's file; Windows can't replace a mapped file"""
+        if isinstance(self.leaderboard, snapshot.MappedLeaderboard):
+            self.leaderboard.close()
+
+    def _new_leaderboard(self, entries=(), total_added=0):
+        return Leaderboard(entries, self.leaderboard_capacity, self.leaderboard_evict, total_added)
+
+    def _replay_journal(self):
+        """Apply journal events past the snapshot, from where the last replay
+        stopped, and return how many there were. Caller holds _lock.
+        """
+        try:
+            f = open(self.journal_file, 'rb')
+        except FileNotFoundError:
+            self._journal_read = 0
+            return 0
+        count = 0
+        good_end = self._journal_read
+        with f:
+            f.seek(good_end)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # A write torn by a crash can only be the last line
+                    log.warning("ignoring damaged tail of %s at byte %d", self.journal_file, good_end)
+                    break
+                good_end += len(line)
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # A torn line a later writer appended after
+                    log.warning("skipping damaged line of %s", self.journal_file)
+                    continue
+                seq = event['seq']
+                if seq <= self._snapshot_seq:
+                    continue  # Already in the snapshot
+                if seq in self._own_seqs:
+                    self._own_seqs.discard(seq)
+                    continue  # Applied when it was recorded
+                self._apply(event)
+                self.seq = max(self.seq, seq)
+                count += 1
+        if good_end < os.path.getsize(self.journal_file):
+            os.truncate(self.journal_file, good_end)
+        self._journal_read = good_end
+        return count
+
+    def sync(self):
+        """Merge in the games and scores other processes have saved.
+
+        Must be called from the thread that records games.
+        """
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if self._lock.read()[2] != self._snapshot_seq:
+            self._reload()  # Another process checkpointed
+        else:
+            self.journal_events += self._replay_journal()
+
+    def _reload(self):
+        """Start over from the current snapshot and journal, keeping unwritten events"""
+        self._release_leaderboard()
+        self.stats = game_stats.new_stats()
+        self.leaderboard = self._new_leaderboard()
+        self._snapshot_seq = self.seq = self._load_snapshot()
+        self._journal_read = 0
+        # Our own events after the snapshot are in the journal
+        self._own_seqs.clear()
+        self.journal_events = self._replay_journal()
+        with self._pending_lock:
+            pending = list(self._pending)
+        for event in pending:
+            self._apply(event)
+        self.journal_events += len(pending)
+
+    def _apply(self, event):
+        if event['type'] == 'game':
+            game_stats.record_game(self.stats, event['won'], event['attempts'], event['date'])
+        elif event['type'] == 'score':
+            self.leaderboard.add(event['entry'])
+
+    def _append(self, event):
+        with self._pending_lock:
+            self._pending.append(event)
+        self.journal_events += 1
+        if self.autoflush:
+            self.flush()
+        if self.checkpoint_every and self.journal_events >= self.checkpoint_every:
+            self.checkpoint()
+
+    def flush(self):
+        """Append pending events to the journal and return how many were written"""
+        with self._lock:
+            with self._pending_lock:
+                events, self._pending = self._pending, []
+            self._write_events(events)
+        return len(events)
+
+    def _write_events(self, events):
+        """Number events and append them to the journal; caller holds _lock"""
+        if not events:
+            return
+        seq, next_id, snapshot_seq = self._lock.read()
+        # Claim the numbers first: a crash before the append only leaves a gap
+        self._lock.write(seq + len(events), next_id, snapshot_seq)
+        for event in events:
+            seq += 1
+            event['seq'] = seq
+            self._own_seqs.add(seq)
+        self.seq = max(self.seq, seq)
+        data = ''.join(json.dumps(event, separators=(',', ':')) + '\n' for event in events).encode()
+        journal, size = self._open_journal()
+        if size and size != self._journal_end:
+            # Someone else wrote last; check they finished their line
+            journal.seek(-1, os.SEEK_END)
+            if journal.read(1) != b'\n':
+                data = b'\n' + data  # Don't run on from a line torn by a crashed writer
+        journal.write(data)
+        journal.flush()
+        self._journal_end = size + len(data)
+        if self.fsync:
+            os.fsync(journal.fileno())
+        if fcntl is None:
+            # Windows can't move an open file, which other processes' checkpoints do
+            journal.close()
+            self._journal = None
+
+    def _open_journal(self):
+        """Return the journal opened for appending, reopened if a checkpoint
+        moved it, and its size
+        """
+        journal = self._journal
+        if journal is not None:
+            st = os.fstat(journal.fileno())
+            if _file_id(self.journal_file) != (st.st_dev, st.st_ino):
+                journal.close()
+                journal = None
+        if journal is None:
+            journal = self._journal = open(self.journal_file, 'a+b')
+            st = os.fstat(journal.fileno())
+        return journal, st.st_size
+
+    def _claim_id(self):
+        """Return an entry id that no other process will hand out"""
+        if self._next_id == self._id_end:
+            with self._lock:
+                self._reserve_ids()
+        self._next_id += 1
+        return self._next_id - 1
+
+    def _reserve_ids(self):
+        seq, next_id, snapshot_seq = self._lock.read()
+        self._lock.write(seq, next_id + ID_BLOCK, snapshot_seq)
+        self._next_id, self._id_end = next_id, next_id + ID_BLOCK
+
+    def record_game(self, won, attempts, date=None, seed=None, generator=None, theme=None,
+                    low=None, high=None, max_attempts=None):
+        """Record a finished game, with the seed, range and attempt limit it was played with"""
+        event = {'type': 'game', 'won': won, 'attempts': attempts, 'date': date or game_stats.timestamp()}
+        if seed is not None:
+            # Enough to replay the game: game_rng.secret_for(seed, low, high, generator)
+            event['seed'] = seed
+            event['rng'] = generator
+        if low is not None:
+            event['low'] = low
+            event['high'] = high
+            event['max_attempts'] = max_attempts
+        if theme is not None:
+            event['theme'] = theme
+        self._apply(event)
+        self._append(event)
+
+    def add_score(self, score, player=None, date=None):
+        """Add a winning score to the leaderboard and return the new entry.
+
+        Every entry gets an id unique across processes, and unnamed
+        players are named after it.
+        """
+        entry_id = self._claim_id()
+        entry = {
+            'id': entry_id,
+            'player': player or f"Player_{entry_id}",
+            'score': score,
+            'date': date or game_stats.timestamp()
+        }
+        event = {'type': 'score', 'entry': entry}
+        self._apply(event)
+        self._append(event)
+        return entry
+
+    def checkpoint(self):
+        """Write a new snapshot and start a new journal, archiving the old one.
+
+        Whatever other processes have saved is merged in first, so the
+        snapshot has every game. Must be called from the thread that
+        records games, since it reads the in-memory stats and leaderboard.
+        """
+        with self._lock:
+            self._sync()
+            with self._pending_lock:
+                events, self._pending = self._pending, []
+            if self.archive_dir is not None:
+                # The archive must have every event
+                self._write_events(events)
+            # Otherwise pending events are already part of the snapshot,
+            # but still take their numbers so other processes see a new one
+            seq, next_id, _ = self._lock.read()
+            if self.archive_dir is None:
+                seq += len(events)
+            if self.snapshot_format == 'binary':
+                self._write_binary_snapshot(seq)
+            else:
+                data = {
+                    'seq': seq,
+                    'stats': self.stats,
+                    'leaderboard': self.leaderboard.to_list(),
+                    'leaderboard_total': self.leaderboard.total_added
+                }
+                write_atomic(self.data_file, json.dumps(data, indent=2))
+            self._lock.write(seq, next_id, seq)
+            self._snapshot_seq = self.seq = seq
+            self._own_seqs.clear()
+            # Events up to seq are now in the snapshot; if we crash before the
+            # journal is moved or truncated they are skipped on replay.
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            journal_size = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+            if journal_size and self.archive_dir is not None:
+                os.makedirs(self.archive_dir, exist_ok=True)
+                os.replace(self.journal_file,
+                           os.path.join(self.archive_dir, f"events-{seq:012d}.jsonl"))
+            elif journal_size:
+                os.truncate(self.journal_file, 0)
+            self._journal_read = 0
+        self.journal_events = 0
+
+    def _write_binary_snapshot(self, seq):
+        leaderboard = self.leaderboard
+        if isinstance(leaderboard, snapshot.MappedLeaderboard):
+            data = leaderboard.encode(seq, self.stats)
+        else:
+            data = snapshot.encode_entries(seq, self.stats, leaderboard.total_added, leaderboard)
+        self._release_leaderboard()
+        write_atomic(self.data_file, data)
+        if self.leaderboard_capacity is None:
+            # Map the new file; entries added since are folded into it
+            self.leaderboard = snapshot.MappedLeaderboard(snapshot.SnapshotView(self.data_file))
+
+    def close(self):
+        """Checkpoint and release the journal, snapshot and lock file"""
+        if self.journal_events:
+            self.checkpoint()
+        elif self._journal is not None:
+            with self._lock:
+                self._journal.close()
+                self._journal = None
+        self._release_leaderboard()
+        self._lock.close()
+
+
+class BackgroundWriter:
+    """Write-behind persistence for a store.
+
+    Recording a game only queues it in the store; a worker thread flushes
+    the queue at most once per interval, so a burst of updates costs one
+    write and the caller never waits for the disk. An optional
+    game_history.HistoryWriter is flushed along with the store, and
+    on_flush() is called after every flush that wrote something, from
+    whichever thread flushed. close() flushes what is left and closes the
+    store.
+    """
+
+    def __init__(self, store, interval=1.0, history=None, on_flush=None):
+        self.store = store
+        self.history = history
+        self.on_flush = on_flush
+        self.interval = interval
+        store.autoflush = False
+        # Counters
+        self.requests = 0
+        self.writes = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+        self._dirty = threading.Event()
+        self._closing = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='BackgroundWriter', daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        """Note that the store has unsaved changes"""
+        self.requests += 1
+        self._dirty.set()
+
+    def _run(self):
+        while not self._closing.is_set():
+            self._dirty.wait()
+            # Let more updates pile up before writing
+            self._closing.wait(self.interval)
+            self._dirty.clear()
+            try:
+                self.flush()
+            except Exception:
+                log.exception("background flush failed")
+
+    def flush(self):
+        """Write pending changes now"""
+        with self._flush_lock:
+            if self.history is not None:
+                self.history.flush()
+            start = time.perf_counter()
+            if not self.store.flush():
+                return
+            elapsed = time.perf_counter() - start
+            self.writes += 1
+            self.flush_seconds += elapsed
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+        if self.on_flush is not None:
+            self.on_flush()
+
+    def counters(self):
+        """Snapshot of the write counters"""
+        return {
+            'requests': self.requests,
+            'writes': self.writes,
+            'writes_saved': max(self.requests - self.writes, 0),
+            'avg_flush_seconds': self.flush_seconds / self.writes if self.writes else 0.0,
+            'max_flush_seconds': self.max_flush_seconds,
+            'last_flush_seconds': self.last_flush_seconds
+        }
+
+    def close(self):
+        """Stop the worker, flush and close the store"""
+        self._closing.set()
+        self._dirty.set()
+        self._thread.join()
+        self.flush()
+        self.store.close()
+        log.debug("background writer: %s", self.counters())
+
+
+def open_store(backend=None, **options):
+    """Create and load the 'json' (default), 'binary' or 'sqlite' store.
+
+    The backend can also be chosen with the GUESS_STORAGE environment
+    variable. Extra keyword arguments go to the store's constructor.
+    """
+    backend = backend or os.environ.get(STORAGE_ENV, 'json')
+    if backend == 'sqlite':
+        from sqlite_store import SQLiteStore
+        return SQLiteStore(**options).load()
+    if backend == 'binary':
+        return JournalStore(snapshot_format='binary', **options).load()
+    if backend != 'json':
+        raise ValueError(f"unknown storage backend: {backend}")
+    return JournalStore(**options).load()
@@ -0,0 +1,218 @@
+"""Leaderboard kept in rank order as scores are added.
+
+Entries are ordered by score (lowest first, or highest first for ratings
+with descending=True), then date, then insertion order. They live in
+a list of short sorted chunks (each kept with bisect), with a Fenwick tree
+over the chunk sizes, so inserting, looking up the rank of a player and
+reading entries at a given rank are all logarithmic, and nothing ever
+re-sorts the whole list.
+"""
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from itertools import islice
+
+EVICT_WORST = 'worst'
+EVICT_OLDEST = 'oldest'
+
+# Chunks are split when they grow past twice this size
+CHUNK_SIZE = 512
+
+
+class Leaderboard:
+    """Ranked leaderboard with optional capacity and eviction policy"""
+
+    def __init__(self, entries=(), capacity=None, evict=EVICT_WORST, total_added=0,
+                 descending=False):
+        if evict not in (EVICT_WORST, EVICT_OLDEST):
+            raise ValueError(f"unknown eviction policy: {evict}")
+        self.capacity = capacity
+        self.evict = evict
+        self.descending = descending
+        # Number of entries ever added, including evicted ones
+        self.total_added = 0
+        self._keys = []      # chunks of (score, date, seq), each sorted
+        self._entries = []   # chunks of entry dicts, parallel to _keys
+        self._maxes = []     # last key of each chunk
+        self._tree = []      # Fenwick tree over chunk lengths
+        self._len = 0
+        self._players = {}   # player -> sorted keys of their entries
+        self._arrival = deque()  # keys in insertion order, for EVICT_OLDEST
+        for entry in entries:
+            self.add(entry)
+        self.total_added = max(self.total_added, total_added)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        """Iterate over entries from best to worst"""
+        for chunk in self._entries:
+            yield from chunk
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("leaderboard index out of range")
+        chunk, offset = self._locate(index)
+        return self._entries[chunk][offset]
+
+    # Fenwick tree helpers, rebuilt whenever chunks are split or removed
+
+    def _rebuild_tree(self):
+        tree = [len(chunk) for chunk in self._keys]
+        for i in range(len(tree)):
+            parent = i | (i + 1)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, chunk, delta):
+        tree = self._tree
+        while chunk < len(tree):
+            tree[chunk] += delta
+            chunk |= chunk + 1
+
+    def _entries_before(self, chunk):
+        """Number of entries in chunks before the given one"""
+        total = 0
+        tree = self._tree
+        while chunk > 0:
+            total += tree[chunk - 1]
+            chunk &= chunk - 1
+        return total
+
+    def _locate(self, index):
+        """Map a 0-based rank to (chunk, offset within chunk)"""
+        tree = self._tree
+        chunk = 0
+        step = 1 << (len(tree).bit_length() - 1) if tree else 0
+        while step:
+            probe = chunk + step
+            if probe <= len(tree) and tree[probe - 1] <= index:
+                chunk = probe
+                index -= tree[probe - 1]
+            step >>= 1
+        return chunk, index
+
+    def add(self, entry):
+        """Insert an entry dict with 'player', 'score' and 'date' keys"""
+        score = -entry['score'] if self.descending else entry['score']
+        key = (score, entry['date'], self.total_added)
+        self.total_added += 1
+        if not self._keys:
+            self._keys.append([key])
+            self._entries.append([entry])
+            self._maxes.append(key)
+            self._rebuild_tree()
+        else:
+            chunk = bisect_left(self._maxes, key)
+            if chunk == len(self._maxes):
+                chunk -= 1
+                self._maxes[chunk] = key
+            keys = self._keys[chunk]
+            offset = bisect_right(keys, key)
+            keys.insert(offset, key)
+            self._entries[chunk].insert(offset, entry)
+            if len(keys) > 2 * CHUNK_SIZE:
+                self._split(chunk)
+            else:
+                self._tree_add(chunk, 1)
+        self._len += 1
+        insort(self._players.setdefault(entry['player'], []), key)
+        if self.evict == EVICT_OLDEST:
+            self._arrival.append(key)
+        if self.capacity is not None and self._len > self.capacity:
+            self._evict_one()
+        return entry
+
+    # Same spelling as list, so existing callers keep working
+    append = add
+
+    def _split(self, chunk):
+        keys = self._keys[chunk]
+        entries = self._entries[chunk]
+        self._keys[chunk:chunk + 1] = [keys[:CHUNK_SIZE], keys[CHUNK_SIZE:]]
+        self._entries[chunk:chunk + 1] = [entries[:CHUNK_SIZE], entries[CHUNK_SIZE:]]
+        self._maxes[chunk:chunk + 1] = [keys[CHUNK_SIZE - 1], keys[-1]]
+        self._rebuild_tree()
+
+    def _remove(self, chunk, offset):
+        keys = self._keys[chunk]
+        key = keys.pop(offset)
+        entry = self._entries[chunk].pop(offset)
+        self._len -= 1
+        if not keys:
+            del self._keys[chunk], self._entries[chunk], self._maxes[chunk]
+            self._rebuild_tree()
+        else:
+            self._maxes[chunk] = keys[-1]
+            self._tree_add(chunk, -1)
+        player_keys = self._players[entry['player']]
+        player_keys.pop(bisect_left(player_keys, key))
+        if not player_keys:
+            del self._players[entry['player']]
+        return entry
+
+    def _evict_one(self):
+        if self.evict == EVICT_WORST:
+            chunk = len(self._keys) - 1
+            self._remove(chunk, len(self._keys[chunk]) - 1)
+        else:
+            key = self._arrival.popleft()
+            chunk = bisect_left(self._maxes, key)
+            self._remove(chunk, bisect_left(self._keys[chunk], key))
+
+    def _rank_of(self, key):
+        chunk = bisect_left(self._maxes, key)
+        return self._entries_before(chunk) + bisect_left(self._keys[chunk], key) + 1
+
+    def count_before(self, score, date):
+        """Number of entries ranked before any entry with this score and date"""
+        key = (-score if self.descending else score, date)
+        chunk = bisect_left(self._maxes, key)
+        if chunk == len(self._maxes):
+            return self._len
+        return self._entries_before(chunk) + bisect_left(self._keys[chunk], key)
+
+    def top(self, k=10):
+        """Return the k best entries, best first"""
+        return self.page(0, k)
+
+    def page(self, offset, limit):
+        """Return up to limit entries starting at 0-based rank offset"""
+        if offset >= self._len or limit <= 0:
+            return []
+        chunk, start = self._locate(offset)
+        rows = []
+        while chunk < len(self._entries) and len(rows) < limit:
+            rows.extend(self._entries[chunk][start:start + limit - len(rows)])
+            chunk += 1
+            start = 0
+        return rows
+
+    def search(self, text, offset=0, limit=10):
+        """Return (rank, entry) pairs for players whose name contains text.
+
+        Scans in rank order and stops once the page is filled.
+        """
+        text = text.lower()
+        matches = ((rank, entry) for rank, entry in enumerate(self, 1)
+                   if text in entry['player'].lower())
+        return list(islice(matches, offset, offset + limit))
+
+    def rank(self, player):
+        """Return the 1-based rank of player's best entry, or None"""
+        player_keys = self._players.get(player)
+        if not player_keys:
+            return None
+        return self._rank_of(player_keys[0])
+
+    def best(self, player):
+        """Return player's best entry, or None"""
+        rank = self.rank(player)
+        return None if rank is None else self[rank - 1]
+
+    def to_list(self):
+        """Entries as a plain list, best first, for saving"""
+        return list(self)
@@ -0,0 +1,235 @@
+"""Opt-in timers, counters and profiling for the game.
+
+    python number_guessing_game.py --metrics game_metrics.prom
+    python number_guessing_game.py --metrics :9464       # http://localhost:9464/metrics
+    GUESS_METRICS=game_metrics.prom python number_guessing_game.py
+    python number_guessing_game.py --profile-games 20
+
+Metrics.instrument() replaces methods of one object with timed wrappers
+that feed a latency histogram and count errors. Nothing is wrapped unless
+metrics are switched on, so the default path costs nothing. Histograms
+are exported in the Prometheus text format, either rewritten to a file
+every few seconds or served over HTTP.
+
+Profiler runs cProfile and tracemalloc for a number of games, then writes
+game_profile.pstats and game_memory.txt and stops.
+"""
+import cProfile
+import functools
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+
+# A file path, or :PORT to serve /metrics over HTTP
+METRICS_ENV = 'GUESS_METRICS'
+# Number of games to profile
+PROFILE_ENV = 'GUESS_PROFILE_GAMES'
+
+PREFIX = 'guess'
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Seconds between metrics file rewrites
+EXPORT_INTERVAL = 10.0
+
+PROFILE_FILE = 'game_profile.pstats'
+MEMORY_FILE = 'game_memory.txt'
+
+log = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, Prometheus style"""
+
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        # counts[i] holds observations in (BUCKETS[i-1], BUCKETS[i]]; the last is +Inf
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+class Metrics:
+    """Latency histograms and counters for named operations"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        # name -> function returning {key: number}, read at export time
+        self.gauges = {}
+        self._exporter = None
+        self._server = None
+        self.path = None
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_gauges(self, name, read):
+        self.gauges[name] = read
+
+    def instrument(self, obj, methods):
+        """Time calls to obj's methods; methods maps method name to metric name.
+
+        Wrappers are set on the instance, so call this before the methods
+        are handed out as callbacks.
+        """
+        for method, name in methods.items():
+            setattr(obj, method, self._timed(getattr(obj, method), name))
+
+    def _timed(self, func, name):
+        histogram = self.histogram(name)
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                self.count(f'{name}_errors')
+                raise
+            finally:
+                histogram.observe(clock() - start)
+        return timed
+
+    def to_prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = [f'# TYPE {PREFIX}_call_seconds histogram']
+        for name, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ('+Inf',), histogram.counts):
+                cumulative += count
+                lines.append(f'{PREFIX}_call_seconds_bucket{{call="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{PREFIX}_call_seconds_sum{{call="{name}"}} {histogram.sum:.9f}')
+            lines.append(f'{PREFIX}_call_seconds_count{{call="{name}"}} {histogram.count}')
+        lines.append(f'# TYPE {PREFIX}_events_total counter')
+        for name, count in sorted(self.counters.items()):
+            lines.append(f'{PREFIX}_events_total{{event="{name}"}} {count}')
+        for name, read in sorted(self.gauges.items()):
+            for key, value in sorted(read().items()):
+                lines.append(f'{PREFIX}_{name}_{key} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path=None):
+        """Replace the metrics file atomically"""
+        path = path or self.path
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+    def start(self, target, interval=EXPORT_INTERVAL):
+        """Export to target: a file path rewritten every interval, or ':PORT'"""
+        if target.startswith(':'):
+            self._serve(int(target[1:]))
+            return
+        self.path = target
+        stop = threading.Event()
+
+        def export():
+            while not stop.wait(interval):
+                try:
+                    self.write()
+                except OSError:
+                    log.exception("writing %s failed", self.path)
+
+        self._exporter = stop
+        threading.Thread(target=export, name='metrics-export', daemon=True).start()
+
+    def _serve(self, port):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+
+    def close(self):
+        """Stop exporting, writing the metrics file one last time"""
+        if self._exporter is not None:
+            self._exporter.set()
+            self.write()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class Profiler:
+    """cProfile and tracemalloc over the next games games"""
+
+    def __init__(self, games, profile_file=PROFILE_FILE, memory_file=MEMORY_FILE, top=30):
+        self.games_left = games
+        self.profile_file = profile_file
+        self.memory_file = memory_file
+        self.top = top
+        self.profile = cProfile.Profile()
+        tracemalloc.start()
+        self.profile.enable()
+
+    @property
+    def running(self):
+        return self.games_left > 0
+
+    def game_finished(self):
+        """Count a game; after the last one, stop and write the reports"""
+        if not self.running:
+            return
+        self.games_left -= 1
+        if not self.games_left:
+            self.stop()
+
+    def stop(self):
+        self.games_left = 0
+        self.profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.profile.dump_stats(self.profile_file)
+        with open(self.memory_file, 'w') as f:
+            f.write(f"current {current} bytes, peak {peak} bytes\n\n")
+            for stat in snapshot.statistics('lineno')[:self.top]:
+                f.write(f"{stat}\n")
+        log.info("wrote %s and %s", self.profile_file, self.memory_file)
+
+
+if __name__ == "__main__":
+    import argparse
+    import pstats
+
+    parser = argparse.ArgumentParser(description="Show a profile written by --profile-games")
+    parser.add_argument('file', nargs='?', default=PROFILE_FILE)
+    parser.add_argument('--sort', default='cumulative')
+    parser.add_argument('-n', type=int, default=25, help="rows to show")
+    args = parser.parse_args()
+    pstats.Stats(args.file).sort_stats(args.sort).print_stats(args.n)
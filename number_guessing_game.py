@@ -1,12 +1,55 @@
-import tkinter as tk
-from tkinter import messagebox, ttk
-import random
-import json
+import time
+
+# Taken before the other imports, for the startup report
+STARTED = time.perf_counter()
+
 import os
+import sys
+import tempfile
+import threading
+import tkinter as tk
 from datetime import datetime
+from tkinter import messagebox, ttk
+
+import game_ai
+import game_engine
+from game_engine import GameEngine
+import game_history
+import game_rng
+import game_storage
+import metrics as game_metrics
+import themes
+import views
+
+IMPORTED = time.perf_counter()
+
+# How often the main loop checks whether the store has finished loading
+LOAD_POLL_MS = 20
+
+# Methods timed when metrics are on, and the name each is reported under;
+# the store itself loads in _open_store. A guess is timed without the
+# end-of-game dialog, and saving by the writer's store_flush.
+INSTRUMENTED = {
+    'evaluate_guess': 'check_guess',
+    '_open_store': 'load_data',
+    'apply_theme': 'apply_theme',
+    'show_leaderboard': 'show_leaderboard',
+    'show_statistics': 'show_statistics',
+}
 
 class NumberGuessingGame:
-    def __init__(self, root):
+    def __init__(self, root, storage=None, low=game_engine.MIN_NUMBER, high=game_engine.MAX_NUMBER,
+                 max_attempts=None, rng=None, startup_report=False, metrics=None, profiler=None,
+                 vs_computer=False):
+        # Seconds from process start to each startup milestone
+        self.startup = {'imports': IMPORTED - STARTED}
+        self.startup_report = startup_report
+        # Optional instrumentation; with metrics off nothing is wrapped
+        self.metrics = metrics
+        self.profiler = profiler
+        if metrics is not None:
+            metrics.instrument(self, INSTRUMENTED)
+            metrics.add_gauges('startup_seconds', lambda: self.startup)
         self.root = root
         self.root.title("Number Guessing Game")
         
@@ -14,61 +57,33 @@ class NumberGuessingGame:
         self.root.state('zoomed')  # For Windows
         self.root.configure(bg='#2c3e50')
         
-        # Game variables
-        self.secret_number = random.randint(1, 100)
-        self.attempts = 0
-        self.max_attempts = 8
+        # Game variables - the rules live in the headless engine; the attempt
+        # limit follows from the range unless one is given
+        self.engine = GameEngine(low, high, max_attempts)
+        # Each game is played from its own seed, saved with the game
+        self.rng = rng or game_rng.RNGService()
+        self.rng.start(self.engine)
+        # Counted guesses of the current game, saved to the guess history
+        self.guesses = []
+        self.history = game_history.HistoryWriter()
         self.best_score = float('inf')
+        # In vs-computer mode the computer plays the same secret alongside you
+        self.computer = game_ai.Computer(self.engine) if vs_computer else None
         
-        # Statistics tracking
-        self.stats = {
-            'games_played': 0,
-            'games_won': 0,
-            'games_lost': 0,
-            'total_attempts': 0,
-            'best_score': float('inf'),
-            'average_attempts': 0,
-            'last_played': None
-        }
-        
-        # Theme system
-        self.themes = {
-            'dark': {
-                'bg': '#2c3e50',
-                'frame_bg': '#34495e',
-                'text': '#ecf0f1',
-                'accent': '#3498db',
-                'success': '#27ae60',
-                'warning': '#e74c3c',
-                'attempts': '#e74c3c',
-                'best_score': '#f1c40f'
-            },
-            'light': {
-                'bg': '#ecf0f1',
-                'frame_bg': '#bdc3c7',
-                'text': '#2c3e50',
-                'accent': '#3498db',
-                'success': '#27ae60',
-                'warning': '#e74c3c',
-                'attempts': '#e74c3c',
-                'best_score': '#f39c12'
-            },
-            'purple': {
-                'bg': '#4a148c',
-                'frame_bg': '#6a1b9a',
-                'text': '#f3e5f5',
-                'accent': '#ab47bc',
-                'success': '#66bb6a',
-                'warning': '#ef5350',
-                'attempts': '#ef5350',
-                'best_score': '#ffd54f'
-            }
-        }
+        # Theme system - widgets register the theme role of each color
+        self.themes = themes.THEMES
         self.current_theme = 'dark'
-        
-        # Leaderboard
-        self.leaderboard = []
-        self.load_data()
+        self.themed = themes.ThemeRegistry(self.themes[self.current_theme])
+        self.themed.register(self.root, bg='bg')
+        
+        # Statistics and leaderboard live in the store ('json', 'binary' or 'sqlite'),
+        # which loads in the background once the main screen is up
+        self.storage = storage
+        self.store = None
+        self.writer = None
+        # Store calls made before it finished loading, run once it has
+        self.pending_calls = []
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Configure grid weights for responsive layout
         self.root.grid_rowconfigure(0, weight=1)
@@ -78,209 +93,196 @@ class NumberGuessingGame:
         
         self.create_widgets()
         
+        # Secondary windows, built on first use and reused afterwards
+        self.statistics_view = views.StatisticsView(self)
+        self.leaderboard_view = views.LeaderboardView(self)
+        self.tournament_view = views.TournamentView(self)
+        self.mark_startup('widgets')
+        
+        # Idle callbacks can run before the window is even mapped, so the
+        # first frame is timed from the window's first <Map>
+        self.first_map = self.root.bind('<Map>', self.on_first_map, add='+')
+        self.load_data()
+        
+    def mark_startup(self, milestone):
+        self.startup[milestone] = time.perf_counter() - STARTED
+
+    def on_first_map(self, event):
+        # Child widgets' <Map> events reach this binding too
+        if event.widget is not self.root:
+            return
+        self.root.unbind('<Map>', self.first_map)
+        # Tk draws a newly mapped window at the next idle
+        self.root.after_idle(self.mark_startup, 'first_frame')
+
+    def print_startup_report(self):
+        for milestone, seconds in self.startup.items():
+            print(f"  {milestone:<14} {seconds * 1000:8.1f} ms", file=sys.stderr)
+
+
+    @property
+    def stats(self):
+        return self.store.stats
+
+    @property
+    def leaderboard(self):
+        """Leaderboard, kept in rank order by the store"""
+        return self.store.leaderboard
+
     def load_data(self):
-        """Load statistics and leaderboard from file"""
+        """Open the statistics and leaderboard store on a worker thread.
+
+        The game can be played while it loads; results are queued in
+        pending_calls and recorded when the store is ready.
+        """
+        self.loaded = None
+        self.loader = threading.Thread(target=self._open_store, name='store-loader', daemon=True)
+        self.loader.start()
+        self.root.after(LOAD_POLL_MS, self._poll_store)
+
+    def _open_store(self):
+        # Worker thread: no Tk calls here
         try:
-            if os.path.exists('game_data.json'):
-                with open('game_data.json', 'r') as f:
-                    data = json.load(f)
-                    self.stats = data.get('stats', self.stats)
-                    self.leaderboard = data.get('leaderboard', [])
-                    self.best_score = self.stats['best_score']
-        except:
-            pass
+            self.loaded = game_storage.open_store(self.storage)
+        except Exception as e:
+            self.loaded = e
+        self.mark_startup('store_loaded')
+
+    def _poll_store(self):
+        if self.loader.is_alive():
+            self.root.after(LOAD_POLL_MS, self._poll_store)
+        else:
+            self.finish_loading()
+
+    def finish_loading(self):
+        """Take over the loaded store, record queued games and enable its windows"""
+        loaded, self.loaded = self.loaded, None
+        if loaded is None:
+            return  # Already done
+        if isinstance(loaded, Exception):
+            loaded = self.fallback_store(loaded)
+        self.store = loaded
+        if self.metrics is not None:
+            self.metrics.instrument(self.store, {'flush': 'store_flush'})
+        # Disk writes happen on a worker thread, never in a Tk callback
+        self.writer = game_storage.BackgroundWriter(self.store, history=self.history,
+                                                    on_flush=self.on_flush)
+        if self.metrics is not None:
+            self.metrics.add_gauges('writer', self.writer.counters)
+        for method, args, kwargs in self.pending_calls:
+            getattr(self.store, method)(*args, **kwargs)
+        if self.pending_calls:
+            self.save_data()
+        self.pending_calls = []
+        # Read once; check_guess keeps it up to date without going to the store
+        self.best_score = min(self.best_score, self.stats['best_score'])
+        self.stats_button.config(state=tk.NORMAL)
+        self.leaderboard_button.config(state=tk.NORMAL)
+        self.mark_startup('interactive')
+        if self.startup_report:
+            self.print_startup_report()
+
+    def fallback_store(self, error):
+        """Report a store that failed to load and open an empty one instead.
+
+        The replacement lives in a temporary directory, so games finished
+        while loading, and later ones, are still recorded this session.
+        """
+        directory = tempfile.mkdtemp(prefix='guess-')
+        messagebox.showwarning(
+            "⚠️ Saved games unavailable",
+            f"Could not load statistics and leaderboard:\n{error}\n\n"
+            f"This session's games are saved in {directory} instead."
+        )
+        return game_storage.JournalStore(
+            data_file=os.path.join(directory, game_storage.DATA_FILE),
+            journal_file=os.path.join(directory, game_storage.JOURNAL_FILE)).load()
+
+    def call_store(self, method, *args, **kwargs):
+        """Call a store method now, or once the store has loaded"""
+        if self.store is None:
+            self.pending_calls.append((method, args, kwargs))
+        else:
+            getattr(self.store, method)(*args, **kwargs)
     
     def save_data(self):
-        """Save statistics and leaderboard to file"""
+        """Schedule a background save of statistics and leaderboard"""
+        if self.writer is not None:
+            self.writer.mark_dirty()
+
+    def on_flush(self):
+        """Called by the writer after a flush, usually from its thread.
+
+        Stores that only read what has been written (SQLite) show a game
+        once it is flushed, so open windows are refreshed then, on the Tk
+        thread.
+        """
         try:
-            data = {
-                'stats': self.stats,
-                'leaderboard': self.leaderboard
-            }
-            with open('game_data.json', 'w') as f:
-                json.dump(data, f, indent=2)
-        except:
-            pass
-    
+            self.root.after(0, self.refresh_views)
+        except (RuntimeError, tk.TclError):
+            pass  # The window is closing
 
+    def on_close(self):
+        """Flush pending saves and close the window"""
+        # Games played while the store was loading must not be lost
+        self.loader.join()
+        try:
+            self.finish_loading()
+        finally:
+            if self.writer is not None:
+                self.writer.close()
+            self.history.close()
+            if self.profiler is not None and self.profiler.running:
+                self.profiler.stop()
+            self.tournament_view.cancel()
+            if self.metrics is not None:
+                self.metrics.close()
+            self.root.destroy()
     
     def change_theme(self, theme_name):
         """Change the game theme"""
         if theme_name in self.themes:
             self.current_theme = theme_name
-            theme = self.themes[theme_name]
-            
-            # Update main window
-            self.root.configure(bg=theme['bg'])
-            
-            # Update all widgets with new theme
-            self.apply_theme(theme)
+            self.apply_theme(self.themes[theme_name])
     
     def apply_theme(self, theme):
-        """Apply theme colors to all widgets"""
-        # Update main frame
-        for widget in self.root.winfo_children():
-            if isinstance(widget, tk.Frame):
-                widget.configure(bg=theme['bg'])
-                for child in widget.winfo_children():
-                    if isinstance(child, tk.Label):
-                        child.configure(bg=theme['bg'], fg=theme['text'])
-                    elif isinstance(child, tk.Frame):
-                        child.configure(bg=theme['frame_bg'])
-                        for grandchild in child.winfo_children():
-                            if isinstance(grandchild, tk.Label):
-                                grandchild.configure(bg=theme['frame_bg'], fg=theme['text'])
+        """Apply theme colors to every registered widget, open windows included"""
+        self.themed.apply(theme)
     
     def show_statistics(self):
         """Show detailed statistics window"""
-        stats_window = tk.Toplevel(self.root)
-        stats_window.title("📊 Game Statistics")
-        stats_window.geometry("400x500")
-        stats_window.configure(bg=self.themes[self.current_theme]['bg'])
-        
-        # Calculate statistics
-        win_rate = (self.stats['games_won'] / max(self.stats['games_played'], 1)) * 100
-        avg_attempts = self.stats['total_attempts'] / max(self.stats['games_played'], 1)
-        
-        stats_text = f"""
-📊 GAME STATISTICS
-
-🎮 Games Played: {self.stats['games_played']}
-🏆 Games Won: {self.stats['games_won']}
-💔 Games Lost: {self.stats['games_lost']}
-📈 Win Rate: {win_rate:.1f}%
-🎯 Best Score: {self.stats['best_score'] if self.stats['best_score'] != float('inf') else 'None'}
-📊 Average Attempts: {avg_attempts:.1f}
-📅 Last Played: {self.stats['last_played'] or 'Never'}
-        """
-        
-        stats_label = tk.Label(
-            stats_window,
-            text=stats_text,
-            font=('Arial', 12),
-            bg=self.themes[self.current_theme]['bg'],
-            fg=self.themes[self.current_theme]['text'],
-            justify='left'
-        )
-        stats_label.pack(pady=20, padx=20)
-        
-        # Close button
-        close_btn = tk.Button(
-            stats_window,
-            text="❌ Close",
-            command=stats_window.destroy,
-            font=('Arial', 10, 'bold'),
-            bg=self.themes[self.current_theme]['warning'],
-            fg='white',
-            relief='flat',
-            padx=20,
-            pady=10
-        )
-        close_btn.pack(pady=10)
+        # Pick up games saved by other copies of the game
+        self.store.sync()
+        self.statistics_view.show()
     
     def show_leaderboard(self):
         """Show leaderboard window"""
-        leaderboard_window = tk.Toplevel(self.root)
-        leaderboard_window.title("🏆 Leaderboard")
-        leaderboard_window.geometry("500x400")
-        leaderboard_window.configure(bg=self.themes[self.current_theme]['bg'])
-        
-        # Title
-        title_label = tk.Label(
-            leaderboard_window,
-            text="🏆 TOP PLAYERS",
-            font=('Arial', 16, 'bold'),
-            bg=self.themes[self.current_theme]['bg'],
-            fg=self.themes[self.current_theme]['text']
-        )
-        title_label.pack(pady=10)
-        
-        # Create leaderboard display
-        if not self.leaderboard:
-            no_data_label = tk.Label(
-                leaderboard_window,
-                text="No scores yet! Play some games to see the leaderboard.",
-                font=('Arial', 12),
-                bg=self.themes[self.current_theme]['bg'],
-                fg=self.themes[self.current_theme]['text']
-            )
-            no_data_label.pack(pady=20)
-        else:
-            # Sort leaderboard by score (ascending)
-            sorted_leaderboard = sorted(self.leaderboard, key=lambda x: x['score'])
-            
-            # Create frame for leaderboard
-            lb_frame = tk.Frame(leaderboard_window, bg=self.themes[self.current_theme]['bg'])
-            lb_frame.pack(pady=10, padx=20, fill='both', expand=True)
-            
-            # Headers
-            headers = tk.Frame(lb_frame, bg=self.themes[self.current_theme]['frame_bg'])
-            headers.pack(fill='x', pady=5)
-            
-            tk.Label(headers, text="Rank", font=('Arial', 10, 'bold'), 
-                    bg=self.themes[self.current_theme]['frame_bg'], 
-                    fg=self.themes[self.current_theme]['text'], width=8).pack(side='left')
-            tk.Label(headers, text="Score", font=('Arial', 10, 'bold'), 
-                    bg=self.themes[self.current_theme]['frame_bg'], 
-                    fg=self.themes[self.current_theme]['text'], width=8).pack(side='left')
-            tk.Label(headers, text="Player", font=('Arial', 10, 'bold'), 
-                    bg=self.themes[self.current_theme]['frame_bg'], 
-                    fg=self.themes[self.current_theme]['text'], width=15).pack(side='left')
-            tk.Label(headers, text="Date", font=('Arial', 10, 'bold'), 
-                    bg=self.themes[self.current_theme]['frame_bg'], 
-                    fg=self.themes[self.current_theme]['text'], width=15).pack(side='left')
-            
-            # Display entries
-            for i, entry in enumerate(sorted_leaderboard[:10], 1):  # Top 10
-                row = tk.Frame(lb_frame, bg=self.themes[self.current_theme]['frame_bg'])
-                row.pack(fill='x', pady=2)
-                
-                # Rank with medal emoji
-                rank_text = f"{'🥇' if i==1 else '🥈' if i==2 else '🥉' if i==3 else f'{i}.'}"
-                tk.Label(row, text=rank_text, font=('Arial', 10), 
-                        bg=self.themes[self.current_theme]['frame_bg'], 
-                        fg=self.themes[self.current_theme]['text'], width=8).pack(side='left')
-                
-                tk.Label(row, text=str(entry['score']), font=('Arial', 10), 
-                        bg=self.themes[self.current_theme]['frame_bg'], 
-                        fg=self.themes[self.current_theme]['text'], width=8).pack(side='left')
-                
-                tk.Label(row, text=entry['player'], font=('Arial', 10), 
-                        bg=self.themes[self.current_theme]['frame_bg'], 
-                        fg=self.themes[self.current_theme]['text'], width=15).pack(side='left')
-                
-                tk.Label(row, text=entry['date'], font=('Arial', 10), 
-                        bg=self.themes[self.current_theme]['frame_bg'], 
-                        fg=self.themes[self.current_theme]['text'], width=15).pack(side='left')
-        
-        # Close button
-        close_btn = tk.Button(
-            leaderboard_window,
-            text="❌ Close",
-            command=leaderboard_window.destroy,
-            font=('Arial', 10, 'bold'),
-            bg=self.themes[self.current_theme]['warning'],
-            fg='white',
-            relief='flat',
-            padx=20,
-            pady=10
-        )
-        close_btn.pack(pady=10)
+        self.store.sync()
+        self.leaderboard_view.show()
+
+    def show_tournament(self):
+        """Show the bot tournament window"""
+        self.tournament_view.show()
+
+    def refresh_views(self):
+        """Update whichever secondary windows are open.
+
+        Called as each game is recorded, which the JSON store applies at
+        once, and again by on_flush once it is written.
+        """
+        for view in (self.statistics_view, self.leaderboard_view):
+            if view.visible:
+                view.refresh()
     
     def add_to_leaderboard(self, score):
         """Add current score to leaderboard"""
-        player_name = f"Player_{len(self.leaderboard) + 1}"
-        entry = {
-            'player': player_name,
-            'score': score,
-            'date': datetime.now().strftime("%Y-%m-%d %H:%M")
-        }
-        self.leaderboard.append(entry)
+        self.call_store('add_score', score)
         self.save_data()
+        self.refresh_views()
         
     def create_widgets(self):
         # Main container frame - more compact
-        main_frame = tk.Frame(self.root, bg=self.themes[self.current_theme]['bg'])
+        main_frame = self.themed.register(tk.Frame(self.root), bg='bg')
         main_frame.grid(row=1, column=0, sticky='nsew', padx=20, pady=20)
         main_frame.grid_columnconfigure(0, weight=1)
         
@@ -288,54 +290,51 @@ class NumberGuessingGame:
         title_label = tk.Label(
             main_frame,
             text="🎯 NUMBER GUESSING GAME",
-            font=('Arial', 18, 'bold'),
-            fg=self.themes[self.current_theme]['text'],
-            bg=self.themes[self.current_theme]['bg']
+            font=('Arial', 18, 'bold')
         )
+        self.themed.register(title_label, fg='text', bg='bg')
         title_label.grid(row=0, column=0, pady=(0, 8))
         
         # Simple attempts counter at top - always visible
         self.simple_attempts_label = tk.Label(
             main_frame,
-            text=f"🎯 ATTEMPTS: {self.attempts}/{self.max_attempts}",
-            font=('Arial', 12, 'bold'),
-            fg=self.themes[self.current_theme]['attempts'],
-            bg=self.themes[self.current_theme]['bg']
+            text=f"🎯 ATTEMPTS: {self.engine.attempts}/{self.engine.max_attempts}",
+            font=('Arial', 12, 'bold')
         )
+        self.themed.register(self.simple_attempts_label, fg='attempts', bg='bg')
         self.simple_attempts_label.grid(row=1, column=0, pady=(0, 8))
         
         # Game info frame
-        info_frame = tk.Frame(main_frame, bg=self.themes[self.current_theme]['frame_bg'], relief='raised', bd=2)
+        info_frame = self.themed.register(tk.Frame(main_frame, relief='raised', bd=2), bg='frame_bg')
         info_frame.grid(row=2, column=0, pady=8, sticky='ew', padx=20)
         info_frame.grid_columnconfigure(0, weight=1)
         
         # Instructions
         instruction_label = tk.Label(
             info_frame,
-            text="I'm thinking of a number between 1 and 100.\nCan you guess it?\n\n⚠️ You have just 8 attempts to guess the number!",
+            text=f"I'm thinking of a number between {self.engine.low:,} and {self.engine.high:,}.\n"
+                 f"Can you guess it?\n\n⚠️ You have just {self.engine.max_attempts} attempts to guess the number!",
             font=('Arial', 11),
-            fg=self.themes[self.current_theme]['text'],
-            bg=self.themes[self.current_theme]['frame_bg'],
             justify='center'
         )
+        self.themed.register(instruction_label, fg='text', bg='frame_bg')
         instruction_label.grid(row=0, column=0, pady=12)
         
         # Input frame
-        input_frame = tk.Frame(main_frame, bg=self.themes[self.current_theme]['bg'])
+        input_frame = self.themed.register(tk.Frame(main_frame), bg='bg')
         input_frame.grid(row=3, column=0, pady=8)
         
         # Guess label
         guess_label = tk.Label(
             input_frame,
             text="Enter your guess:",
-            font=('Arial', 12, 'bold'),
-            fg=self.themes[self.current_theme]['text'],
-            bg=self.themes[self.current_theme]['bg']
+            font=('Arial', 12, 'bold')
         )
+        self.themed.register(guess_label, fg='text', bg='bg')
         guess_label.grid(row=0, column=0, pady=(0, 10))
         
         # Entry frame with styling
-        entry_frame = tk.Frame(input_frame, bg=self.themes[self.current_theme]['frame_bg'], relief='sunken', bd=2)
+        entry_frame = self.themed.register(tk.Frame(input_frame, relief='sunken', bd=2), bg='frame_bg')
         entry_frame.grid(row=1, column=0, pady=10)
         
         self.guess_entry = tk.Entry(
@@ -343,10 +342,9 @@ class NumberGuessingGame:
             font=('Arial', 16),
             width=15,
             justify='center',
-            bg='#ecf0f1',
-            fg='#2c3e50',
             relief='flat'
         )
+        self.themed.register(self.guess_entry, bg='entry_bg', fg='entry_fg', insertbackground='entry_fg')
         self.guess_entry.grid(row=0, column=0, padx=10, pady=10)
         self.guess_entry.focus()
         
@@ -359,13 +357,13 @@ class NumberGuessingGame:
             text="🎯 SUBMIT GUESS",
             command=self.check_guess,
             font=('Arial', 12, 'bold'),
-            bg=self.themes[self.current_theme]['accent'],
             fg='white',
             relief='flat',
             padx=30,
             pady=10,
             cursor='hand2'
         )
+        self.themed.register(submit_button, bg='accent')
         submit_button.grid(row=2, column=0, pady=10)
         
         # Bind hover effects
@@ -373,30 +371,42 @@ class NumberGuessingGame:
         submit_button.bind('<Leave>', lambda e: submit_button.config(bg=self.themes[self.current_theme]['accent']))
         
         # Feedback frame - positioned immediately after submit button for better visibility
-        feedback_frame = tk.Frame(main_frame, bg=self.themes[self.current_theme]['accent'], relief='raised', bd=3)
+        feedback_frame = self.themed.register(tk.Frame(main_frame, relief='raised', bd=3), bg='accent')
         feedback_frame.grid(row=4, column=0, pady=8, sticky='ew', padx=20)
         feedback_frame.grid_columnconfigure(0, weight=1)
         
-        # Hint/Result Label - more prominent with better visibility
+        # Hint/Result Label - more prominent with better visibility. Not
+        # registered: its colors show the state of the guess, not the theme
         self.hint_label = tk.Label(
             feedback_frame,
             text="🎲 Start guessing!",
             font=('Arial', 16, 'bold'),
             fg='white',
-            bg=self.themes[self.current_theme]['accent']
+            bg=self.themed.theme['accent']
         )
         self.hint_label.grid(row=0, column=0, pady=12)
         
+        if self.computer is not None:
+            self.computer_label = tk.Label(
+                feedback_frame,
+                text="🤖 Computer: ready",
+                font=('Arial', 11, 'bold'),
+                fg='white'
+            )
+            self.themed.register(self.computer_label, bg='accent')
+            self.computer_label.grid(row=1, column=0, pady=(0, 10))
+        
         # Enhanced controls frame
-        controls_frame = tk.Frame(main_frame, bg=self.themes[self.current_theme]['bg'])
+        controls_frame = self.themed.register(tk.Frame(main_frame), bg='bg')
         controls_frame.grid(row=5, column=0, pady=8)
         
         # Theme buttons
-        theme_frame = tk.Frame(controls_frame, bg=self.themes[self.current_theme]['bg'])
+        theme_frame = self.themed.register(tk.Frame(controls_frame), bg='bg')
         theme_frame.grid(row=0, column=0, pady=5)
         
-        tk.Label(theme_frame, text="🎨 Theme:", font=('Arial', 10, 'bold'),
-                bg=self.themes[self.current_theme]['bg'], fg=self.themes[self.current_theme]['text']).pack(side='left')
+        theme_label = tk.Label(theme_frame, text="🎨 Theme:", font=('Arial', 10, 'bold'))
+        self.themed.register(theme_label, bg='bg', fg='text')
+        theme_label.pack(side='left')
         
         for theme_name in self.themes.keys():
             theme_btn = tk.Button(
@@ -404,135 +414,212 @@ class NumberGuessingGame:
                 text=theme_name.title(),
                 command=lambda t=theme_name: self.change_theme(t),
                 font=('Arial', 8, 'bold'),
-                bg=self.themes[self.current_theme]['accent'],
                 fg='white',
                 relief='flat',
                 padx=10,
                 pady=5
             )
+            self.themed.register(theme_btn, bg='accent')
             theme_btn.pack(side='left', padx=2)
         
         # Stats and leaderboard buttons
-        buttons_frame = tk.Frame(controls_frame, bg=self.themes[self.current_theme]['bg'])
+        buttons_frame = self.themed.register(tk.Frame(controls_frame), bg='bg')
         buttons_frame.grid(row=1, column=0, pady=5)
         
-        stats_button = tk.Button(
+        # Both open windows onto the store, so they wait until it has loaded
+        self.stats_button = stats_button = tk.Button(
             buttons_frame,
             text="📊 Statistics",
             command=self.show_statistics,
             font=('Arial', 10, 'bold'),
-            bg=self.themes[self.current_theme]['success'],
             fg='white',
             relief='flat',
             padx=15,
             pady=8,
-            cursor='hand2'
+            cursor='hand2',
+            state=tk.DISABLED
         )
+        self.themed.register(stats_button, bg='success')
         stats_button.pack(side='left', padx=5)
         
-        leaderboard_button = tk.Button(
+        self.leaderboard_button = leaderboard_button = tk.Button(
             buttons_frame,
             text="🏆 Leaderboard",
             command=self.show_leaderboard,
             font=('Arial', 10, 'bold'),
-            bg=self.themes[self.current_theme]['best_score'],
             fg='white',
             relief='flat',
             padx=15,
             pady=8,
-            cursor='hand2'
+            cursor='hand2',
+            state=tk.DISABLED
         )
+        self.themed.register(leaderboard_button, bg='best_score')
         leaderboard_button.pack(side='left', padx=5)
         
+        hint_button = tk.Button(
+            buttons_frame,
+            text="💡 Hint",
+            command=self.show_hint,
+            font=('Arial', 10, 'bold'),
+            fg='white',
+            relief='flat',
+            padx=15,
+            pady=8,
+            cursor='hand2'
+        )
+        self.themed.register(hint_button, bg='accent')
+        hint_button.pack(side='left', padx=5)
+        
+        tournament_button = tk.Button(
+            buttons_frame,
+            text="🏅 Tournament",
+            command=self.show_tournament,
+            font=('Arial', 10, 'bold'),
+            fg='white',
+            relief='flat',
+            padx=15,
+            pady=8,
+            cursor='hand2'
+        )
+        self.themed.register(tournament_button, bg='accent')
+        tournament_button.pack(side='left', padx=5)
+        
 
 
     def check_guess(self):
+        result = self.evaluate_guess()
+        if result == game_engine.WON:
+            self.announce_win()
+        elif result == game_engine.LOST:
+            self.game_over()
+        
+        self.guess_entry.delete(0, tk.END)
+        self.guess_entry.focus()
+
+    def evaluate_guess(self):
+        """Apply the typed guess and record a finished game; return the result, or None"""
         try:
-            guess = int(self.guess_entry.get())
-            self.attempts += 1
-            # Update simple attempts counter at top
-            simple_attempts_text = f"🎯 ATTEMPTS: {self.attempts}/{self.max_attempts}"
-            self.simple_attempts_label.config(text=simple_attempts_text)
-
-            if guess < 1 or guess > 100:
-                self.hint_label.config(text="⚠️ Please enter a number between 1 and 100!", fg='white', bg='#e74c3c')
-                self.attempts -= 1  # Don't count invalid attempts
-                # Update simple attempts counter at top
-                simple_attempts_text = f"🎯 ATTEMPTS: {self.attempts}/{self.max_attempts}"
-                self.simple_attempts_label.config(text=simple_attempts_text)
-            elif guess < self.secret_number:
-                if self.attempts >= self.max_attempts:
-                    self.game_over()
-                else:
-                    self.hint_label.config(text="📈 Too low! Try a higher number.", fg='white', bg='#3498db')
-            elif guess > self.secret_number:
-                if self.attempts >= self.max_attempts:
-                    self.game_over()
-                else:
-                    self.hint_label.config(text="📉 Too high! Try a lower number.", fg='white', bg='#e67e22')
-            else:
-                # Update best score
-                if self.attempts < self.best_score:
-                    self.best_score = self.attempts
-                
-                # Update statistics
-                self.update_stats(True)
-                
-                # Add to leaderboard
-                self.add_to_leaderboard(self.attempts)
-                
-                messagebox.showinfo(
-                    "🎉 CONGRATULATIONS!",
-                    f"🎯 You won! The number was {self.secret_number}\n"
-                    f"📊 You found it in {self.attempts} attempts!\n"
-                    f"🏆 Best score: {self.best_score if self.best_score != float('inf') else self.attempts}"
-                )
-                self.reset_game()
-            
-            self.guess_entry.delete(0, tk.END)
-            self.guess_entry.focus()
-            
+            # Accept 1,000,000 as well as 1000000 for large ranges
+            guess = int(self.guess_entry.get().replace(',', ''))
         except ValueError:
             self.hint_label.config(text="⚠️ Please enter a valid number!", fg='white', bg='#e74c3c')
-            self.guess_entry.delete(0, tk.END)
+            return None
+
+        result = self.engine.guess(guess)
+        if result != game_engine.INVALID:
+            self.guesses.append(guess)
+            if self.computer is not None and not self.computer.finished:
+                self.computer.play()
+                self.update_computer_label()
+        self.update_attempts_label()
+
+        if result == game_engine.INVALID:
+            self.hint_label.config(text=f"⚠️ Please enter a number between {self.engine.low:,} and {self.engine.high:,}!",
+                                   fg='white', bg='#e74c3c')
+        elif result == game_engine.TOO_LOW:
+            self.hint_label.config(text="📈 Too low! Try a higher number.", fg='white', bg='#3498db')
+        elif result == game_engine.TOO_HIGH:
+            self.hint_label.config(text="📉 Too high! Try a lower number.", fg='white', bg='#e67e22')
+        elif result == game_engine.LOST:
+            # Update statistics
+            self.update_stats(False)
+        else:
+            attempts = self.engine.attempts
+            # Update best score
+            if attempts < self.best_score:
+                self.best_score = attempts
+            
+            # Update statistics
+            self.update_stats(True)
+            
+            # Add to leaderboard
+            self.add_to_leaderboard(attempts)
+        return result
+
+    def announce_win(self):
+        messagebox.showinfo(
+            "🎉 CONGRATULATIONS!",
+            f"🎯 You won! The number was {self.engine.secret_number}\n"
+            f"📊 You found it in {self.engine.attempts} attempts!\n"
+            f"🏆 Best score: {self.best_score}"
+            f"{self.computer_result(True)}"
+        )
+        self.reset_game()
+
+    def update_attempts_label(self):
+        """Refresh the attempts counter at the top"""
+        simple_attempts_text = f"🎯 ATTEMPTS: {self.engine.attempts}/{self.engine.max_attempts}"
+        self.simple_attempts_label.config(text=simple_attempts_text)
+
+    def show_hint(self):
+        """Show the optimal next guess and the chance of winning from here"""
+        guess, chance, _ = game_ai.suggest(self.engine)
+        self.hint_label.config(
+            text=f"💡 Try {guess:,} ({chance:.0%} chance to win with {self.engine.attempts_left} left)",
+            fg='white', bg='#8e44ad')
+        self.guess_entry.focus()
+
+    def update_computer_label(self):
+        computer = self.computer
+        if computer.last_guess is None:
+            text = "🤖 Computer: ready"
+        else:
+            outcome = {game_engine.TOO_LOW: "too low", game_engine.TOO_HIGH: "too high",
+                       game_engine.WON: "found it!", game_engine.LOST: "out of attempts"}
+            text = (f"🤖 Computer: {computer.engine.attempts}/{computer.engine.max_attempts}, "
+                    f"guessed {computer.last_guess:,} ({outcome[computer.last_result]})")
+        self.computer_label.config(text=text)
+
+    def computer_result(self, won):
+        """The vs-computer verdict line for the end-of-game message, or ''"""
+        computer = self.computer
+        if computer is None:
+            return ""
+        # Let the computer finish its own game
+        while not computer.finished:
+            computer.play()
+        theirs = computer.engine.attempts
+        if won and (not computer.won or self.engine.attempts < theirs):
+            detail = f"it needed {theirs} attempts" if computer.won else "it ran out of attempts"
+            return f"\n🤖 You beat the computer! ({detail})"
+        if won and self.engine.attempts == theirs:
+            return "\n🤖 A draw with the computer!"
+        if computer.won:
+            return f"\n🤖 The computer found it in {theirs} attempts"
+        return "\n🤖 The computer didn't find it either"
 
     def game_over(self):
-        # Update statistics
-        self.update_stats(False)
-        
         messagebox.showinfo(
             "😔 GAME OVER!",
-            f"💔 You lose! The number was {self.secret_number}\n"
-            f"📊 You used all {self.max_attempts} attempts\n"
+            f"💔 You lose! The number was {self.engine.secret_number}\n"
+            f"📊 You used all {self.engine.max_attempts} attempts\n"
             f"🍀 Better luck next time!"
+            f"{self.computer_result(False)}"
         )
         self.reset_game()
 
     def update_stats(self, won):
         """Update game statistics"""
-        self.stats['games_played'] += 1
-        self.stats['total_attempts'] += self.attempts
-        self.stats['last_played'] = datetime.now().strftime("%Y-%m-%d %H:%M")
-        
-        if won:
-            self.stats['games_won'] += 1
-            if self.attempts < self.stats['best_score']:
-                self.stats['best_score'] = self.attempts
-        else:
-            self.stats['games_lost'] += 1
-        
-        # Update best score
-        if self.stats['best_score'] < self.best_score:
-            self.best_score = self.stats['best_score']
-        
+        self.call_store('record_game', won, self.engine.attempts,
+                        date=datetime.now().strftime("%Y-%m-%d %H:%M"), seed=self.engine.seed,
+                        generator=self.rng.generator, theme=self.current_theme,
+                        low=self.engine.low, high=self.engine.high,
+                        max_attempts=self.engine.max_attempts)
+        self.history.add_game(self.engine, self.guesses)
         self.save_data()
+        self.refresh_views()
+        if self.profiler is not None:
+            self.profiler.game_finished()
 
     def reset_game(self):
-        self.secret_number = random.randint(1, 100)
-        self.attempts = 0
+        self.rng.start(self.engine)
+        self.guesses = []
+        if self.computer is not None:
+            self.computer.reset(self.engine)
+            self.update_computer_label()
         # Reset simple attempts counter at top
-        simple_attempts_text = f"🎯 ATTEMPTS: {self.attempts}/{self.max_attempts}"
-        self.simple_attempts_label.config(text=simple_attempts_text)
+        self.update_attempts_label()
         
         self.hint_label.config(text="🎲 Guess a new number!", fg='white', bg='#3498db')
         self.guess_entry.config(state=tk.NORMAL)
@@ -540,6 +627,45 @@ class NumberGuessingGame:
         self.guess_entry.focus()
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Number Guessing Game")
+    parser.add_argument('--storage', choices=['json', 'binary', 'sqlite'], default=None,
+                        help="where to keep stats and leaderboard (default: json, "
+                             f"or ${game_storage.STORAGE_ENV})")
+    parser.add_argument('--low', type=int, default=game_engine.MIN_NUMBER)
+    parser.add_argument('--high', type=int, default=game_engine.MAX_NUMBER,
+                        help="top of the range, e.g. 18446744073709551615 for 64-bit")
+    parser.add_argument('--attempts', type=int, default=None,
+                        help=f"attempt limit (default: ceil(log2(range + 1)) + {game_engine.SLACK})")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="root seed, to play the same sequence of games again")
+    parser.add_argument('--rng', choices=game_rng.GENERATORS, default=game_rng.DEFAULT_GENERATOR,
+                        help="generator for per-game streams")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="print time to first frame and time to interactive")
+    parser.add_argument('--metrics', default=os.environ.get(game_metrics.METRICS_ENV),
+                        help="export call timings to this file, or serve them on :PORT "
+                             f"(default: ${game_metrics.METRICS_ENV})")
+    parser.add_argument('--profile-games', type=int,
+                        default=int(os.environ.get(game_metrics.PROFILE_ENV, 0)),
+                        help=f"cProfile and tracemalloc the first N games, to {game_metrics.PROFILE_FILE} "
+                             f"and {game_metrics.MEMORY_FILE}")
+    parser.add_argument('--vs-computer', action='store_true',
+                        help="race a computer playing the optimal strategy on the same number")
+    args = parser.parse_args()
+    if args.high < args.low:
+        parser.error("--high must not be below --low")
+
+    metrics = None
+    if args.metrics:
+        metrics = game_metrics.Metrics()
+        metrics.start(args.metrics)
+    profiler = game_metrics.Profiler(args.profile_games) if args.profile_games > 0 else None
+
     root = tk.Tk()
-    app = NumberGuessingGame(root)
+    app = NumberGuessingGame(root, storage=args.storage, low=args.low, high=args.high,
+                             max_attempts=args.attempts, rng=game_rng.RNGService(args.seed, args.rng),
+                             startup_report=args.startup_report, metrics=metrics, profiler=profiler,
+                             vs_computer=args.vs_computer)
     root.mainloop()
@@ -0,0 +1,202 @@
+"""Vectorized strategy simulator for tuning the game's range and attempt budget.
+
+Whole arrays of games advance in lockstep: every round each still-running
+game makes one guess, and games that are won drop out of the arrays. The
+rules are the same as game_engine.GameEngine.guess; verify() checks that
+for the deterministic strategies.
+
+Requires NumPy (pip install numpy); the game itself does not.
+"""
+import itertools
+
+import numpy as np
+
+import game_engine
+import game_rng
+from game_engine import BatchResult, MAX_ATTEMPTS, MAX_NUMBER, MIN_NUMBER
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+# Vectorized counterparts of the strategies in game_engine. Each one takes
+# the arrays of remaining intervals of the running games and the Generator.
+
+def binary_search(lo, hi, rng):
+    return (lo + hi) // 2
+
+
+def random_guess(lo, hi, rng):
+    return rng.integers(lo, hi, endpoint=True)
+
+
+def human_like(lo, hi, rng):
+    fraction = np.clip(rng.normal(0.5, 0.15, size=lo.shape), 0.0, 1.0)
+    guess = lo + ((hi - lo) * fraction + 0.5).astype(np.int64)
+    rounded = (guess + 2) // 5 * 5
+    return np.where((rounded >= lo) & (rounded <= hi), rounded, guess)
+
+
+STRATEGIES = {
+    'binary': binary_search,
+    'random': random_guess,
+    'human': human_like,
+}
+
+# Strategies that don't use the RNG play identically here and in game_engine
+DETERMINISTIC = {'binary'}
+
+
+def _play_chunk(secret, strategy, low, high, max_attempts, rng, histogram):
+    """Play one array of games to the end, adding wins to histogram"""
+    lo = np.full(secret.shape, low, dtype=np.int64)
+    hi = np.full(secret.shape, high, dtype=np.int64)
+    for attempt in range(1, max_attempts + 1):
+        if not secret.size:
+            break
+        guess = strategy(lo, hi, rng)
+        hit = guess == secret
+        histogram[attempt] += int(np.count_nonzero(hit))
+        if attempt == max_attempts:
+            break
+        keep = ~hit
+        secret = secret[keep]
+        guess = guess[keep]
+        lo = lo[keep]
+        hi = hi[keep]
+        too_low = guess < secret
+        lo = np.where(too_low & (guess >= lo), guess + 1, lo)
+        hi = np.where(~too_low & (guess <= hi), guess - 1, hi)
+
+
+def simulate(n, strategy='binary', low=MIN_NUMBER, high=MAX_NUMBER,
+             max_attempts=MAX_ATTEMPTS, seed=None, chunk_size=DEFAULT_CHUNK_SIZE,
+             secrets=None, rng_service=None):
+    """Play n games in lockstep and return a game_engine.BatchResult.
+
+    Games are processed chunk_size at a time so memory stays bounded for
+    very large n. Pass secrets to play a fixed array of secret numbers, or
+    a game_rng.RNGService to draw them from per-game seeds, so each game
+    can be replayed on its own with game_rng.secret_for().
+    """
+    if high - low >= 2 ** 62:
+        raise ValueError("simulate() works on int64 arrays, the range is too large")
+    if isinstance(strategy, str):
+        strategy = STRATEGIES[strategy]
+    rng = np.random.default_rng(seed)
+    result = BatchResult(max_attempts)
+    histogram = [0] * (max_attempts + 1)
+
+    if secrets is not None:
+        secrets = np.asarray(secrets, dtype=np.int64)
+        n = len(secrets)
+    elif rng_service is not None:
+        buffer = np.empty(min(chunk_size, n), dtype=np.int64)
+    for start in range(0, n, chunk_size):
+        size = min(chunk_size, n - start)
+        if secrets is not None:
+            chunk = secrets[start:start + size]
+        elif rng_service is not None:
+            # _play_chunk compacts copies, so the buffer can be refilled
+            chunk = rng_service.fill_secrets(buffer[:size], low, high)
+        else:
+            chunk = rng.integers(low, high, size=size, endpoint=True)
+        _play_chunk(chunk, strategy, low, high, max_attempts, rng, histogram)
+
+    wins = sum(histogram)
+    result.games = n
+    result.wins = wins
+    result.histogram = histogram
+    result.total_attempts = sum(i * count for i, count in enumerate(histogram)) + (n - wins) * max_attempts
+    return result
+
+
+def sweep(n, strategies=('binary', 'random', 'human'), ranges=((MIN_NUMBER, MAX_NUMBER),),
+          attempt_budgets=(MAX_ATTEMPTS,), seed=None, chunk_size=DEFAULT_CHUNK_SIZE,
+          generator=None):
+    """Simulate n games for every (strategy, range, max_attempts) combination.
+
+    Returns one dict per combination, including the average_attempts value
+    the statistics window would show for a player using that strategy.
+    """
+    rows = []
+    for i, (name, (low, high), max_attempts) in enumerate(
+            itertools.product(strategies, ranges, attempt_budgets)):
+        combo_seed = None if seed is None else seed + i
+        service = None if generator is None else game_rng.RNGService(combo_seed, generator)
+        result = simulate(n, name, low, high, max_attempts, seed=combo_seed,
+                          chunk_size=chunk_size, rng_service=service)
+        row = {'strategy': name, 'low': low, 'high': high, 'max_attempts': max_attempts}
+        row.update(result.to_dict())
+        rows.append(row)
+    return rows
+
+
+def verify(n, strategy='binary', low=MIN_NUMBER, high=MAX_NUMBER,
+           max_attempts=MAX_ATTEMPTS, seed=None):
+    """Check simulate() against GameEngine on the same secrets.
+
+    Only deterministic strategies can be compared game by game.
+    """
+    if strategy not in DETERMINISTIC:
+        raise ValueError(f"can only verify deterministic strategies: {sorted(DETERMINISTIC)}")
+    secrets = np.random.default_rng(seed).integers(low, high, size=n, endpoint=True)
+    vectorized = simulate(n, strategy, low, high, max_attempts, secrets=secrets)
+
+    scalar = BatchResult(max_attempts)
+    scalar_strategy = game_engine.STRATEGIES[strategy]
+    engine = game_engine.GameEngine(low, high, max_attempts)
+    for secret in secrets.tolist():
+        engine.reset(secret)
+        while not engine.finished:
+            result = engine.guess(scalar_strategy(engine.lower_bound, engine.upper_bound, None))
+        scalar.games += 1
+        scalar.total_attempts += engine.attempts
+        if result == game_engine.WON:
+            scalar.wins += 1
+            scalar.histogram[engine.attempts] += 1
+    return vectorized.to_dict() == scalar.to_dict()
+
+
+def _parse_range(text):
+    low, _, high = text.partition('-')
+    return int(low), int(high)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Simulate guessing strategies with NumPy")
+    parser.add_argument('-n', '--games', type=int, default=1000000,
+                        help="games per combination")
+    parser.add_argument('-s', '--strategy', action='append', choices=sorted(STRATEGIES),
+                        help="strategy to simulate (repeatable, default: all)")
+    parser.add_argument('-r', '--range', action='append', type=_parse_range,
+                        help="number range as LOW-HIGH (repeatable, default: 1-100)")
+    parser.add_argument('-a', '--max-attempts', action='append', type=int,
+                        help="attempt budget (repeatable, default: 8)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--rng', choices=game_rng.GENERATORS, default=None,
+                        help="draw secrets from per-game seeds with this generator "
+                             "(default: one NumPy stream)")
+    parser.add_argument('--verify', action='store_true',
+                        help="check the binary strategy against the scalar engine")
+    args = parser.parse_args()
+
+    if args.verify:
+        low, high = (args.range or [(MIN_NUMBER, MAX_NUMBER)])[0]
+        max_attempts = (args.max_attempts or [MAX_ATTEMPTS])[0]
+        ok = verify(min(args.games, 100000), 'binary', low, high, max_attempts, seed=args.seed)
+        print("vectorized and scalar results match" if ok else "MISMATCH between vectorized and scalar results")
+        raise SystemExit(0 if ok else 1)
+
+    start = time.perf_counter()
+    rows = sweep(args.games,
+                 strategies=args.strategy or sorted(STRATEGIES),
+                 ranges=args.range or [(MIN_NUMBER, MAX_NUMBER)],
+                 attempt_budgets=args.max_attempts or [MAX_ATTEMPTS],
+                 seed=args.seed, chunk_size=args.chunk_size, generator=args.rng)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'elapsed_seconds': round(elapsed, 3), 'results': rows}, indent=2))
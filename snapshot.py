@@ -0,0 +1,506 @@
+"""Binary snapshot format for the JSON store's stats and leaderboard.
+
+    python number_guessing_game.py --storage binary
+    python snapshot.py import game_data.json game_data.bin
+    python snapshot.py export game_data.bin game_data.json
+    python snapshot.py top game_data.bin -k 10
+
+A snapshot is one file, memory-mapped when loaded. Leaderboard entries are
+fixed-width records in rank order, stored column by column, and player
+names are interned in a table, so the file is a fraction of the size of
+the JSON snapshot and loading it reads only the header. MappedLeaderboard
+answers top-K, paging, rank and search straight from the mapped columns,
+building dicts only for the entries it returns.
+
+Layout (little-endian), each section starting on an 8-byte boundary:
+
+    HEADER                          magic, version, seq, leaderboard_total,
+                                    entry count, name count, section lengths
+    stats                           JSON of the stats dict (fixed size; it
+                                    holds no per-game or per-entry data)
+    name offsets                    uint32 * (names + 1)
+    names                           UTF-8, concatenated
+    ids                             uint64 per entry, 0 if it has none
+    scores                          uint32 per entry
+    minutes                         uint32 per entry, minutes since 0001-01-01,
+                                    0 if the date was unreadable
+    players                         uint32 per entry, index into the names
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from datetime import date as _date
+from datetime import datetime as _datetime
+
+from leaderboard import Leaderboard
+
+MAGIC = b'GSNP'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQQQQQ')
+
+BINARY_FILE = 'game_data.bin'
+
+# Added entries read at a time while walking a MappedLeaderboard
+ADDED_PAGE = 256
+
+
+# Stored for dates that can't be read; exported as an empty date, which
+# also sorts first in the JSON leaderboard
+UNKNOWN_DATE = 0
+_MAX_MINUTES = 0xFFFFFFFF
+
+
+def to_minutes(date):
+    """Minutes since 0001-01-01 of a "%Y-%m-%d %H:%M" date.
+
+    Other ISO 8601 forms (a bare date, seconds, a 'T' separator) are
+    accepted, and anything else, such as a hand-edited or missing date,
+    becomes UNKNOWN_DATE rather than aborting a whole import.
+    """
+    try:
+        if len(date) == 16 and date[10] == ' ' and date[13] == ':':
+            hour, minute = int(date[11:13]), int(date[14:16])
+            if hour > 23 or minute > 59:
+                return UNKNOWN_DATE
+            minutes = _date.fromisoformat(date[:10]).toordinal() * 1440 + hour * 60 + minute
+        else:
+            moment = _datetime.fromisoformat(date.strip())
+            minutes = moment.toordinal() * 1440 + moment.hour * 60 + moment.minute
+    except (TypeError, ValueError):
+        return UNKNOWN_DATE
+    return minutes if minutes <= _MAX_MINUTES else UNKNOWN_DATE
+
+
+def from_minutes(minutes):
+    if minutes == UNKNOWN_DATE:
+        return ''
+    day, minute = divmod(minutes, 1440)
+    return f"{_date.fromordinal(day).isoformat()} {minute // 60:02d}:{minute % 60:02d}"
+
+
+def _pad(length):
+    return -length % 8
+
+
+def encode(seq, stats, total_added, ids, scores, minutes, players, names):
+    """Serialize a snapshot; the four columns are arrays in rank order"""
+    stats_bytes = json.dumps(stats, separators=(',', ':')).encode()
+    encoded = [name.encode() for name in names]
+    offsets = array('I', [0])
+    for name in encoded:
+        offsets.append(offsets[-1] + len(name))
+    names_bytes = b''.join(encoded)
+    columns = [offsets, ids, scores, minutes, players]
+    if sys.byteorder == 'big':
+        columns = [array(column.typecode, column) for column in columns]
+        for column in columns:
+            column.byteswap()
+    offsets, ids, scores, minutes, players = columns
+    parts = [HEADER.pack(MAGIC, VERSION, 0, seq, total_added, len(scores), len(names),
+                         len(stats_bytes), len(names_bytes))]
+    for section in (stats_bytes, offsets.tobytes(), names_bytes, ids.tobytes(),
+                    scores.tobytes(), minutes.tobytes(), players.tobytes()):
+        parts.append(section)
+        parts.append(bytes(_pad(len(section))))
+    return b''.join(parts)
+
+
+def encode_entries(seq, stats, total_added, entries):
+    """Serialize a snapshot from entry dicts in rank order"""
+    ids, scores, minutes, players = array('Q'), array('I'), array('I'), array('I')
+    names = []
+    interned = {}
+    for entry in entries:
+        player = interned.get(entry['player'])
+        if player is None:
+            player = interned[entry['player']] = len(names)
+            names.append(entry['player'])
+        ids.append(entry.get('id', 0))
+        scores.append(entry['score'])
+        minutes.append(to_minutes(entry.get('date')))
+        players.append(player)
+    return encode(seq, stats, total_added, ids, scores, minutes, players, names)
+
+
+class SnapshotView:
+    """A snapshot file, memory-mapped; columns are read in place"""
+
+    def __init__(self, path):
+        self.path = path
+        self._views = []
+        self._buffer = None
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self):
+        buf = self._buffer = memoryview(self._mmap)
+        if len(buf) < HEADER.size:
+            raise ValueError("truncated header")
+        (magic, version, _, self.seq, self.leaderboard_total, count, name_count,
+         stats_length, names_length) = HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise ValueError("not a snapshot file")
+        if version != VERSION:
+            raise ValueError(f"unsupported snapshot version {version}")
+        pos = HEADER.size
+
+        def section(length, typecode=None):
+            nonlocal pos
+            start = pos
+            pos += length + _pad(length)
+            if start + length > len(buf):
+                raise ValueError("truncated snapshot")
+            view = buf[start:start + length]
+            self._views.append(view)
+            if typecode is None:
+                return view
+            if sys.byteorder == 'big':
+                column = array(typecode, view.tobytes())
+                column.byteswap()
+                return column
+            column = view.cast(typecode)
+            self._views.append(column)
+            return column
+
+        self._stats = section(stats_length)
+        self._name_offsets = section(4 * (name_count + 1), 'I')
+        self._names = section(names_length)
+        self.ids = section(8 * count, 'Q')
+        self.scores = section(4 * count, 'I')
+        self.minutes = section(4 * count, 'I')
+        self.players = section(4 * count, 'I')
+        self._name_list = None
+
+    def __len__(self):
+        return len(self.scores)
+
+    def stats(self):
+        return json.loads(bytes(self._stats))
+
+    def name(self, index):
+        if self._name_list is not None:
+            return self._name_list[index]
+        offsets = self._name_offsets
+        return bytes(self._names[offsets[index]:offsets[index + 1]]).decode()
+
+    def names(self):
+        """Every player name by index, decoded on first use"""
+        if self._name_list is None:
+            offsets, data = self._name_offsets, self._names
+            self._name_list = [bytes(data[offsets[i]:offsets[i + 1]]).decode()
+                               for i in range(len(offsets) - 1)]
+        return self._name_list
+
+    def entry(self, row):
+        """The entry dict for one record"""
+        entry = {'player': self.name(self.players[row]), 'score': self.scores[row],
+                 'date': from_minutes(self.minutes[row])}
+        if self.ids[row]:
+            entry = {'id': self.ids[row], **entry}
+        return entry
+
+    def entries(self):
+        for row in range(len(self)):
+            yield self.entry(row)
+
+    def key(self, row):
+        """Rank order key of a record, as used by MappedLeaderboard"""
+        return self.scores[row], self.minutes[row], row
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._buffer is not None:
+            self._buffer.release()
+            self._buffer = None
+        self._mmap.close()
+
+
+def _copy(column, source, start, end):
+    """Append source[start:end] to an array, as one memory copy"""
+    if isinstance(source, array):
+        column.extend(source[start:end])
+    else:
+        with source[start:end] as part, part.cast('B') as raw:
+            column.frombytes(raw)
+
+
+class MappedLeaderboard:
+    """Leaderboard over a SnapshotView plus the entries added since it was written.
+
+    Same interface as leaderboard.Leaderboard, without capacity limits.
+    Added entries are ranked among themselves in a Leaderboard (sorted
+    chunks with a Fenwick tree), and each remembers how many mapped
+    records rank before it. The snapshot never changes, so that count
+    doesn't either, and the merged rank of added entry j is simply j plus
+    its count. Adding an entry is a binary search of the mapped keys and a
+    logarithmic insert, however many entries were added before it.
+    """
+
+    capacity = None
+
+    def __init__(self, view):
+        self.view = view
+        self.total_added = view.leaderboard_total
+        # Records of added entries: 'score', 'date' (in minutes), 'player',
+        # 'before' (mapped records ranked before it) and the 'entry' itself.
+        # Keys of added entries sort after equal records in the snapshot,
+        # like later insertions do.
+        self._added = Leaderboard()
+        self._first_rows = None  # player name -> row of their best record
+
+    def __len__(self):
+        return len(self.view) + len(self._added)
+
+    def add(self, entry):
+        """Insert an entry dict with 'player', 'score' and 'date' keys"""
+        minutes = to_minutes(entry['date'])
+        key = (entry['score'], minutes, len(self.view) + self.total_added)
+        self.total_added += 1
+        self._added.add({'player': entry['player'], 'score': entry['score'], 'date': minutes,
+                         'before': self._rows_before(key), 'entry': entry})
+        return entry
+
+    append = add
+
+    def _rows_before(self, key):
+        """Number of mapped records ranked before key"""
+        view = self.view
+        lo, hi = 0, len(view)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if view.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _first_added_from(self, offset):
+        """Index of the first added entry at merged rank offset or later"""
+        added = self._added
+        lo, hi = 0, len(added)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mid + added[mid]['before'] < offset:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _added_from(self, j):
+        """Yield added records from index j on, a page at a time"""
+        while True:
+            batch = self._added.page(j, ADDED_PAGE)
+            if not batch:
+                return
+            yield from batch
+            j += len(batch)
+
+    def _walk(self, offset):
+        """Yield (mapped row or None, added entry or None) in rank order from offset"""
+        j = self._first_added_from(offset)
+        row = offset - j
+        rows = len(self.view)
+        added = self._added_from(j)
+        record = next(added, None)
+        while True:
+            # An added entry goes next once the mapped records before it are out
+            if record is not None and record['before'] == row:
+                yield None, record['entry']
+                record = next(added, None)
+            elif row < rows:
+                yield row, None
+                row += 1
+            else:
+                return
+
+    def __iter__(self):
+        """Iterate over entries from best to worst"""
+        for row, entry in self._walk(0):
+            yield entry if row is None else self.view.entry(row)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("leaderboard index out of range")
+        return self.page(index, 1)[0]
+
+    def top(self, k=10):
+        """Return the k best entries, best first"""
+        return self.page(0, k)
+
+    def page(self, offset, limit):
+        """Return up to limit entries starting at 0-based rank offset"""
+        rows = []
+        if limit <= 0:
+            return rows
+        for row, entry in self._walk(offset):
+            rows.append(entry if row is None else self.view.entry(row))
+            if len(rows) == limit:
+                break
+        return rows
+
+    def search(self, text, offset=0, limit=10):
+        """Return (rank, entry) pairs for players whose name contains text.
+
+        Names are matched once in the name table; records are then matched
+        by name index.
+        """
+        text = text.lower()
+        wanted = {i for i, name in enumerate(self.view.names()) if text in name.lower()}
+        players = self.view.players
+        matches = []
+        skip = offset
+        for rank, (row, entry) in enumerate(self._walk(0), 1):
+            if row is None:
+                found = text in entry['player'].lower()
+            else:
+                found = players[row] in wanted
+            if not found:
+                continue
+            if skip:
+                skip -= 1
+                continue
+            matches.append((rank, entry if row is None else self.view.entry(row)))
+            if len(matches) == limit:
+                break
+        return matches
+
+    def _first_row(self, player):
+        """Row of player's best mapped record, or None"""
+        if self._first_rows is None:
+            # One pass over the players column, then every lookup is a dict hit
+            first = {}
+            for row, index in enumerate(self.view.players):
+                if index not in first:
+                    first[index] = row
+            self._first_rows = {self.view.name(index): row for index, row in first.items()}
+        return self._first_rows.get(player)
+
+    def rank(self, player):
+        """Return the 1-based rank of player's best entry, or None"""
+        row = self._first_row(player)
+        added_rank = self._added.rank(player)
+        if added_rank is not None:
+            record = self._added[added_rank - 1]
+            # A mapped record ties ahead of an added one
+            if row is None or (record['score'], record['date']) < self.view.key(row)[:2]:
+                return added_rank + record['before']
+        if row is None:
+            return None
+        score, minutes, _ = self.view.key(row)
+        return row + self._added.count_before(score, minutes) + 1
+
+    def best(self, player):
+        """Return player's best entry, or None"""
+        rank = self.rank(player)
+        return None if rank is None else self[rank - 1]
+
+    def to_list(self):
+        """Entries as a plain list, best first"""
+        return list(self)
+
+    def encode(self, seq, stats):
+        """Serialize the merged leaderboard as a new snapshot.
+
+        Runs of mapped records between added entries are copied as column
+        slices rather than entry by entry, and the name table is extended.
+        """
+        view = self.view
+        names = list(view.names())
+        interned = None
+        columns = (array('Q'), array('I'), array('I'), array('I'))
+        sources = (view.ids, view.scores, view.minutes, view.players)
+        ids, scores, minutes, players = columns
+        start = 0  # Mapped records copied so far
+        for record in self._added:
+            for column, source in zip(columns, sources):
+                _copy(column, source, start, record['before'])
+            start = record['before']
+            if interned is None:
+                interned = {name: i for i, name in enumerate(names)}
+            player = interned.get(record['player'])
+            if player is None:
+                player = interned[record['player']] = len(names)
+                names.append(record['player'])
+            ids.append(record['entry'].get('id', 0))
+            scores.append(record['score'])
+            minutes.append(record['date'])
+            players.append(player)
+        for column, source in zip(columns, sources):
+            _copy(column, source, start, len(view))
+        return encode(seq, stats, self.total_added, ids, scores, minutes, players, names)
+
+    def close(self):
+        self.view.close()
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def json_to_binary(json_path, binary_path):
+    """Convert a JSON snapshot to a binary one; returns the number of entries"""
+    data = load_json(json_path)
+    entries = data.get('leaderboard', [])
+    with open(binary_path, 'wb') as f:
+        f.write(encode_entries(data.get('seq', 0), data.get('stats', {}),
+                               data.get('leaderboard_total', len(entries)), entries))
+    return len(entries)
+
+
+def binary_to_json(binary_path, json_path):
+    """Convert a binary snapshot to the JSON format; returns the number of entries"""
+    view = SnapshotView(binary_path)
+    try:
+        data = {
+            'seq': view.seq,
+            'stats': view.stats(),
+            'leaderboard': list(view.entries()),
+            'leaderboard_total': view.leaderboard_total
+        }
+    finally:
+        view.close()
+    with open(json_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    return len(data['leaderboard'])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert and inspect binary snapshots")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help="JSON snapshot to binary")
+    import_parser.add_argument('json_file')
+    import_parser.add_argument('binary_file', nargs='?', default=BINARY_FILE)
+    export_parser = subparsers.add_parser('export', help="binary snapshot to JSON")
+    export_parser.add_argument('binary_file')
+    export_parser.add_argument('json_file')
+    top_parser = subparsers.add_parser('top', help="show the best entries and the totals")
+    top_parser.add_argument('binary_file', nargs='?', default=BINARY_FILE)
+    top_parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        print(f"Wrote {json_to_binary(args.json_file, args.binary_file)} entries to {args.binary_file}")
+    elif args.command == 'export':
+        print(f"Wrote {binary_to_json(args.binary_file, args.json_file)} entries to {args.json_file}")
+    else:
+        view = SnapshotView(args.binary_file)
+        stats = view.stats()
+        print(f"seq {view.seq}, {len(view)} entries, {len(view.names())} players, "
+              f"{stats.get('games_played', 0)} games")
+        for rank, entry in enumerate(MappedLeaderboard(view).top(args.k), 1):
+            print(f"{rank:>4}. {entry['player']:<20} {entry['score']:>4}  {entry['date']}")
+        view.close()
@@ -0,0 +1,511 @@
+"""SQLite storage backend for statistics and the leaderboard.
+
+A drop-in alternative to game_storage.JournalStore. Nothing is loaded into
+memory at startup: stats come from a totals row kept up to date by a
+trigger, and leaderboard views are indexed queries. The database runs in
+WAL mode, so several game processes on one host can share it.
+"""
+import sqlite3
+import threading
+
+import game_stats
+
+DB_FILE = 'game_data.db'
+
+# Bumped when the schema changes; see SQLiteStore._migrate
+SCHEMA_VERSION = 4
+
+# Ring slot of a "%Y-%m-%d %H:%M" date in the per-day and per-hour rollups
+DAY_SLOT = "CAST(julianday(substr({0}, 1, 10)) AS INTEGER) % {1}"
+HOUR_SLOT = ("(CAST(julianday(substr({0}, 1, 10)) AS INTEGER) * 24 "
+             "+ CAST(substr({0}, 12, 2) AS INTEGER)) % {1}")
+
+# Same rule as game_stats._bump: a newer bucket takes over a stale slot,
+# an older one is left out of the rollups
+ROLLUP_UPDATE = """
+    games_played = CASE WHEN bucket = excluded.bucket THEN games_played + excluded.games_played
+                        ELSE excluded.games_played END,
+    games_won = CASE WHEN bucket = excluded.bucket THEN games_won + excluded.games_won
+                     ELSE excluded.games_won END,
+    total_attempts = CASE WHEN bucket = excluded.bucket THEN total_attempts + excluded.total_attempts
+                          ELSE excluded.total_attempts END,
+    bucket = excluded.bucket
+    WHERE excluded.bucket >= bucket"""
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    won INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    seed INTEGER,
+    rng TEXT,
+    theme TEXT,
+    -- The range as text, since it can go beyond 64 bits
+    low TEXT,
+    high TEXT,
+    max_attempts INTEGER
+);
+CREATE INDEX IF NOT EXISTS games_date ON games(date);
+
+CREATE TABLE IF NOT EXISTS guesses (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    attempt INTEGER NOT NULL,
+    guess INTEGER NOT NULL,
+    PRIMARY KEY (game_id, attempt)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS leaderboard (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leaderboard_rank ON leaderboard(score, date, id);
+CREATE INDEX IF NOT EXISTS leaderboard_player ON leaderboard(player, score, date, id);
+
+-- Running totals, so stats never scan the games table
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    games_played INTEGER NOT NULL,
+    games_won INTEGER NOT NULL,
+    total_attempts INTEGER NOT NULL,
+    best_score INTEGER,
+    last_played TEXT,
+    current_streak INTEGER NOT NULL DEFAULT 0,
+    longest_win_streak INTEGER NOT NULL DEFAULT 0,
+    longest_losing_streak INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO totals (id, games_played, games_won, total_attempts) VALUES (0, 0, 0, 0);
+
+-- Games won in each number of attempts
+CREATE TABLE IF NOT EXISTS attempts_histogram (
+    attempts INTEGER PRIMARY KEY,
+    games INTEGER NOT NULL
+);
+
+-- Ring buffers of per-day and per-hour totals, one row per slot
+CREATE TABLE IF NOT EXISTS rollups (
+    period TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    games_played INTEGER NOT NULL,
+    games_won INTEGER NOT NULL,
+    total_attempts INTEGER NOT NULL,
+    PRIMARY KEY (period, slot)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS games_totals AFTER INSERT ON games BEGIN
+    UPDATE totals SET
+        games_played = games_played + 1,
+        games_won = games_won + NEW.won,
+        total_attempts = total_attempts + NEW.attempts,
+        best_score = CASE WHEN NEW.won AND (best_score IS NULL OR NEW.attempts < best_score)
+                          THEN NEW.attempts ELSE best_score END,
+        last_played = NEW.date,
+        current_streak = CASE WHEN NEW.won THEN MAX(current_streak, 0) + 1
+                              ELSE MIN(current_streak, 0) - 1 END,
+        longest_win_streak = CASE WHEN NEW.won THEN MAX(longest_win_streak, MAX(current_streak, 0) + 1)
+                                  ELSE longest_win_streak END,
+        longest_losing_streak = CASE WHEN NEW.won THEN longest_losing_streak
+                                     ELSE MAX(longest_losing_streak, 1 - MIN(current_streak, 0)) END
+    WHERE id = 0;
+    INSERT INTO attempts_histogram SELECT NEW.attempts, 1 WHERE NEW.won
+        ON CONFLICT (attempts) DO UPDATE SET games = games + 1;
+    -- Dates that don't parse are kept out of the rollups
+    INSERT INTO rollups SELECT 'daily', {DAY_SLOT.format('NEW.date', game_stats.DAYS_KEPT)},
+                               substr(NEW.date, 1, 10), 1, NEW.won, NEW.attempts
+        WHERE julianday(substr(NEW.date, 1, 10)) IS NOT NULL
+        ON CONFLICT (period, slot) DO UPDATE SET {ROLLUP_UPDATE};
+    INSERT INTO rollups SELECT 'hourly', {HOUR_SLOT.format('NEW.date', game_stats.HOURS_KEPT)},
+                               substr(NEW.date, 1, 13) || ':00', 1, NEW.won, NEW.attempts
+        WHERE julianday(substr(NEW.date, 1, 10)) IS NOT NULL
+        ON CONFLICT (period, slot) DO UPDATE SET {ROLLUP_UPDATE};
+END;
+"""
+
+
+def _statements(script):
+    """Split an SQL script into statements, trigger bodies kept whole"""
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield statement.strip()
+            statement = ''
+
+
+def _entry(row):
+    return {'player': row[0], 'score': row[1], 'date': row[2]}
+
+
+class SQLiteLeaderboard:
+    """Leaderboard backed by the leaderboard table, same interface as leaderboard.Leaderboard"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return self.store.query("SELECT COUNT(*) FROM leaderboard")[0][0]
+
+    def __bool__(self):
+        return bool(self.store.query("SELECT 1 FROM leaderboard LIMIT 1"))
+
+    def __iter__(self):
+        """Iterate over entries from best to worst, a page at a time"""
+        after = (0, '', 0)
+        while True:
+            rows = self.store.query(
+                "SELECT player, score, date, id FROM leaderboard WHERE (score, date, id) > (?, ?, ?) "
+                "ORDER BY score, date, id LIMIT 1000", after)
+            for row in rows:
+                yield _entry(row)
+            if len(rows) < 1000:
+                return
+            after = rows[-1][1:]
+
+    def __getitem__(self, index):
+        rows = self.page(index, 1)
+        if not rows:
+            raise IndexError("leaderboard index out of range")
+        return rows[0]
+
+    @property
+    def total_added(self):
+        return self.store.query("SELECT COALESCE(MAX(id), 0) FROM leaderboard")[0][0]
+
+    def add(self, entry):
+        self.store.add_score(entry['score'], entry['player'], entry['date'])
+        return entry
+
+    append = add
+
+    def top(self, k=10):
+        """Return the k best entries, best first"""
+        return self.page(0, k)
+
+    def page(self, offset, limit):
+        """Return up to limit entries starting at 0-based rank offset"""
+        if limit <= 0:
+            return []  # SQLite reads a negative LIMIT as no limit
+        rows = self.store.query(
+            "SELECT player, score, date FROM leaderboard ORDER BY score, date, id LIMIT ? OFFSET ?",
+            (limit, offset))
+        return [_entry(row) for row in rows]
+
+    def search(self, text, offset=0, limit=10):
+        """Return (rank, entry) pairs for players whose name contains text"""
+        if limit <= 0:
+            return []
+        rows = self.store.query(
+            "SELECT rank, player, score, date FROM ("
+            "  SELECT ROW_NUMBER() OVER (ORDER BY score, date, id) AS rank, player, score, date"
+            "  FROM leaderboard"
+            ") WHERE player LIKE ? ESCAPE '\\' ORDER BY rank LIMIT ? OFFSET ?",
+            ('%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%',
+             limit, offset))
+        return [(row[0], _entry(row[1:])) for row in rows]
+
+    def _best_row(self, player):
+        rows = self.store.query(
+            "SELECT score, date, id FROM leaderboard WHERE player = ? ORDER BY score, date, id LIMIT 1",
+            (player,))
+        return rows[0] if rows else None
+
+    def rank(self, player):
+        """Return the 1-based rank of player's best entry, or None"""
+        best = self._best_row(player)
+        if best is None:
+            return None
+        return self.store.query(
+            "SELECT COUNT(*) FROM leaderboard WHERE (score, date, id) < (?, ?, ?)", best)[0][0] + 1
+
+    def best(self, player):
+        """Return player's best entry, or None"""
+        best = self._best_row(player)
+        return None if best is None else {'player': player, 'score': best[0], 'date': best[1]}
+
+
+class SQLiteStore:
+    """Stats and leaderboard in an SQLite database"""
+
+    def __init__(self, db_file=DB_FILE, timeout=10.0):
+        self.db_file = db_file
+        self.timeout = timeout
+        # As in JournalStore
+        self.autoflush = True
+        self.db = None
+        self.leaderboard = None
+        # Stats as last read, dropped whenever this store writes or syncs;
+        # _writes counts those so a read racing a write isn't cached
+        self._stats = None
+        self._writes = 0
+        self._pending = []
+        self._pending_lock = threading.Lock()  # Guards _pending only
+        self._db_lock = threading.Lock()       # Guards the connection
+
+    def load(self):
+        """Open the database, creating the schema if needed"""
+        # The connection is shared with BackgroundWriter's thread, under _db_lock
+        self.db = sqlite3.connect(self.db_file, timeout=self.timeout, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        # One transaction, so a failed upgrade leaves the old schema and
+        # user_version as they were. The sqlite3 module doesn't start one
+        # for DDL, and executescript() would commit, hence BEGIN and
+        # statement-by-statement execution.
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self._migrate()
+            self._create_schema()
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.leaderboard = SQLiteLeaderboard(self)
+        return self
+
+    def _create_schema(self):
+        for statement in _statements(SCHEMA):
+            self.db.execute(statement)
+
+    def _migrate(self):
+        """Bring a database from an older version of the game up to date"""
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        exists = self.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'totals'").fetchone()
+        if not exists:
+            return  # New database
+        if version < 1:
+            self._migrate_v1()
+        if version < 2:
+            # Version 2 records the seed each game was played from
+            self.db.execute("ALTER TABLE games ADD COLUMN seed INTEGER")
+            self.db.execute("ALTER TABLE games ADD COLUMN rng TEXT")
+        if version < 3:
+            # Version 3 records the theme each game was played with
+            self.db.execute("ALTER TABLE games ADD COLUMN theme TEXT")
+        if version < 4:
+            # Version 4 records the range and attempt limit, to replay games
+            # played on a custom range
+            self.db.execute("ALTER TABLE games ADD COLUMN low TEXT")
+            self.db.execute("ALTER TABLE games ADD COLUMN high TEXT")
+            self.db.execute("ALTER TABLE games ADD COLUMN max_attempts INTEGER")
+
+    def _migrate_v1(self):
+        # Version 1 added streaks, the attempts histogram and the rollups,
+        # all maintained by the games_totals trigger
+        for column in ('current_streak', 'longest_win_streak', 'longest_losing_streak'):
+            self.db.execute(f"ALTER TABLE totals ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+        self.db.execute("DROP TRIGGER games_totals")
+        self._create_schema()
+        # Backfill from the games table, which has the whole history
+        self._backfill_streaks()
+        self.db.execute("INSERT INTO attempts_histogram "
+                        "SELECT attempts, COUNT(*) FROM games WHERE won GROUP BY attempts")
+        for period, slot, bucket, size in (
+                ('daily', DAY_SLOT, "substr(date, 1, 10)", game_stats.DAYS_KEPT),
+                ('hourly', HOUR_SLOT, "substr(date, 1, 13) || ':00'", game_stats.HOURS_KEPT)):
+            # Oldest first, so the newest bucket ends up in each slot
+            self.db.execute(
+                f"INSERT OR REPLACE INTO rollups "
+                f"SELECT '{period}', {slot.format('MIN(date)', size)}, {bucket} AS b, "
+                f"COUNT(*), SUM(won), SUM(attempts) FROM games "
+                f"WHERE julianday(substr(date, 1, 10)) IS NOT NULL GROUP BY b ORDER BY b")
+
+    def _backfill_streaks(self):
+        streak = longest_win = longest_losing = 0
+        for (won,) in self.db.execute("SELECT won FROM games ORDER BY id"):
+            if won:
+                streak = max(streak, 0) + 1
+                longest_win = max(longest_win, streak)
+            else:
+                streak = min(streak, 0) - 1
+                longest_losing = max(longest_losing, -streak)
+        self.db.execute("UPDATE totals SET current_streak = ?, longest_win_streak = ?, "
+                        "longest_losing_streak = ? WHERE id = 0",
+                        (streak, longest_win, longest_losing))
+
+    def query(self, sql, params=()):
+        """Run a read query and return all rows.
+
+        Reads see committed rows only: changes queued with autoflush off
+        show up once BackgroundWriter has written them, so a read never
+        waits for a write.
+        """
+        with self._db_lock:
+            return self.db.execute(sql, params).fetchall()
+
+    @property
+    def stats(self):
+        """Statistics dict in the same shape as game_stats.new_stats().
+
+        Cached until this store next writes or syncs; treat it as read-only.
+        """
+        stats = self._stats
+        if stats is None:
+            writes = self._writes
+            stats = self._read_stats()
+            if writes == self._writes:
+                self._stats = stats
+        return stats
+
+    def _invalidate_stats(self):
+        self._writes += 1
+        self._stats = None
+
+    def _read_stats(self):
+        (played, won, total_attempts, best, last_played,
+         streak, longest_win, longest_losing) = self.query(
+            "SELECT games_played, games_won, total_attempts, best_score, last_played, "
+            "current_streak, longest_win_streak, longest_losing_streak FROM totals WHERE id = 0")[0]
+        histogram = []
+        for attempts, games in self.query("SELECT attempts, games FROM attempts_histogram"):
+            histogram.extend([0] * (attempts + 1 - len(histogram)))
+            histogram[attempts] = games
+        rollups = {period: [] for period in game_stats.ROLLUPS}
+        for period, *slot in self.query(
+                "SELECT period, bucket, games_played, games_won, total_attempts FROM rollups"):
+            rollups[period].append(slot)
+        return {
+            'games_played': played,
+            'games_won': won,
+            'games_lost': played - won,
+            'total_attempts': total_attempts,
+            'best_score': float('inf') if best is None else best,
+            'average_attempts': total_attempts / played if played else 0,
+            'last_played': last_played,
+            'attempts_histogram': histogram,
+            'p50_attempts': game_stats.percentile(histogram, 0.50),
+            'p90_attempts': game_stats.percentile(histogram, 0.90),
+            'current_streak': streak,
+            'longest_win_streak': longest_win,
+            'longest_losing_streak': longest_losing,
+            'daily': rollups['daily'],
+            'hourly': rollups['hourly']
+        }
+
+    def _queue(self, item):
+        with self._pending_lock:
+            self._pending.append(item)
+        if self.autoflush:
+            self.flush()
+
+    def record_game(self, won, attempts, date=None, guesses=(), seed=None, generator=None,
+                    theme=None, low=None, high=None, max_attempts=None):
+        """Record a finished game and, optionally, its guesses, seed, range and attempt limit"""
+        self._queue(('game', (int(won), attempts, date or game_stats.timestamp(), seed, generator, theme,
+                              None if low is None else str(low),
+                              None if high is None else str(high), max_attempts),
+                     tuple(guesses)))
+
+    def add_score(self, score, player=None, date=None):
+        """Add a winning score to the leaderboard and return the new entry.
+
+        Without a player name the entry is named after its row id, so
+        concurrent writers never collide; the name is filled in when the
+        entry is written.
+        """
+        entry = {'player': player, 'score': score, 'date': date or game_stats.timestamp()}
+        self._queue(('score', entry, None))
+        return entry
+
+    def flush(self):
+        """Write pending changes in one transaction and return how many there were"""
+        with self._pending_lock:
+            items, self._pending = self._pending, []
+        if not items:
+            return 0
+        with self._db_lock, self.db:
+            for kind, data, guesses in items:
+                if kind == 'game':
+                    cursor = self.db.execute(
+                        "INSERT INTO games (won, attempts, date, seed, rng, theme, low, high, max_attempts) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        data)
+                    if guesses:
+                        self.db.executemany(
+                            "INSERT INTO guesses (game_id, attempt, guess) VALUES (?, ?, ?)",
+                            [(cursor.lastrowid, i, guess) for i, guess in enumerate(guesses, 1)])
+                else:
+                    cursor = self.db.execute(
+                        "INSERT INTO leaderboard (player, score, date) VALUES (?, ?, ?)",
+                        (data['player'] or '', data['score'], data['date']))
+                    if data['player'] is None:
+                        data['player'] = f"Player_{cursor.lastrowid}"
+                        self.db.execute("UPDATE leaderboard SET player = ? WHERE id = ?",
+                                        (data['player'], cursor.lastrowid))
+        self._invalidate_stats()
+        return len(items)
+
+    def import_json(self, store):
+        """Copy the leaderboard and stats totals from a loaded JournalStore"""
+        stats = store.stats
+        self.flush()
+        with self._db_lock, self.db:
+            self.db.executemany("INSERT INTO leaderboard (player, score, date) VALUES (?, ?, ?)",
+                                [(e['player'], e['score'], e['date']) for e in store.leaderboard])
+            # Per-game history isn't in the JSON files, only the totals are
+            self.db.execute(
+                "UPDATE totals SET games_played = games_played + ?, games_won = games_won + ?, "
+                "total_attempts = total_attempts + ?, last_played = COALESCE(last_played, ?) "
+                "WHERE id = 0",
+                (stats['games_played'], stats['games_won'], stats['total_attempts'],
+                 stats['last_played']))
+            if stats['best_score'] != float('inf'):
+                self.db.execute(
+                    "UPDATE totals SET best_score = ? WHERE id = 0 AND "
+                    "(best_score IS NULL OR best_score > ?)",
+                    (stats['best_score'], stats['best_score']))
+            self.db.execute(
+                "UPDATE totals SET longest_win_streak = MAX(longest_win_streak, ?), "
+                "longest_losing_streak = MAX(longest_losing_streak, ?) WHERE id = 0",
+                (stats.get('longest_win_streak', 0), stats.get('longest_losing_streak', 0)))
+            self.db.executemany(
+                "INSERT INTO attempts_histogram VALUES (?, ?) "
+                "ON CONFLICT (attempts) DO UPDATE SET games = games + excluded.games",
+                [(attempts, games) for attempts, games
+                 in enumerate(stats.get('attempts_histogram', ())) if games])
+            for period, slot_sql, size in (('daily', DAY_SLOT, game_stats.DAYS_KEPT),
+                                           ('hourly', HOUR_SLOT, game_stats.HOURS_KEPT)):
+                self.db.executemany(
+                    f"INSERT INTO rollups VALUES (?1, {slot_sql.format('?2', size)}, ?2, ?3, ?4, ?5) "
+                    f"ON CONFLICT (period, slot) DO UPDATE SET {ROLLUP_UPDATE}",
+                    [(period, *slot) for slot in stats.get(period) or () if slot])
+        self._invalidate_stats()
+
+    def sync(self):
+        """Write anything queued, so a window opened now shows it.
+
+        Nothing to merge: every read sees what other processes committed,
+        once the cached stats are dropped.
+        """
+        self.flush()
+        self._invalidate_stats()
+
+    def checkpoint(self):
+        """Write anything pending and fold the WAL back into the database file"""
+        self.flush()
+        with self._db_lock:
+            self.db.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self):
+        if self.db is not None:
+            self.checkpoint()
+            self.db.close()
+            self.db = None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from game_storage import DATA_FILE, JOURNAL_FILE, JournalStore
+
+    parser = argparse.ArgumentParser(description="Import the JSON game data into SQLite")
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--data-file', default=DATA_FILE)
+    parser.add_argument('--journal-file', default=JOURNAL_FILE)
+    args = parser.parse_args()
+
+    source = JournalStore(args.data_file, args.journal_file).load()
+    target = SQLiteStore(args.db).load()
+    target.import_json(source)
+    target.close()
+    print(f"Imported {len(source.leaderboard)} leaderboard entries into {args.db}")
@@ -0,0 +1,127 @@
+"""Multi-process stress test for the shared JSON store.
+
+    python stress_store.py --processes 24 --games 500
+    python stress_store.py --snapshot-format binary
+
+Starts several processes on one temporary directory. Each records games
+and scores through its own JournalStore and BackgroundWriter, syncs now
+and then, and checkpoints every few hundred events, the way several game
+windows sharing a directory would. When they have all closed, the store
+is opened fresh and checked:
+
+- every game and score from every process is there, and the counters add up
+- entry ids and generated player names are all distinct
+- event seqs in the archived journals are distinct and in file order
+
+Prints a JSON report and exits non-zero if a check fails.
+"""
+import glob
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+import game_storage
+import snapshot
+
+
+def _options(directory, snapshot_format):
+    data_file = snapshot.BINARY_FILE if snapshot_format == 'binary' else game_storage.DATA_FILE
+    return {'data_file': os.path.join(directory, data_file),
+            'journal_file': os.path.join(directory, game_storage.JOURNAL_FILE),
+            'snapshot_format': snapshot_format}
+
+
+def worker(directory, index, games, checkpoint_every, seed, snapshot_format):
+    """Play games in one process; return (games won, seconds spent recording)"""
+    rng = random.Random(seed + index)
+    store = game_storage.JournalStore(checkpoint_every=checkpoint_every,
+                                      **_options(directory, snapshot_format)).load()
+    writer = game_storage.BackgroundWriter(store, interval=0.01)
+    wins = 0
+    busy = 0.0
+    for game in range(games):
+        won = rng.random() < 0.7
+        attempts = rng.randint(1, 7)
+        start = time.perf_counter()
+        store.record_game(won, attempts, theme=f"p{index}")
+        if won:
+            wins += 1
+            store.add_score(attempts)
+        writer.mark_dirty()
+        busy += time.perf_counter() - start
+        if game % 50 == 0:
+            store.sync()
+    writer.close()
+    return wins, busy
+
+
+def check(directory, processes, games, wins, snapshot_format):
+    store = game_storage.JournalStore(**_options(directory, snapshot_format)).load()
+    entries = store.leaderboard.to_list()
+    store.close()
+    ids = [entry['id'] for entry in entries]
+    names = [entry['player'] for entry in entries]
+    seqs = []
+    archives = sorted(glob.glob(os.path.join(directory, game_storage.ARCHIVE_DIR, 'events-*.jsonl')))
+    for path in archives:
+        with open(path, 'rb') as f:
+            seqs.extend(json.loads(line)['seq'] for line in f)
+    failures = []
+    if store.stats['games_played'] != processes * games:
+        failures.append(f"games_played {store.stats['games_played']} != {processes * games}")
+    if store.stats['games_won'] != sum(wins):
+        failures.append(f"games_won {store.stats['games_won']} != {sum(wins)}")
+    if len(entries) != sum(wins):
+        failures.append(f"leaderboard has {len(entries)} entries, expected {sum(wins)}")
+    if len(set(ids)) != len(ids):
+        failures.append("duplicate entry ids")
+    if len(set(names)) != len(names):
+        failures.append("duplicate player names")
+    if seqs != sorted(set(seqs)):
+        failures.append("archived seqs are repeated or out of order")
+    if len(seqs) != processes * games + sum(wins):
+        failures.append(f"archives hold {len(seqs)} events, expected {processes * games + sum(wins)}")
+    return failures, len(archives)
+
+
+def run(processes=8, games=200, checkpoint_every=300, seed=1234, snapshot_format='json'):
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.starmap(worker, [(directory, i, games, checkpoint_every, seed,
+                                             snapshot_format) for i in range(processes)])
+        elapsed = time.perf_counter() - start
+        wins = [won for won, _ in results]
+        failures, archives = check(directory, processes, games, wins, snapshot_format)
+    return {
+        'snapshot_format': snapshot_format,
+        'processes': processes,
+        'games': processes * games,
+        'wins': sum(wins),
+        'checkpoints': archives,
+        'seconds': round(elapsed, 3),
+        'games_per_second': round(processes * games / elapsed),
+        # Time a process spent inside record_game/add_score, where the game waits
+        'max_record_seconds_per_game': max(busy for _, busy in results) / games,
+        'failures': failures
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stress the JSON store with concurrent processes")
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--games', type=int, default=200, help="games per process")
+    parser.add_argument('--checkpoint-every', type=int, default=300,
+                        help="events between checkpoints in each process")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--snapshot-format', choices=['json', 'binary'], default='json')
+    args = parser.parse_args()
+    report = run(args.processes, args.games, args.checkpoint_every, args.seed, args.snapshot_format)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report['failures'] else 0)
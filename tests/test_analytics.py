@@ -0,0 +1,123 @@
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+import analytics
+from game_storage import JournalStore
+from sqlite_store import SQLiteStore
+
+THEMES = ['dark', 'light', 'ocean']
+
+
+def games(n=400, seed=2):
+    rng = random.Random(seed)
+    return [(rng.random() < 0.7, rng.randint(1, 8),
+             f"2024-03-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+             rng.choice(THEMES), f"player{rng.randint(1, 9)}")
+            for _ in range(n)]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """A store with archived journals and a live one"""
+    store = JournalStore(str(tmp_path / 'game_data.json'), str(tmp_path / 'game_events.jsonl'),
+                         checkpoint_every=150).load()
+    for won, attempts, date, theme, player in games():
+        store.record_game(won, attempts, date, theme=theme)
+        if won:
+            store.add_score(attempts, player, date)
+    # Leave the live journal as it is, without a final checkpoint
+    store._journal.close()
+    store._lock.close()
+    assert len(os.listdir(tmp_path / 'game_archive')) > 1
+    return str(tmp_path)
+
+
+def rows(groups, by):
+    return list(analytics.to_rows(sorted(groups.items()), by))
+
+
+def test_byte_ranges_cover_every_line_once(data_dir):
+    files = analytics.event_files(data_dir)
+    expected = [event for path in files for event in analytics.read_events(path)]
+    assert len(expected) > 400
+    for chunk_bytes in (1, 50, 97, 1000, 1 << 20):
+        ranges = list(analytics.split_files(files, chunk_bytes))
+        for path in files:
+            spans = [(start, end) for p, start, end in ranges if p == path]
+            assert spans[0][0] == 0
+            assert spans[-1][1] == os.path.getsize(path)
+            assert all(a[1] == b[0] for a, b in zip(spans, spans[1:]))
+        events = [event for path, start, end in ranges
+                  for event in analytics.read_events(path, start, end)]
+        assert events == expected
+
+
+def test_empty_file_is_one_range(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    path.write_bytes(b'')
+    assert list(analytics.split_files([str(path)])) == [(str(path), 0, 0)]
+    assert list(analytics.read_events(str(path), 0, 0)) == []
+
+
+@pytest.mark.parametrize('query, by', [('win-rate', 'theme'), ('win-rate', 'weekday'),
+                                       ('attempts', 'all'), ('attempts', 'day'),
+                                       ('top-players', 'player')])
+def test_parallel_matches_serial(data_dir, query, by):
+    serial = analytics.run(query, by, data_dir=data_dir)
+    parallel = analytics.run(query, by, data_dir=data_dir, jobs=2, chunk_bytes=2000)
+    assert rows(parallel, by) == rows(serial, by)
+    pieces = analytics.run(query, by, data_dir=data_dir, chunk_bytes=300)
+    assert rows(pieces, by) == rows(serial, by)
+
+
+def test_results_match_the_games(data_dir):
+    played = games()
+    groups = analytics.run('win-rate', 'theme', data_dir=data_dir)
+    for theme in THEMES:
+        mine = [game for game in played if game[3] == theme]
+        totals = groups[theme]
+        assert (totals.games, totals.wins, totals.attempts) == (
+            len(mine), sum(game[0] for game in mine), sum(game[1] for game in mine))
+    since = "2024-03-15 00:00"
+    groups = analytics.run('top-players', 'player', since, data_dir=data_dir)
+    winners = [game for game in played if game[0] and game[2] >= since]
+    assert sum(totals.wins for totals in groups.values()) == len(winners)
+    best = analytics.top_k(groups, 1, analytics.PlayerTotals.rank)[0]
+    assert best[1].wins == max(totals.wins for totals in groups.values())
+
+
+def test_sqlite_matches_the_journals(data_dir, tmp_path_factory):
+    directory = tmp_path_factory.mktemp('sqlite')
+    store = SQLiteStore(str(directory / 'game_data.db')).load()
+    for won, attempts, date, theme, player in games():
+        store.record_game(won, attempts, date, theme=theme)
+        if won:
+            store.add_score(attempts, player, date)
+    store.close()
+    for query, by in (('win-rate', 'hour'), ('attempts', 'theme'), ('top-players', 'player')):
+        assert rows(analytics.run(query, by, data_dir=str(directory), storage='sqlite'), by) == \
+            rows(analytics.run(query, by, data_dir=data_dir), by)
+
+
+@pytest.mark.parametrize('query, by', [('top-players', 'hour'), ('top-players', 'theme'),
+                                       ('win-rate', 'player'), ('attempts', 'player')])
+def test_unsupported_group_keys(query, by):
+    with pytest.raises(ValueError):
+        analytics.run(query, by)
+
+
+def test_cli_rejects_unsupported_group_keys(tmp_path):
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'analytics.py')
+    result = subprocess.run([sys.executable, script, 'top-players', '--by', 'hour'],
+                            cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "top-players can't be grouped by hour" in result.stderr
+    result = subprocess.run([sys.executable, script, 'win-rate', '--format', 'json'],
+                            cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 0
+    assert json.loads(result.stdout) == []
@@ -0,0 +1,111 @@
+import random
+
+import pytest
+
+import game_engine
+from game_engine import INVALID, LOST, TOO_HIGH, TOO_LOW, WON, GameEngine
+
+
+def test_attempt_budget():
+    assert game_engine.attempt_budget(1, 100) == game_engine.MAX_ATTEMPTS
+    assert game_engine.attempt_budget(1, 1) == 1 + game_engine.SLACK
+    assert game_engine.attempt_budget(0, 2 ** 64 - 1) == 65 + game_engine.SLACK
+
+
+@pytest.mark.parametrize('low, high', [(1, 10), (1, 1000), (-50, 50), (0, 2 ** 40)])
+def test_budget_is_enough_for_binary_search(low, high):
+    assert GameEngine(low, high).max_attempts == game_engine.attempt_budget(low, high)
+    result = game_engine.play_games(300, 'binary', low, high, seed=3)
+    assert result.wins == 300
+
+
+def test_hints_narrow_the_bounds():
+    engine = GameEngine(1, 100, secret_number=42)
+    assert engine.guess(50) == TOO_HIGH
+    assert engine.upper_bound == 49
+    assert engine.guess(20) == TOO_LOW
+    assert engine.lower_bound == 21
+    # A guess outside the bounds is legal but doesn't widen them
+    assert engine.guess(60) == TOO_HIGH
+    assert engine.upper_bound == 49
+    assert engine.guess(42) == WON
+    assert engine.attempts == 4
+    assert engine.finished
+
+
+def test_invalid_guesses_are_not_counted():
+    engine = GameEngine(1, 100, secret_number=42)
+    assert engine.guess(0) == INVALID
+    assert engine.guess(101) == INVALID
+    assert engine.attempts == 0
+    assert engine.attempts_left == engine.max_attempts
+
+
+def test_last_attempt_loses():
+    engine = GameEngine(1, 100, max_attempts=3, secret_number=42)
+    assert engine.guess(1) == TOO_LOW
+    assert engine.guess(2) == TOO_LOW
+    assert engine.guess(3) == LOST
+    assert engine.finished
+    with pytest.raises(RuntimeError):
+        engine.guess(42)
+
+
+def test_winning_on_the_last_attempt():
+    engine = GameEngine(1, 100, max_attempts=2, secret_number=42)
+    assert engine.guess(1) == TOO_LOW
+    assert engine.guess(42) == WON
+
+
+def test_reset_starts_over():
+    engine = GameEngine(1, 10, secret_number=3, rng=random.Random(5))
+    engine.guess(3)
+    engine.reset()
+    assert not engine.finished
+    assert engine.attempts == 0
+    assert (engine.lower_bound, engine.upper_bound) == (1, 10)
+    assert 1 <= engine.secret_number <= 10
+
+
+def test_empty_range():
+    with pytest.raises(ValueError):
+        GameEngine(10, 1)
+
+
+def test_huge_range():
+    secret = 2 ** 100 + 7
+    engine = GameEngine(0, 2 ** 128, secret_number=secret)
+    assert engine.guess(2 ** 127) == TOO_HIGH
+    assert engine.guess(secret) == WON
+
+
+def test_play_games_is_reproducible():
+    first = game_engine.play_games(500, 'human', seed=7).to_dict()
+    assert game_engine.play_games(500, 'human', seed=7).to_dict() == first
+    assert first['games'] == 500
+    assert first['wins'] + first['losses'] == 500
+    binary = game_engine.play_games(500, 'binary', seed=7)
+    assert binary.wins == 500  # Within the budget every time
+
+
+@pytest.mark.parametrize('secret', range(1, 101))
+def test_play_strategy_agrees_with_the_engine(secret):
+    rng = random.Random(secret)
+    attempts = game_engine.play_strategy(game_engine.binary_search, secret, 1, 100,
+                                         game_engine.MAX_ATTEMPTS, rng)
+    engine = GameEngine(1, 100, secret_number=secret)
+    while True:
+        result = engine.guess(game_engine.binary_search(engine.lower_bound, engine.upper_bound, rng))
+        if result in (WON, LOST):
+            break
+    assert result == WON
+    assert attempts == engine.attempts
+
+
+def test_play_strategy_loses_with_no_attempts_left():
+    assert game_engine.play_strategy(game_engine.binary_search, 1, 1, 100, 3, random.Random()) == 0
+
+
+def test_play_strategy_rejects_guesses_outside_the_range():
+    with pytest.raises(ValueError):
+        game_engine.play_strategy(lambda low, high, rng: 0, 5, 1, 10, 4, random.Random())
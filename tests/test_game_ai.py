@@ -0,0 +1,119 @@
+from functools import lru_cache
+
+import pytest
+
+import game_ai
+import game_engine
+from game_engine import WON, GameEngine
+
+
+@lru_cache(maxsize=None)
+def most_found(width, attempts):
+    """Most secrets any strategy can find among width numbers, by brute force"""
+    if width <= 0 or attempts <= 0:
+        return 0
+    return max(1 + most_found(guess, attempts - 1) + most_found(width - 1 - guess, attempts - 1)
+               for guess in range(width))
+
+
+def play_optimally(low, high, max_attempts, secret):
+    """Attempts the suggested guesses need, or None if they lose"""
+    engine = GameEngine(low, high, max_attempts, secret_number=secret)
+    while True:
+        result = engine.guess(game_ai.suggest(engine)[0])
+        if result == WON:
+            return engine.attempts
+        if engine.finished:
+            return None
+
+
+def test_win_probability_exact_values():
+    assert game_ai.win_probability(1, 1) == 1.0
+    assert game_ai.win_probability(100, 7) == 1.0
+    assert game_ai.win_probability(100, 6) == 63 / 100
+    assert game_ai.win_probability(100, 1) == 1 / 100
+    assert game_ai.win_probability(0, 3) == 0.0
+    assert game_ai.win_probability(10, 0) == 0.0
+    assert game_ai.win_probability(2 ** 64, 64) == (2 ** 64 - 1) / 2 ** 64
+
+
+@pytest.mark.parametrize('width', range(1, 33))
+def test_win_probability_is_the_best_possible(width):
+    for attempts in range(1, 7):
+        assert game_ai.win_probability(width, attempts) == most_found(width, attempts) / width
+
+
+def test_the_classic_budget_always_wins():
+    budget = game_engine.attempt_budget(1, 100)
+    assert game_ai.win_probability(100, budget) == 1.0
+    assert all(play_optimally(1, 100, budget, secret) for secret in range(1, 101))
+
+
+@pytest.mark.parametrize('low, high, attempts', [(1, 100, 8), (1, 100, 5), (1, 3, 2), (-7, 20, 3),
+                                                 (1, 1, 1), (1, 1000, 10)])
+def test_decision_matches_every_secret_played(low, high, attempts):
+    width = high - low + 1
+    results = [play_optimally(low, high, attempts, secret) for secret in range(low, high + 1)]
+    offset, chance, expected = game_ai.decision(width, attempts)
+    assert low + offset == (low + high) // 2
+    assert chance == sum(r is not None for r in results) / width
+    # A loss uses every attempt
+    assert expected == pytest.approx(sum(r or attempts for r in results) / width)
+
+
+def test_expected_guesses_exact_values():
+    assert game_ai.decision(1, 5) == (0, 1.0, 1.0)
+    assert game_ai.decision(3, 2) == (1, 1.0, pytest.approx(5 / 3))
+    assert game_ai.decision(7, 3)[2] == pytest.approx(17 / 7)
+    assert game_ai.decision(0, 3) == (-1, 0.0, 0.0)
+
+
+def test_table_is_filled_up_front():
+    game_ai.decision.cache_clear()
+    info = game_ai.precompute(100, 8)
+    assert info.currsize <= 2 * 8
+    misses = game_ai.decision.cache_info().misses
+    for secret in range(1, 101):
+        play_optimally(1, 100, 8, secret)
+    assert game_ai.decision.cache_info().misses == misses
+
+
+def test_huge_ranges_stay_small():
+    game_ai.decision.cache_clear()
+    budget = game_engine.attempt_budget(0, 2 ** 100)
+    info = game_ai.precompute(2 ** 100 + 1, budget)
+    assert info.currsize <= 2 * budget
+    assert game_ai.decision(2 ** 100 + 1, budget)[1] == 1.0
+
+
+def test_computer_plays_the_same_secret():
+    engine = GameEngine(1, 100, secret_number=37)
+    computer = game_ai.Computer(engine)
+    guesses = []
+    while not computer.finished:
+        computer.play()
+        guesses.append(computer.last_guess)
+    assert computer.won
+    assert guesses[0] == 50
+    assert guesses[-1] == 37
+    assert len(guesses) == play_optimally(1, 100, 8, 37)
+    # The player's game is untouched
+    assert engine.attempts == 0
+
+    engine.reset(100)
+    computer.reset(engine)
+    assert not computer.finished
+    assert computer.last_guess is None
+    while not computer.finished:
+        computer.play()
+    assert computer.won and computer.last_guess == 100
+
+
+def test_computer_with_a_short_budget():
+    wins = 0
+    for secret in range(1, 101):
+        computer = game_ai.Computer(GameEngine(1, 100, 6, secret_number=secret))
+        while not computer.finished:
+            computer.play()
+        wins += computer.won
+    assert wins == 63
@@ -0,0 +1,130 @@
+import random
+
+import pytest
+
+import game_engine
+import game_history
+import game_rng
+from game_engine import GameEngine
+from game_history import HistoryChunk, HistoryWriter
+
+
+@pytest.mark.parametrize('value', [0, 1, 127, 128, 300, 16383, 16384, 2 ** 63, 2 ** 200 + 5])
+def test_varint_round_trip(value):
+    out = bytearray()
+    game_history._varint(value, out)
+    assert list(game_history._varints(out, 0, len(out))) == [value]
+    assert len(out) == max(1, -(-value.bit_length() // 7))
+
+
+def test_varints_decode_a_run_of_values():
+    values = list(range(0, 1000, 7)) + [2 ** 64 - 1, 0]
+    out = bytearray()
+    for value in values:
+        game_history._varint(value, out)
+    assert list(game_history._varints(out, 0, len(out))) == values
+
+
+@pytest.mark.parametrize('value', [0, 1, -1, 63, -64, 2 ** 70, -2 ** 70])
+def test_zigzag_round_trip(value):
+    encoded = game_history._zigzag(value)
+    assert encoded >= 0
+    assert game_history._unzigzag(encoded) == value
+
+
+def test_chunk_round_trip():
+    chunk = HistoryChunk(-2 ** 40, 2 ** 70, 73)
+    chunk.add(5, [0, 2 ** 69, 5], seed=12)
+    chunk.add(-2 ** 40, [], seed=None)
+    chunk.add(2 ** 70, [2 ** 70])
+    games = [chunk.game(i) for i in range(len(chunk))]
+    assert games == [(5, [0, 2 ** 69, 5], 12), (-2 ** 40, [], None), (2 ** 70, [2 ** 70], None)]
+
+
+def test_classic_games_take_a_byte_per_guess():
+    chunk = HistoryChunk(1, 100, 8)
+    chunk.add(42, [50, 25, 37, 43, 40, 42])
+    assert len(chunk.data) == 7
+
+
+def play(engine, rng):
+    """Play one game with random guesses; return the counted guesses"""
+    guesses = []
+    while not engine.finished:
+        guess = rng.randint(engine.lower_bound, engine.upper_bound)
+        guesses.append(guess)
+        engine.guess(guess)
+    return guesses
+
+
+@pytest.mark.parametrize('low, high', [(1, 100), (-500, 500), (0, 2 ** 80)])
+def test_games_replay_from_their_seeds(tmp_path, low, high):
+    path = str(tmp_path / 'guess_history.bin')
+    service = game_rng.RNGService(21, 'splitmix')
+    engine = GameEngine(low, high)
+    rng = random.Random(4)
+    writer = HistoryWriter(path, chunk_games=16)
+    played = []
+    for _ in range(50):
+        service.start(engine)
+        guesses = play(engine, rng)
+        writer.add_game(engine, guesses)
+        played.append((engine.seed, guesses))
+    writer.close()
+    assert writer.games_written == 50
+
+    games = list(game_history.iter_games(path))
+    assert [(seed, guesses) for *_, guesses, seed in games] == played
+    for recorded_low, recorded_high, max_attempts, secret, guesses, seed in games:
+        assert (recorded_low, recorded_high, max_attempts) == (low, high, engine.max_attempts)
+        assert secret == game_rng.secret_for(seed, low, high, 'splitmix')
+        results = game_history.replay(low, high, max_attempts, secret, guesses)
+        assert results[-1] in (game_engine.WON, game_engine.LOST)
+        assert (results[-1] == game_engine.WON) == (guesses[-1] == secret)
+
+
+def test_a_change_of_rules_starts_a_chunk(tmp_path):
+    path = str(tmp_path / 'guess_history.bin')
+    writer = HistoryWriter(path)
+    for low, high in ((1, 100), (1, 100), (1, 1000), (1, 100)):
+        engine = GameEngine(low, high, secret_number=low)
+        engine.guess(low)
+        writer.add_game(engine, [low])
+    writer.close()
+    assert [(chunk.high, len(chunk)) for chunk in game_history.read_chunks(path)] == [
+        (100, 2), (1000, 1), (100, 1)]
+
+
+def write_games(path, secrets):
+    writer = HistoryWriter(path)
+    for secret in secrets:
+        engine = GameEngine(1, 100, secret_number=secret)
+        engine.guess(secret)
+        writer.add_game(engine, [secret])
+    writer.close()
+
+
+def test_torn_final_chunk_is_cut_on_reopen(tmp_path):
+    path = str(tmp_path / 'guess_history.bin')
+    write_games(path, [1, 2])
+    write_games(path, [3])
+    good_size = (tmp_path / 'guess_history.bin').stat().st_size
+    # A crash partway through appending a chunk
+    chunk = HistoryChunk(1, 100, 8)
+    chunk.add(4, [4])
+    with open(path, 'ab') as f:
+        f.write(chunk.to_bytes()[:-3])
+
+    assert [game[3] for game in game_history.iter_games(path)] == [1, 2, 3]
+    write_games(path, [5, 6])
+    assert [game[3] for game in game_history.iter_games(path)] == [1, 2, 3, 5, 6]
+    assert (tmp_path / 'guess_history.bin').stat().st_size > good_size
+
+
+def test_torn_header_is_cut_on_reopen(tmp_path):
+    path = str(tmp_path / 'guess_history.bin')
+    write_games(path, [7])
+    with open(path, 'ab') as f:
+        f.write(game_history.MAGIC + b'\x01')
+    write_games(path, [8])
+    assert [game[3] for game in game_history.iter_games(path)] == [7, 8]
@@ -0,0 +1,163 @@
+import json
+import os
+
+import pytest
+
+import game_engine
+import game_rng
+import game_server
+from game_server import GameServer, GameSession
+from game_storage import JournalStore
+from sqlite_store import SQLiteStore
+
+
+class Transport:
+    def __init__(self):
+        self.data = b''
+        self.closed = False
+
+    def write(self, data):
+        self.data += data
+
+    def close(self):
+        self.closed = True
+
+
+class Recorder:
+    """Stands in for the BackgroundWriter and HistoryWriter"""
+
+    def __init__(self):
+        self.dirty = 0
+        self.games = []
+
+    def mark_dirty(self):
+        self.dirty += 1
+
+    def add_game(self, engine, guesses):
+        self.games.append((engine.seed, list(guesses)))
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'sqlite':
+        store = SQLiteStore(str(tmp_path / 'game_data.db')).load()
+    else:
+        store = JournalStore(str(tmp_path / 'game_data.json'),
+                             str(tmp_path / 'game_events.jsonl')).load()
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def server(store):
+    recorder = Recorder()
+    return GameServer(store, writer=recorder, history=recorder, rng=game_rng.RNGService(5))
+
+
+def connect(server):
+    session = GameSession(server)
+    session.connection_made(Transport())
+    return session
+
+
+def send(session, data):
+    transport = session.transport
+    transport.data = b''
+    session.data_received(data)
+    return transport.data
+
+
+def test_greeting(server):
+    session = connect(server)
+    assert session.transport.data == b'HELLO 1 100 %d\n' % game_engine.MAX_ATTEMPTS
+    assert server.sessions == 1
+    session.connection_lost(None)
+    assert server.sessions == 0
+
+
+def test_parsing(server):
+    session = connect(server)
+    assert send(session, b'GUESS abc\n') == b'ERR please enter a valid number\n'
+    assert send(session, b'FETCH\n') == b'ERR unknown command\n'
+    assert send(session, b'NAME\n') == b'ERR unknown command\n'
+    assert send(session, b'TOP many\n') == b'ERR TOP takes a number\n'
+    assert send(session, b'guess 0\n') == b'INVALID\n'
+    assert send(session, b'NAME Ann\r\n') == b'OK\n'
+    assert session.player == 'Ann'
+    # Several lines in one read, and a line split across reads
+    assert send(session, b'NEW\nNEW\nGUE') == b'OK\nOK\n'
+    assert send(session, b'SS 101\n') == b'INVALID\n'
+    assert session.engine.attempts == 0
+    assert send(session, b'QUIT\n') == b'BYE\n'
+    assert session.transport.closed
+
+
+def test_long_lines_are_dropped(server):
+    session = connect(server)
+    assert send(session, b'x' * game_server.MAX_LINE) == b''
+    assert not session.transport.closed
+    assert send(session, b'x') == b'ERR line too long\n'
+    assert session.transport.closed
+
+
+def test_win_is_recorded_and_a_new_game_starts(server, store):
+    session = connect(server)
+    send(session, b'NAME Ann\n')
+    engine = session.engine
+    seed, secret = engine.seed, engine.secret_number
+    wrong = 1 if secret != 1 else 2
+    assert send(session, b'GUESS %d\n' % wrong).startswith((b'LOW', b'HIGH'))
+    assert send(session, b'GUESS %d\n' % secret) == b'WIN 2\n'
+    store.flush()
+    assert store.stats['games_played'] == 1
+    assert store.stats['games_won'] == 1
+    assert [(entry['player'], entry['score']) for entry in store.leaderboard.top()] == [('Ann', 2)]
+    assert server.writer.dirty == 1
+    assert server.history.games == [(seed, [wrong, secret])]
+    # The next game is ready, on the next seed
+    assert engine.attempts == 0
+    assert not engine.finished
+    assert engine.seed == server.rng.seed_at(1)
+    assert session.guesses == []
+
+
+def test_loss_is_recorded(server, store):
+    session = connect(server)
+    engine = session.engine
+    secret = engine.secret_number
+    wrong = 1 if secret != 1 else 2
+    for left in range(engine.max_attempts - 1, 0, -1):
+        assert send(session, b'GUESS %d\n' % wrong) in (b'LOW %d\n' % left, b'HIGH %d\n' % left)
+    assert send(session, b'GUESS %d\n' % wrong) == b'LOSE %d\n' % secret
+    store.flush()
+    assert (store.stats['games_played'], store.stats['games_won']) == (1, 0)
+    assert len(store.leaderboard) == 0
+
+
+def test_top_is_clamped(server, store):
+    session = connect(server)
+    assert send(session, b'TOP\n') == b'TOP []\n'
+    for score in range(1, 6):
+        store.add_score(score, 'Ann', '2024-03-01 10:00')
+    store.flush()
+    for request, count in ((b'TOP -3\n', 1), (b'TOP 0\n', 1), (b'TOP 2\n', 2), (b'TOP\n', 5)):
+        reply = send(session, request)
+        assert reply.startswith(b'TOP ')
+        assert len(json.loads(reply[4:])) == count
+
+
+def test_stats_reply_is_json(server):
+    session = connect(server)
+    reply = send(session, b'STATS\n')
+    assert json.loads(reply[len(b'STATS '):])['best_score'] is None
+
+
+def test_sqlite_leaderboard_ignores_negative_limits(tmp_path):
+    store = SQLiteStore(os.path.join(tmp_path, 'game_data.db')).load()
+    for score in (3, 1, 2):
+        store.add_score(score, 'Ann')
+    assert store.leaderboard.top(-3) == []
+    assert store.leaderboard.page(1, 0) == []
+    assert store.leaderboard.search('a', limit=-1) == []
+    assert len(store.leaderboard.top(2)) == 2
+    store.close()
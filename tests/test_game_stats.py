@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import game_stats
+from game_stats import new_stats, percentile, record_game, rollup
+
+
+@pytest.mark.parametrize('histogram, fraction, expected', [
+    ([], 0.5, None),
+    ([0, 0, 0], 0.5, None),
+    ([0, 1], 0.5, 1),
+    ([0, 0, 5, 5], 0.5, 2),
+    ([0, 0, 5, 5], 0.51, 3),
+    ([0, 0, 5, 5], 0.9, 3),
+    ([0, 3, 0, 0, 1], 0.75, 1),
+    ([0, 3, 0, 0, 1], 0.76, 4),
+    ([0, 2, 7], 0.0, 1),
+    ([0, 2, 7], 1.0, 2),
+])
+def test_percentile(histogram, fraction, expected):
+    assert percentile(histogram, fraction) == expected
+
+
+def test_percentiles_match_sorted_attempts():
+    attempts = [3, 7, 1, 4, 4, 6, 2, 8, 5, 4, 3, 3]
+    stats = new_stats()
+    for n in attempts:
+        record_game(stats, True, n, "2024-03-01 10:00")
+    ordered = sorted(attempts)
+    # Nearest rank: the ceil(p * n)-th smallest
+    assert stats['p50_attempts'] == ordered[6 - 1]
+    assert stats['p90_attempts'] == ordered[11 - 1]
+    assert stats['attempts_histogram'] == [0, 1, 1, 3, 3, 1, 1, 1, 1]
+
+
+def test_totals():
+    stats = new_stats()
+    record_game(stats, True, 5, "2024-03-01 10:00")
+    record_game(stats, False, 8, "2024-03-01 11:00")
+    record_game(stats, True, 3, "2024-03-02 09:00")
+    assert (stats['games_played'], stats['games_won'], stats['games_lost']) == (3, 2, 1)
+    assert stats['total_attempts'] == 16
+    assert stats['average_attempts'] == 16 / 3
+    assert stats['best_score'] == 3
+    assert stats['last_played'] == "2024-03-02 09:00"
+    # Losses don't count towards the histogram or the percentiles
+    assert stats['attempts_histogram'] == [0, 0, 0, 1, 0, 1]
+
+
+@pytest.mark.parametrize('results, current, longest_win, longest_losing', [
+    ('', 0, 0, 0),
+    ('W', 1, 1, 0),
+    ('L', -1, 0, 1),
+    ('WWLLLW', 1, 2, 3),
+    ('WWWLWW', 2, 3, 1),
+    ('LWLLWWWWL', -1, 4, 2),
+])
+def test_streaks(results, current, longest_win, longest_losing):
+    stats = new_stats()
+    for result in results:
+        record_game(stats, result == 'W', 4, "2024-03-01 10:00")
+    assert stats['current_streak'] == current
+    assert stats['longest_win_streak'] == longest_win
+    assert stats['longest_losing_streak'] == longest_losing
+
+
+def test_daily_rollups_roll_over():
+    stats = new_stats()
+    first = datetime(2024, 1, 1, 12, 0)
+    days = game_stats.DAYS_KEPT + 10
+    for day in range(days):
+        for game in range(day % 3 + 1):
+            record_game(stats, game == 0, 4, (first + timedelta(days=day)).strftime("%Y-%m-%d %H:%M"))
+    assert len(stats['daily']) == game_stats.DAYS_KEPT
+    buckets = rollup(stats, 'daily')
+    assert len(buckets) == game_stats.DAYS_KEPT
+    assert buckets[0]['period'] == (first + timedelta(days=10)).strftime("%Y-%m-%d")
+    assert buckets[-1]['period'] == (first + timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    for offset, bucket in enumerate(buckets, 10):
+        assert bucket['games_played'] == offset % 3 + 1
+        assert bucket['games_won'] == 1
+        assert bucket['average_attempts'] == 4
+    # Older days still count in the totals
+    assert stats['games_played'] == sum(day % 3 + 1 for day in range(days))
+
+
+def test_late_games_only_count_in_the_totals():
+    stats = new_stats()
+    record_game(stats, True, 2, "2024-03-31 10:00")
+    # Same ring slot as 2024-03-31, but older than the window
+    record_game(stats, True, 6, "2024-03-01 10:00")
+    assert rollup(stats, 'daily') == [{'period': '2024-03-31', 'games_played': 1, 'games_won': 1,
+                                       'win_rate': 1.0, 'average_attempts': 2.0}]
+    assert stats['games_played'] == 2
+
+
+def test_stale_slots_are_skipped():
+    stats = new_stats()
+    record_game(stats, True, 2, "2024-03-01 10:00")
+    record_game(stats, False, 8, "2024-03-20 10:00")
+    record_game(stats, True, 4, "2024-04-15 10:00")
+    # 2024-03-01 is still in its slot but out of the 30-day window
+    assert [bucket['period'] for bucket in rollup(stats, 'daily')] == ['2024-03-20', '2024-04-15']
+
+
+def test_hourly_rollups_roll_over():
+    stats = new_stats()
+    first = datetime(2024, 1, 1, 0, 0)
+    hours = game_stats.HOURS_KEPT + 5
+    for hour in range(hours):
+        record_game(stats, hour % 2 == 0, 3, (first + timedelta(hours=hour)).strftime("%Y-%m-%d %H:%M"))
+    buckets = rollup(stats, 'hourly')
+    assert len(buckets) == game_stats.HOURS_KEPT
+    assert buckets[0]['period'] == (first + timedelta(hours=5)).strftime("%Y-%m-%d %H:00")
+    assert [bucket['games_won'] for bucket in buckets] == [int(hour % 2 == 0) for hour in range(5, hours)]
+
+
+def test_unreadable_dates_stay_out_of_the_rollups():
+    stats = new_stats()
+    record_game(stats, True, 3, "yesterday")
+    assert stats['games_played'] == 1
+    assert rollup(stats, 'daily') == []
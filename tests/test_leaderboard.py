@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+import leaderboard
+from leaderboard import EVICT_OLDEST, Leaderboard
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Split chunks after a few entries, so tests cover many of them
+    monkeypatch.setattr(leaderboard, 'CHUNK_SIZE', 4)
+
+
+def random_entries(rng, n):
+    return [{'player': rng.choice(['Ann', 'Bob', 'Cyd', 'Dee', 'bobby']),
+             'score': rng.randint(1, 10),
+             'date': f"2024-01-{rng.randint(10, 12)} 10:{rng.randint(0, 5):02d}"}
+            for _ in range(n)]
+
+
+def expected_order(entries, descending=False):
+    """Entries ranked by score, then date, then insertion order"""
+    order = sorted(range(len(entries)),
+                   key=lambda i: ((-1 if descending else 1) * entries[i]['score'],
+                                  entries[i]['date'], i))
+    return [entries[i] for i in order]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_order_and_paging_match_sorted(seed):
+    rng = random.Random(seed)
+    entries = random_entries(rng, rng.randint(0, 200))
+    board = Leaderboard()
+    for entry in entries:
+        board.add(entry)
+    expected = expected_order(entries)
+    assert len(board) == len(expected)
+    assert board.to_list() == expected
+    assert [board[i] for i in range(len(board))] == expected
+    for offset in range(0, len(expected) + 3, 7):
+        for limit in (0, 1, 5, 10):
+            assert board.page(offset, limit) == expected[offset:offset + limit]
+    assert board.top(10) == expected[:10]
+    if expected:
+        assert board[-1] == expected[-1]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_rank_search_and_best(seed):
+    rng = random.Random(seed)
+    entries = random_entries(rng, 150)
+    board = Leaderboard(entries)
+    expected = expected_order(entries)
+    for player in ('Ann', 'Bob', 'Cyd', 'Dee', 'bobby', 'nobody'):
+        ranks = [i + 1 for i, entry in enumerate(expected) if entry['player'] == player]
+        assert board.rank(player) == (ranks[0] if ranks else None)
+        assert board.best(player) == (expected[ranks[0] - 1] if ranks else None)
+    matches = [(i + 1, entry) for i, entry in enumerate(expected) if 'bob' in entry['player'].lower()]
+    assert board.search('BOB') == matches[:10]
+    assert board.search('bob', 3, 4) == matches[3:7]
+
+
+@pytest.mark.parametrize('descending', [False, True])
+def test_count_before(descending):
+    rng = random.Random(4)
+    entries = random_entries(rng, 120)
+    board = Leaderboard(entries, descending=descending)
+    sign = -1 if descending else 1
+    for score in range(0, 12):
+        for date in ('2024-01-09 10:00', '2024-01-11 10:03', '2024-01-13 00:00'):
+            assert board.count_before(score, date) == sum(
+                (sign * entry['score'], entry['date']) < (sign * score, date) for entry in entries)
+
+
+def test_descending():
+    rng = random.Random(1)
+    entries = random_entries(rng, 100)
+    board = Leaderboard(entries, descending=True)
+    assert board.to_list() == expected_order(entries, descending=True)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_capacity_keeps_the_best(seed):
+    rng = random.Random(seed)
+    entries = random_entries(rng, 120)
+    board = Leaderboard(capacity=25)
+    for entry in entries:
+        board.add(entry)
+    assert board.to_list() == expected_order(entries)[:25]
+    assert board.total_added == 120
+
+
+def test_capacity_evicts_the_oldest():
+    rng = random.Random(3)
+    entries = random_entries(rng, 120)
+    board = Leaderboard(entries, capacity=25, evict=EVICT_OLDEST)
+    assert board.to_list() == expected_order(entries[-25:])
+
+
+def test_unknown_eviction_policy():
+    with pytest.raises(ValueError):
+        Leaderboard(evict='random')
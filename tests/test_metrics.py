@@ -0,0 +1,106 @@
+import pytest
+
+import game_storage
+import metrics
+from metrics import BUCKETS, Metrics
+
+
+def sample(text, name):
+    """Value of the sample line starting with name"""
+    for line in text.splitlines():
+        if line.startswith(name + ' '):
+            return float(line.split()[-1])
+    raise KeyError(name)
+
+
+def test_histogram_buckets():
+    histogram = metrics.Histogram()
+    for seconds in (0.000001, 0.00001, 0.0003, 2.0, 60.0):
+        histogram.observe(seconds)
+    assert histogram.counts[0] == 2  # le is inclusive
+    assert histogram.counts[BUCKETS.index(0.0005)] == 1
+    assert histogram.counts[BUCKETS.index(5.0)] == 1
+    assert histogram.counts[-1] == 1
+    assert histogram.count == 5
+    assert histogram.sum == pytest.approx(62.000311)
+
+
+def test_prometheus_text():
+    m = Metrics()
+    m.histogram('check_guess').observe(0.002)
+    m.histogram('check_guess').observe(0.2)
+    m.count('games')
+    m.count('games', 2)
+    m.add_gauges('writer', lambda: {'writes': 4, 'requests': 9})
+    text = m.to_prometheus()
+    lines = text.splitlines()
+    assert text.endswith('\n')
+    assert lines[0] == '# TYPE guess_call_seconds histogram'
+    assert '# TYPE guess_events_total counter' in lines
+
+    buckets = [line for line in lines if line.startswith('guess_call_seconds_bucket')]
+    assert len(buckets) == len(BUCKETS) + 1
+    assert buckets[0] == 'guess_call_seconds_bucket{call="check_guess",le="1e-05"} 0'
+    assert sample(text, 'guess_call_seconds_bucket{call="check_guess",le="0.005"}') == 1
+    assert sample(text, 'guess_call_seconds_bucket{call="check_guess",le="0.5"}') == 2
+    assert sample(text, 'guess_call_seconds_bucket{call="check_guess",le="+Inf"}') == 2
+    assert sample(text, 'guess_call_seconds_count{call="check_guess"}') == 2
+    assert sample(text, 'guess_call_seconds_sum{call="check_guess"}') == pytest.approx(0.202)
+    assert sample(text, 'guess_events_total{event="games"}') == 3
+    assert sample(text, 'guess_writer_requests') == 9
+    assert sample(text, 'guess_writer_writes') == 4
+
+
+def test_instrument_times_calls_and_counts_errors():
+    class Thing:
+        def work(self, x):
+            if x < 0:
+                raise ValueError(x)
+            return x * 2
+
+    m = Metrics()
+    thing = Thing()
+    m.instrument(thing, {'work': 'work'})
+    assert thing.work(3) == 6
+    with pytest.raises(ValueError):
+        thing.work(-1)
+    assert m.histograms['work'].count == 2
+    assert m.counters == {'work_errors': 1}
+    # Other instances keep the plain method
+    assert Thing().work.__func__ is Thing.work
+
+
+def test_store_flush_timing(tmp_path):
+    store = game_storage.JournalStore(str(tmp_path / 'game_data.json'),
+                                      str(tmp_path / 'game_events.jsonl')).load()
+    m = Metrics()
+    m.instrument(store, {'flush': 'store_flush'})
+    writer = game_storage.BackgroundWriter(store, interval=60)
+    m.add_gauges('writer', writer.counters)
+    store.record_game(True, 5, "2024-03-09 10:00")
+    writer.mark_dirty()
+    writer.flush()
+    # Nothing left to write, but the call is still timed
+    writer.flush()
+
+    flushes = m.histograms['store_flush']
+    assert flushes.count == 2
+    assert flushes.sum > 0
+    text = m.to_prometheus()
+    assert sample(text, 'guess_call_seconds_count{call="store_flush"}') == 2
+    assert sample(text, 'guess_writer_requests') == 1
+    assert sample(text, 'guess_writer_writes') == 1
+    assert 'store_flush_errors' not in m.counters
+    writer.close()
+
+
+def test_write_replaces_file(tmp_path):
+    path = str(tmp_path / 'game_metrics.prom')
+    m = Metrics()
+    m.count('games')
+    m.write(path)
+    m.count('games')
+    m.write(path)
+    with open(path) as f:
+        assert sample(f.read(), 'guess_events_total{event="games"}') == 2
+    assert not (tmp_path / 'game_metrics.prom.tmp').exists()
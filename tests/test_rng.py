@@ -0,0 +1,91 @@
+import pytest
+
+import game_rng
+from game_engine import GameEngine
+from game_rng import RNGService, SecretPool, SplitMixRandom
+
+
+def test_splitmix_reference_values():
+    # The first outputs of SplitMix64 seeded with 0
+    rng = SplitMixRandom(0)
+    assert [rng.getrandbits(64) for _ in range(3)] == [
+        0xE220A8397B1DCDAF, 0x6E789E6AA1B965F4, 0x06C45D188009454F]
+
+
+def test_splitmix_is_reproducible():
+    first = SplitMixRandom(12345)
+    values = [first.randint(1, 100) for _ in range(50)] + [first.random() for _ in range(5)]
+    second = SplitMixRandom(12345)
+    assert [second.randint(1, 100) for _ in range(50)] + [second.random() for _ in range(5)] == values
+    assert [SplitMixRandom(12346).randint(1, 100) for _ in range(50)] != values[:50]
+
+
+def test_splitmix_state_round_trip():
+    rng = SplitMixRandom(7)
+    rng.random()
+    state = rng.getstate()
+    ahead = [rng.getrandbits(200) for _ in range(3)]
+    rng.setstate(state)
+    assert [rng.getrandbits(200) for _ in range(3)] == ahead
+    rng.seed(7)
+    assert rng.counter == 0
+
+
+@pytest.mark.parametrize('generator', game_rng.GENERATORS)
+def test_service_seeds_depend_only_on_the_root_seed(generator):
+    first = RNGService(99, generator)
+    second = RNGService(99, generator)
+    seeds = [first.next_seed() for _ in range(20)]
+    assert [second.next_seed() for _ in range(20)] == seeds
+    assert seeds == [first.seed_at(i) for i in range(20)]
+    assert len(set(seeds)) == 20
+    assert all(0 <= seed < 2 ** 63 for seed in seeds)
+
+
+@pytest.mark.parametrize('generator', game_rng.GENERATORS)
+def test_game_replays_from_its_seed(generator):
+    service = RNGService(5, generator)
+    engine = GameEngine(1, 2 ** 80)
+    for _ in range(10):
+        seed = service.start(engine)
+        assert engine.seed == seed
+        assert engine.secret_number == game_rng.secret_for(seed, 1, 2 ** 80, generator)
+
+
+@pytest.mark.parametrize('generator', game_rng.GENERATORS)
+def test_fill_secrets_matches_secret_for(generator):
+    service = RNGService(2024, generator)
+    service.next_seed()
+    secrets, seeds = [0] * 300, [0] * 300
+    service.fill_secrets(secrets, 1, 100, seeds)
+    assert seeds == [RNGService(2024).seed_at(i) for i in range(1, 301)]
+    assert secrets == [game_rng.secret_for(seed, 1, 100, generator) for seed in seeds]
+    # The block is claimed
+    assert service.next_seed() == service.seed_at(301)
+
+
+@pytest.mark.parametrize('low, high', [(1, 100), (-5, 5), (0, 2 ** 40), (7, 7)])
+def test_vectorized_splitmix_matches_the_streams(low, high):
+    np = pytest.importorskip('numpy')
+    service = RNGService(31337, 'splitmix')
+    secrets = np.empty(1000, dtype=np.int64)
+    seeds = np.empty(1000, dtype=np.int64)
+    service.fill_secrets(secrets, low, high, seeds)
+    assert seeds.tolist() == [service.seed_at(i) for i in range(1000)]
+    assert secrets.tolist() == [game_rng.secret_for(int(seed), low, high, 'splitmix') for seed in seeds]
+
+
+def test_secret_pool():
+    pool = SecretPool(RNGService(8, 'splitmix'), 1, 100, size=16)
+    service = RNGService(8, 'splitmix')
+    for _ in range(40):
+        seed, secret = pool.next()
+        assert seed == service.next_seed()
+        assert secret == game_rng.secret_for(seed, 1, 100, 'splitmix')
+
+
+def test_unknown_generator():
+    with pytest.raises(ValueError):
+        RNGService(1, 'lcg')
+    with pytest.raises(ValueError):
+        game_rng.stream(1, 'lcg')
@@ -0,0 +1,63 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import game_rng
+import simulator
+
+
+@pytest.mark.parametrize('low, high, max_attempts', [(1, 100, 8), (1, 100, 5), (-20, 1000, 10)])
+def test_verify_matches_engine(low, high, max_attempts):
+    assert simulator.verify(500, 'binary', low, high, max_attempts, seed=3)
+
+
+def test_verify_rejects_random_strategies():
+    with pytest.raises(ValueError):
+        simulator.verify(10, 'random')
+
+
+def test_binary_search_finds_every_secret():
+    result = simulator.simulate(100, 'binary', 1, 100, 7, secrets=np.arange(1, 101))
+    assert result.wins == 100
+    # A balanced search finds 1, 2, 4, ... numbers in its first guesses
+    assert result.histogram == [0, 1, 2, 4, 8, 16, 32, 37]
+
+
+def test_chunks_do_not_change_the_result():
+    secrets = np.random.default_rng(1).integers(1, 1000, size=1000, endpoint=True)
+    whole = simulator.simulate(0, 'binary', 1, 1000, 6, secrets=secrets)
+    chunked = simulator.simulate(0, 'binary', 1, 1000, 6, secrets=secrets, chunk_size=7)
+    assert chunked.to_dict() == whole.to_dict()
+
+
+def test_rng_service_secrets_replay():
+    service = game_rng.RNGService(5)
+    result = simulator.simulate(200, 'binary', 1, 100, 8, rng_service=service, chunk_size=64)
+    replay = game_rng.RNGService(5)
+    secrets = [game_rng.secret_for(replay.seed_at(i), 1, 100) for i in range(200)]
+    assert result.to_dict() == simulator.simulate(0, 'binary', 1, 100, 8, secrets=secrets).to_dict()
+
+
+def test_sweep_rows():
+    rows = simulator.sweep(200, strategies=('binary', 'human'), attempt_budgets=(4, 8), seed=2)
+    assert [(row['strategy'], row['max_attempts']) for row in rows] == [
+        ('binary', 4), ('binary', 8), ('human', 4), ('human', 8)]
+    for row in rows:
+        assert row['games'] == 200
+        assert row['wins'] == sum(row['histogram'])
+    assert rows[1]['wins'] == 200
+
+
+def test_range_too_large():
+    with pytest.raises(ValueError):
+        simulator.simulate(1, 'binary', 0, 2 ** 62)
+
+
+def test_guesses_stay_in_range():
+    strategy = simulator.STRATEGIES['human']
+    rng = np.random.default_rng(0)
+    lo = np.array([1, 10, 50, 99])
+    hi = np.array([100, 12, 50, 100])
+    for _ in range(50):
+        guess = strategy(lo, hi, rng)
+        assert ((guess >= lo) & (guess <= hi)).all()
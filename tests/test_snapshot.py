@@ -0,0 +1,100 @@
+import json
+import random
+
+import pytest
+
+import leaderboard
+import snapshot
+from leaderboard import Leaderboard
+from snapshot import MappedLeaderboard, SnapshotView
+
+
+def random_entry(rng, entry_id):
+    return {'id': entry_id, 'player': rng.choice(['Ann', 'Bob', 'Cyd', 'Dee', 'Éva']),
+            'score': rng.randint(1, 12),
+            'date': f"2024-0{rng.randint(1, 3)}-1{rng.randint(0, 2)} 1{rng.randint(0, 1)}:0{rng.randint(0, 2)}"}
+
+
+def write(path, board):
+    path.write_bytes(snapshot.encode_entries(4, {'games_played': 9}, board.total_added, board.to_list()))
+    return str(path)
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_mapped_leaderboard_matches_leaderboard(tmp_path, seed):
+    rng = random.Random(seed)
+    board = Leaderboard(random_entry(rng, i) for i in range(1, rng.randint(1, 80)))
+    view = SnapshotView(write(tmp_path / 'a.bin', board))
+    assert (view.seq, view.stats(), len(view)) == (4, {'games_played': 9}, len(board))
+    mapped = MappedLeaderboard(view)
+    for i in range(rng.randint(0, 40)):
+        entry = random_entry(rng, 1000 + i)
+        board.add(dict(entry))
+        mapped.add(dict(entry))
+        for player in ('Ann', 'Bob', 'Éva', 'nobody'):
+            assert mapped.rank(player) == board.rank(player)
+            assert mapped.best(player) == board.best(player)
+    assert len(mapped) == len(board)
+    assert mapped.to_list() == board.to_list()
+    for offset in range(0, len(board) + 2, 9):
+        assert mapped.page(offset, 6) == board.page(offset, 6)
+    assert mapped.search('b', 2, 5) == board.search('b', 2, 5)
+    assert mapped.search('éVA') == board.search('éVA')
+
+    # Re-encoding merges the added entries into the new snapshot
+    (tmp_path / 'b.bin').write_bytes(mapped.encode(5, {}))
+    mapped.close()
+    merged = SnapshotView(str(tmp_path / 'b.bin'))
+    assert list(merged.entries()) == board.to_list()
+    assert merged.leaderboard_total == board.total_added
+    merged.close()
+
+
+def test_json_round_trip(tmp_path):
+    rng = random.Random(1)
+    entries = Leaderboard(random_entry(rng, i) for i in range(1, 200)).to_list()
+    data = {'seq': 7, 'stats': {'games_played': 250}, 'leaderboard': entries, 'leaderboard_total': 260}
+    (tmp_path / 'in.json').write_text(json.dumps(data))
+    assert snapshot.json_to_binary(str(tmp_path / 'in.json'), str(tmp_path / 'game_data.bin')) == 199
+    assert snapshot.binary_to_json(str(tmp_path / 'game_data.bin'), str(tmp_path / 'out.json')) == 199
+    assert json.loads((tmp_path / 'out.json').read_text()) == data
+
+
+def test_unreadable_dates_do_not_stop_an_import(tmp_path):
+    entries = [{'player': 'Ann', 'score': 2, 'date': 'last tuesday'},
+               {'player': 'Bob', 'score': 3, 'date': '2023-05-01'},
+               {'player': 'Cyd', 'score': 3, 'date': '2023-05-01T08:30:59'},
+               {'player': 'Dee', 'score': 4}]
+    (tmp_path / 'in.json').write_text(json.dumps({'leaderboard': entries}))
+    assert snapshot.json_to_binary(str(tmp_path / 'in.json'), str(tmp_path / 'game_data.bin')) == 4
+    view = SnapshotView(str(tmp_path / 'game_data.bin'))
+    assert [entry['date'] for entry in view.entries()] == ['', '2023-05-01 00:00', '2023-05-01 08:30', '']
+    view.close()
+
+
+@pytest.mark.parametrize('date', ['2024-02-30 10:00', '2024-01-01 24:00', '10000-01-01 00:00', None, ''])
+def test_to_minutes_falls_back_to_unknown(date):
+    assert snapshot.to_minutes(date) == snapshot.UNKNOWN_DATE
+
+
+def test_minutes_round_trip():
+    for date in ('0001-01-01 00:01', '2024-02-29 23:59', '8000-12-31 12:00'):
+        assert snapshot.from_minutes(snapshot.to_minutes(date)) == date
+
+
+def test_many_added_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(leaderboard, 'CHUNK_SIZE', 8)
+    monkeypatch.setattr(snapshot, 'ADDED_PAGE', 5)
+    rng = random.Random(7)
+    board = Leaderboard(random_entry(rng, i) for i in range(1, 300))
+    mapped = MappedLeaderboard(SnapshotView(write(tmp_path / 'a.bin', board)))
+    for i in range(600):
+        entry = random_entry(rng, 1000 + i)
+        board.add(dict(entry))
+        mapped.add(dict(entry))
+    assert mapped.to_list() == board.to_list()
+    for offset in range(0, len(board), 37):
+        assert mapped.page(offset, 11) == board.page(offset, 11)
+    for player in ('Ann', 'Bob', 'Cyd', 'Dee', 'Éva'):
+        assert mapped.rank(player) == board.rank(player)
+    mapped.close()
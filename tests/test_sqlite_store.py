@@ -0,0 +1,158 @@
+import sqlite3
+
+import pytest
+
+import game_stats
+from sqlite_store import SCHEMA_VERSION, SQLiteStore
+
+# The schema as the first release of the SQLite backend created it
+V0_SCHEMA = """
+CREATE TABLE games (
+    id INTEGER PRIMARY KEY,
+    won INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX games_date ON games(date);
+CREATE TABLE guesses (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    attempt INTEGER NOT NULL,
+    guess INTEGER NOT NULL,
+    PRIMARY KEY (game_id, attempt)
+) WITHOUT ROWID;
+CREATE TABLE leaderboard (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX leaderboard_rank ON leaderboard(score, date, id);
+CREATE INDEX leaderboard_player ON leaderboard(player, score, date, id);
+CREATE TABLE totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    games_played INTEGER NOT NULL,
+    games_won INTEGER NOT NULL,
+    total_attempts INTEGER NOT NULL,
+    best_score INTEGER,
+    last_played TEXT
+);
+INSERT INTO totals VALUES (0, 0, 0, 0, NULL, NULL);
+CREATE TRIGGER games_totals AFTER INSERT ON games BEGIN
+    UPDATE totals SET
+        games_played = games_played + 1,
+        games_won = games_won + NEW.won,
+        total_attempts = total_attempts + NEW.attempts,
+        best_score = CASE WHEN NEW.won AND (best_score IS NULL OR NEW.attempts < best_score)
+                          THEN NEW.attempts ELSE best_score END,
+        last_played = NEW.date
+    WHERE id = 0;
+END;
+"""
+
+# won, attempts, date
+GAMES = [(1, 4, "2024-03-01 10:00"), (1, 6, "2024-03-01 11:00"), (0, 8, "2024-03-02 10:00"),
+         (0, 8, "2024-03-02 10:30"), (1, 3, "2024-03-03 09:00"), (1, 5, "2024-03-03 09:15"),
+         (1, 4, "2024-03-03 20:00")]
+
+
+def v0_database(path):
+    db = sqlite3.connect(path)
+    db.executescript(V0_SCHEMA)
+    db.executemany("INSERT INTO games (won, attempts, date) VALUES (?, ?, ?)", GAMES)
+    db.execute("INSERT INTO leaderboard (player, score, date) VALUES ('Ann', 3, '2024-03-03 09:00')")
+    db.commit()
+    db.close()
+
+
+def expected_stats():
+    stats = game_stats.new_stats()
+    for won, attempts, date in GAMES:
+        game_stats.record_game(stats, bool(won), attempts, date)
+    return stats
+
+
+def test_migrate_from_v0(tmp_path):
+    path = str(tmp_path / 'game_data.db')
+    v0_database(path)
+    store = SQLiteStore(path).load()
+    assert store.db.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    stats = store.stats
+    expected = expected_stats()
+    for key in ('games_played', 'games_won', 'games_lost', 'total_attempts', 'best_score',
+                'last_played', 'attempts_histogram', 'p50_attempts', 'p90_attempts',
+                'current_streak', 'longest_win_streak', 'longest_losing_streak'):
+        assert stats[key] == expected[key], key
+    assert stats['current_streak'] == 3
+    assert stats['longest_losing_streak'] == 2
+    assert sorted(stats['daily']) == sorted(slot for slot in expected['daily'] if slot)
+    assert sorted(stats['hourly']) == sorted(slot for slot in expected['hourly'] if slot)
+    assert store.leaderboard.top() == [{'player': 'Ann', 'score': 3, 'date': '2024-03-03 09:00'}]
+
+    # The trigger keeps the backfilled totals going
+    store.record_game(False, 8, "2024-03-04 10:00")
+    assert store.stats['current_streak'] == -1
+    store.close()
+
+    # Loading again finds nothing to migrate
+    store = SQLiteStore(path).load()
+    assert store.stats['games_played'] == len(GAMES) + 1
+    store.close()
+
+
+def test_failed_migration_leaves_the_old_schema(tmp_path, monkeypatch):
+    path = str(tmp_path / 'game_data.db')
+    v0_database(path)
+
+    def fail(self):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(SQLiteStore, '_backfill_streaks', fail)
+    store = SQLiteStore(path)
+    with pytest.raises(sqlite3.OperationalError):
+        store.load()
+    store.db.close()
+
+    db = sqlite3.connect(path)
+    assert db.execute("PRAGMA user_version").fetchone()[0] == 0
+    columns = [row[1] for row in db.execute("PRAGMA table_info(totals)")]
+    assert 'current_streak' not in columns
+    assert db.execute("SELECT COUNT(*) FROM games").fetchone()[0] == len(GAMES)
+    db.close()
+
+    monkeypatch.undo()
+    store = SQLiteStore(path).load()
+    assert store.stats['longest_win_streak'] == 3
+    store.close()
+
+
+def test_stats_match_the_json_store(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'game_data.db')).load()
+    for won, attempts, date in GAMES:
+        store.record_game(bool(won), attempts, date)
+    stats = store.stats
+    expected = expected_stats()
+    assert {key: stats[key] for key in expected if key not in ('daily', 'hourly')} == \
+        {key: expected[key] for key in expected if key not in ('daily', 'hourly')}
+    store.close()
+
+
+def test_stats_are_cached_until_a_write(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'game_data.db')).load()
+    store.autoflush = False
+    assert store.stats is store.stats
+    store.record_game(True, 4)
+    # Queued, not written yet
+    assert store.stats['games_played'] == 0
+    store.flush()
+    assert store.stats['games_played'] == 1
+    store.close()
+
+
+def test_games_keep_their_range(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'game_data.db')).load()
+    store.record_game(True, 40, "2024-03-04 10:00", seed=12, generator='splitmix',
+                      low=1, high=2 ** 70, max_attempts=72)
+    # Stored as text, since SQLite integers stop at 64 bits
+    assert store.query("SELECT seed, rng, low, high, max_attempts FROM games") == [
+        (12, 'splitmix', '1', str(2 ** 70), 72)]
+    store.close()
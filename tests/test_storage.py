@@ -0,0 +1,187 @@
+import json
+import os
+
+import pytest
+
+import game_rng
+import stress_store
+from game_engine import GameEngine
+from game_storage import BackgroundWriter, JournalStore
+from sqlite_store import SQLiteStore
+
+TORN = b'{"type":"game","won":tr'
+
+
+def open_store(directory, snapshot_format='json', **options):
+    data_file = 'game_data.bin' if snapshot_format == 'binary' else 'game_data.json'
+    return JournalStore(os.path.join(directory, data_file),
+                        os.path.join(directory, 'game_events.jsonl'),
+                        snapshot_format=snapshot_format, **options).load()
+
+
+def crash(store):
+    """Drop a store's files without checkpointing, as a killed process would"""
+    if store._journal is not None:
+        store._journal.close()
+    store._release_leaderboard()
+    store._lock.close()
+
+
+def play(store, games):
+    for i in range(games):
+        won = i % 3 != 2
+        store.record_game(won, 1 + i % 7, f"2024-03-0{1 + i % 5} 1{i % 10}:00")
+        if won:
+            store.add_score(1 + i % 7, f"player{i % 4}", f"2024-03-0{1 + i % 5} 1{i % 10}:00")
+
+
+def journal(directory):
+    with open(os.path.join(directory, 'game_events.jsonl'), 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('snapshot_format', ['json', 'binary'])
+def test_replay_after_crash(tmp_path, snapshot_format):
+    store = open_store(tmp_path, snapshot_format)
+    play(store, 10)
+    store.checkpoint()
+    play(store, 7)
+    stats, entries = store.stats, store.leaderboard.to_list()
+    crash(store)
+    with open(tmp_path / 'game_events.jsonl', 'ab') as f:
+        f.write(TORN)
+
+    store = open_store(tmp_path, snapshot_format)
+    assert store.stats == stats
+    assert store.leaderboard.to_list() == entries
+    assert store.journal_events == 7 + 5
+    # The torn line is cut off, and the next event starts on a line of its own
+    assert journal(tmp_path).endswith(b'\n')
+    store.record_game(True, 3, "2024-03-09 10:00")
+    store.close()
+
+    store = open_store(tmp_path, snapshot_format)
+    assert store.stats['games_played'] == 18
+    assert store.leaderboard.to_list() == entries
+    store.close()
+
+
+def test_events_already_in_the_snapshot_are_skipped(tmp_path):
+    store = open_store(tmp_path, archive_dir=None)
+    play(store, 6)
+    events = journal(tmp_path)
+    store.close()
+    # A crash after the snapshot was written but before the journal was truncated
+    with open(tmp_path / 'game_events.jsonl', 'wb') as f:
+        f.write(events)
+
+    store = open_store(tmp_path)
+    assert store.stats['games_played'] == 6
+    assert store.journal_events == 0
+    store.close()
+
+
+def test_games_can_be_replayed_from_the_journal(tmp_path):
+    service = game_rng.RNGService(77, 'splitmix')
+    engine = GameEngine(1, 2 ** 70)
+    seed = service.start(engine)
+    store = open_store(tmp_path)
+    store.record_game(False, engine.max_attempts, "2024-03-04 10:00", seed=seed,
+                      generator='splitmix', low=engine.low, high=engine.high,
+                      max_attempts=engine.max_attempts)
+    crash(store)
+
+    (event,) = [json.loads(line) for line in journal(tmp_path).splitlines()]
+    assert game_rng.secret_for(event['seed'], event['low'], event['high'], event['rng']) == \
+        engine.secret_number
+    assert event['max_attempts'] == engine.max_attempts
+
+
+def test_checkpoint_archives_the_journal(tmp_path):
+    store = open_store(tmp_path)
+    play(store, 5)
+    events = journal(tmp_path)
+    stats = store.stats
+    store.close()
+
+    assert not (tmp_path / 'game_events.jsonl').exists()
+    archived = os.listdir(tmp_path / 'game_archive')
+    assert len(archived) == 1
+    with open(tmp_path / 'game_archive' / archived[0], 'rb') as f:
+        assert f.read() == events
+    with open(tmp_path / 'game_data.json') as f:
+        assert json.load(f)['stats']['games_played'] == 5
+
+    store = open_store(tmp_path)
+    assert store.stats == stats
+    store.close()
+
+
+def test_line_torn_before_another_write(tmp_path):
+    writer = open_store(tmp_path)
+    play(writer, 4)
+    crashed = open_store(tmp_path)
+    play(crashed, 3)
+    crash(crashed)
+    with open(tmp_path / 'game_events.jsonl', 'ab') as f:
+        f.write(TORN)
+    # A process that was already running appends after the torn line
+    play(writer, 2)
+    assert TORN + b'\n' in journal(tmp_path)
+
+    store = open_store(tmp_path)
+    assert store.stats['games_played'] == 9
+    assert len(store.leaderboard) == 7
+    store.close()
+    writer.close()
+
+
+def test_entry_ids_are_unique_across_stores(tmp_path):
+    first = open_store(tmp_path)
+    second = open_store(tmp_path)
+    ids = [first.add_score(3)['id'] for _ in range(70)] + [second.add_score(4)['id'] for _ in range(70)]
+    assert len(set(ids)) == len(ids)
+    first.close()
+    second.close()
+
+    store = open_store(tmp_path)
+    assert sorted(entry['id'] for entry in store.leaderboard) == sorted(ids)
+    store.close()
+
+
+def test_processes_sharing_a_directory():
+    report = stress_store.run(processes=3, games=60, checkpoint_every=50)
+    assert report['failures'] == []
+    assert report['checkpoints'] >= 3
+
+
+def test_switching_to_binary_imports_the_json_snapshot(tmp_path):
+    store = open_store(tmp_path)
+    play(store, 12)
+    entries = store.leaderboard.to_list()
+    store.close()
+
+    store = open_store(tmp_path, 'binary')
+    assert store.leaderboard.to_list() == entries
+    play(store, 3)
+    store.close()
+    store = open_store(tmp_path, 'binary')
+    assert store.stats['games_played'] == 15
+    store.close()
+
+
+def test_background_writer_reports_flushes(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'game_data.db')).load()
+    seen = []
+    writer = BackgroundWriter(store, interval=0.01,
+                              on_flush=lambda: seen.append(store.stats['games_played']))
+    store.record_game(True, 4)
+    # Queued: SQLite reads only see what has been written
+    assert store.stats['games_played'] == 0
+    writer.mark_dirty()
+    writer.flush()
+    assert seen[-1] == 1
+    # Nothing written, nothing reported
+    writer.flush()
+    assert seen == [1]
+    writer.close()
@@ -0,0 +1,64 @@
+import random
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+import game_engine
+import tournament
+from tournament import Tournament
+
+
+@pytest.mark.parametrize('players', range(2, 9))
+def test_schedule_pairs_everyone_once(players):
+    pairs = tournament.schedule(players)
+    assert Counter(tuple(sorted(pair)) for pair in pairs) == Counter(combinations(range(players), 2))
+
+
+def test_matches_follow_the_engine_rules():
+    outcomes = tournament.play_matches((0, 300, ('binary', 'random'), [(0, 1)], 1, 100, 8, 11))
+    rng = random.Random("11:0")
+    for outcome in outcomes:
+        secret = rng.randint(1, 100)
+        a = game_engine.play_strategy(game_engine.binary_search, secret, 1, 100, 8, rng) or 9
+        b = game_engine.play_strategy(game_engine.random_guess, secret, 1, 100, 8, rng) or 9
+        assert outcome == (tournament.FIRST_WINS if a < b else tournament.SECOND_WINS if b < a
+                           else tournament.DRAW)
+
+
+def test_same_seed_same_results():
+    first = Tournament(matches=3000, seed=4, chunk=700).run(jobs=1)
+    second = Tournament(matches=3000, seed=4, chunk=700).run(jobs=1)
+    assert first.ratings == second.ratings
+    assert first.played == 3000
+    for i in range(len(first.players)):
+        assert first.wins[i] + first.draws[i] + first.losses[i] == 2 * 3000 // len(first.players)
+    # Rating changes cancel out
+    assert sum(first.ratings) == pytest.approx(tournament.INITIAL_RATING * len(first.players))
+    standings = first.standings("2024-01-01 00:00").to_list()
+    assert [entry['score'] for entry in standings] == sorted(round(r) for r in first.ratings)[::-1]
+    assert standings[0]['strategy'] == 'binary'
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / 'results.json')
+    assert tournament.load_results(path) is None
+    played = Tournament(matches=50, seed=1).run(jobs=1)
+    played.save(path)
+    results = tournament.load_results(path)
+    assert results['matches'] == results['scheduled'] == 50
+    assert results['seed'] == 1
+    assert len(results['standings']) == len(played.players)
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        Tournament([('Ann', 'binary'), ('Bob', 'psychic')])
+    with pytest.raises(ValueError):
+        Tournament([('Ann', 'binary')])
+
+
+def test_process_pool_gives_the_same_ratings():
+    alone = Tournament(matches=4000, seed=9, chunk=1000).run(jobs=1)
+    pooled = Tournament(matches=4000, seed=9, chunk=1000).run(jobs=2)
+    assert pooled.ratings == alone.ratings
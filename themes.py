@@ -0,0 +1,74 @@
+"""Color themes and the registry of widgets that use them.
+
+Widgets are registered with the theme role of each color option, e.g.
+``register(label, bg='frame_bg', fg='text')``. Switching themes then
+reconfigures just the registered widgets in one pass, instead of walking
+the widget tree.
+"""
+import tkinter as tk
+
+THEMES = {
+    'dark': {
+        'bg': '#2c3e50',
+        'frame_bg': '#34495e',
+        'text': '#ecf0f1',
+        'accent': '#3498db',
+        'success': '#27ae60',
+        'warning': '#e74c3c',
+        'attempts': '#e74c3c',
+        'best_score': '#f1c40f',
+        'entry_bg': '#ecf0f1',
+        'entry_fg': '#2c3e50'
+    },
+    'light': {
+        'bg': '#ecf0f1',
+        'frame_bg': '#bdc3c7',
+        'text': '#2c3e50',
+        'accent': '#3498db',
+        'success': '#27ae60',
+        'warning': '#e74c3c',
+        'attempts': '#e74c3c',
+        'best_score': '#f39c12',
+        'entry_bg': '#ffffff',
+        'entry_fg': '#2c3e50'
+    },
+    'purple': {
+        'bg': '#4a148c',
+        'frame_bg': '#6a1b9a',
+        'text': '#f3e5f5',
+        'accent': '#ab47bc',
+        'success': '#66bb6a',
+        'warning': '#ef5350',
+        'attempts': '#ef5350',
+        'best_score': '#ffd54f',
+        'entry_bg': '#f3e5f5',
+        'entry_fg': '#4a148c'
+    }
+}
+
+
+class ThemeRegistry:
+    """Widgets and the theme role behind each of their color options"""
+
+    def __init__(self, theme):
+        self.theme = theme
+        self._widgets = {}  # Tk path name -> (widget, {option: role})
+
+    def __len__(self):
+        return len(self._widgets)
+
+    def register(self, widget, **roles):
+        """Color widget from the current theme and keep it in sync; returns widget"""
+        widget.configure(**{option: self.theme[role] for option, role in roles.items()})
+        self._widgets[str(widget)] = (widget, roles)
+        return widget
+
+    def apply(self, theme):
+        """Recolor every registered widget with theme"""
+        self.theme = theme
+        for name, (widget, roles) in list(self._widgets.items()):
+            try:
+                widget.configure(**{option: theme[role] for option, role in roles.items()})
+            except tk.TclError:
+                # Destroyed along with a closed window; forget it
+                del self._widgets[name]
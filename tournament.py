@@ -0,0 +1,268 @@
+"""Tournaments between bot strategies, rated with Elo.
+
+    python tournament.py --matches 1000000
+    python tournament.py --player Alice=human --player Bob=binary --matches 50000 -o results.json
+
+Players are a name and one of game_engine's strategies. Rounds are
+scheduled round-robin (the circle method, with a bye for an odd number
+of players) and repeat until the requested number of matches is reached.
+In a match both players hunt the same secret; whoever finds it in fewer
+attempts wins, and equal attempts or two losses are a draw.
+
+Matches don't depend on ratings, so they are played headlessly on a
+process pool in chunks, one byte of outcome per match coming back per
+chunk. Ratings are then updated in schedule order, so a tournament
+with the same seed and chunk size always ends with the same ratings
+however many processes played it. The standings are a Leaderboard
+ranked by rating, highest first. They are kept apart from the game's
+score leaderboard, which ranks by fewest attempts, and the game saves
+the latest tournament's results to tournament_results.json next to its
+other data.
+"""
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+import game_engine
+from game_storage import write_atomic
+from leaderboard import Leaderboard
+
+INITIAL_RATING = 1500
+K_FACTOR = 16
+
+# Matches played per task sent to a worker process
+CHUNK_MATCHES = 20000
+
+# Results of the latest tournament played from the game
+RESULTS_FILE = 'tournament_results.json'
+
+# Match outcomes, one byte each
+DRAW = 0
+FIRST_WINS = 1
+SECOND_WINS = 2
+
+
+def default_roster():
+    """One bot per strategy"""
+    return [(f"{name.title()} Bot", name) for name in sorted(game_engine.STRATEGIES)]
+
+
+def schedule(players):
+    """One cycle of round-robin rounds as a flat list of (first, second) player indices.
+
+    Every pair meets once per cycle; with an odd number of players each
+    sits out one round.
+    """
+    seats = list(range(players))
+    if players % 2:
+        seats.append(None)
+    pairs = []
+    for _ in range(len(seats) - 1):
+        half = len(seats) // 2
+        for a, b in zip(seats[:half], reversed(seats[half:])):
+            if a is not None and b is not None:
+                pairs.append((a, b))
+        # Keep the first seat, rotate the rest
+        seats.insert(1, seats.pop())
+    return pairs
+
+
+def play_matches(task):
+    """Worker: play one chunk of matches and return their outcomes as bytes"""
+    start, count, strategies, pairs, low, high, max_attempts, seed = task
+    strategies = [game_engine.STRATEGIES[name] for name in strategies]
+    rng = random.Random(f"{seed}:{start}")
+    randint = rng.randint
+    play = game_engine.play_strategy
+    outcomes = bytearray(count)
+    cycle = len(pairs)
+    lost = max_attempts + 1
+    for i in range(count):
+        first, second = pairs[(start + i) % cycle]
+        secret = randint(low, high)
+        a = play(strategies[first], secret, low, high, max_attempts, rng) or lost
+        b = play(strategies[second], secret, low, high, max_attempts, rng) or lost
+        if a < b:
+            outcomes[i] = FIRST_WINS
+        elif b < a:
+            outcomes[i] = SECOND_WINS
+    return bytes(outcomes)
+
+
+class Tournament:
+    """A scheduled tournament between named strategies"""
+
+    def __init__(self, players=None, matches=100000, low=game_engine.MIN_NUMBER,
+                 high=game_engine.MAX_NUMBER, max_attempts=None, k=K_FACTOR, seed=None,
+                 chunk=CHUNK_MATCHES):
+        self.players = list(players or default_roster())
+        if len(self.players) < 2:
+            raise ValueError("a tournament needs at least two players")
+        for name, strategy in self.players:
+            if strategy not in game_engine.STRATEGIES:
+                raise ValueError(f"unknown strategy for {name}: {strategy}")
+        self.matches = matches
+        self.low = low
+        self.high = high
+        self.max_attempts = game_engine.attempt_budget(low, high) if max_attempts is None else max_attempts
+        self.k = k
+        # Kept so a tournament can be replayed
+        self.seed = random.randrange(1 << 32) if seed is None else seed
+        self.chunk = chunk
+        self.pairs = schedule(len(self.players))
+        self.ratings = [float(INITIAL_RATING)] * len(self.players)
+        self.wins = [0] * len(self.players)
+        self.draws = [0] * len(self.players)
+        self.losses = [0] * len(self.players)
+        self.played = 0
+
+    @property
+    def rounds(self):
+        """Rounds started so far"""
+        per_round = max(len(self.players) // 2, 1)
+        return -(-self.played // per_round)
+
+    def tasks(self):
+        strategies = tuple(strategy for _, strategy in self.players)
+        for start in range(0, self.matches, self.chunk):
+            yield (start, min(self.chunk, self.matches - start), strategies, self.pairs,
+                   self.low, self.high, self.max_attempts, self.seed)
+
+    def apply(self, start, outcomes):
+        """Rate one chunk of outcomes, in schedule order"""
+        ratings, wins, draws, losses = self.ratings, self.wins, self.draws, self.losses
+        pairs = self.pairs
+        cycle = len(pairs)
+        k = self.k
+        for i, outcome in enumerate(outcomes, start):
+            first, second = pairs[i % cycle]
+            expected = 1.0 / (1.0 + 10.0 ** ((ratings[second] - ratings[first]) / 400.0))
+            if outcome == FIRST_WINS:
+                score = 1.0
+                wins[first] += 1
+                losses[second] += 1
+            elif outcome == SECOND_WINS:
+                score = 0.0
+                wins[second] += 1
+                losses[first] += 1
+            else:
+                score = 0.5
+                draws[first] += 1
+                draws[second] += 1
+            change = k * (score - expected)
+            ratings[first] += change
+            ratings[second] -= change
+        self.played = start + len(outcomes)
+
+    def run(self, jobs=None, progress=None, cancel=None):
+        """Play every match and return self.
+
+        jobs defaults to one process per CPU; with 1 the matches are played
+        in this process. progress(played, total) is called after each
+        chunk, and a set cancel event stops the tournament between chunks.
+        """
+        jobs = jobs or os.cpu_count() or 1
+        tasks = list(self.tasks())
+        if jobs == 1 or len(tasks) == 1:
+            results = map(play_matches, tasks)
+            self._collect(tasks, results, progress, cancel)
+            return self
+        # spawn, because the game runs this from a thread next to Tk
+        with ProcessPoolExecutor(jobs, mp_context=get_context('spawn')) as pool:
+            results = pool.map(play_matches, tasks)
+            if not self._collect(tasks, results, progress, cancel):
+                pool.shutdown(cancel_futures=True)
+        return self
+
+    def _collect(self, tasks, results, progress, cancel):
+        """Rate results in task order; return False if cancelled"""
+        for task, outcomes in zip(tasks, results):
+            self.apply(task[0], outcomes)
+            if progress is not None:
+                progress(self.played, self.matches)
+            if cancel is not None and cancel.is_set():
+                return False
+        return True
+
+    def standings(self, date=None):
+        """A Leaderboard of the players by rating, highest first"""
+        date = date or datetime.now().strftime("%Y-%m-%d %H:%M")
+        standings = Leaderboard(descending=True)
+        for i, (name, strategy) in enumerate(self.players):
+            standings.add({'player': name, 'score': round(self.ratings[i]), 'date': date,
+                           'strategy': strategy, 'wins': self.wins[i], 'draws': self.draws[i],
+                           'losses': self.losses[i]})
+        return standings
+
+    def to_dict(self):
+        return {
+            'matches': self.played,
+            'scheduled': self.matches,
+            'rounds': self.rounds,
+            'seed': self.seed,
+            'range': [self.low, self.high],
+            'max_attempts': self.max_attempts,
+            'standings': self.standings().to_list()
+        }
+
+    def save(self, path=RESULTS_FILE):
+        """Write the results atomically as JSON"""
+        write_atomic(path, json.dumps(self.to_dict(), indent=2))
+
+
+def load_results(path=RESULTS_FILE):
+    """Results saved by Tournament.save, or None"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        return None  # Written by hand, or not ours
+
+
+def parse_player(text):
+    """NAME=STRATEGY, or a bare strategy name"""
+    name, _, strategy = text.rpartition('=')
+    return (name or f"{strategy.title()} Bot"), strategy
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Play an Elo-rated tournament between strategies")
+    parser.add_argument('-p', '--player', action='append', type=parse_player,
+                        help=f"NAME=STRATEGY, repeatable; strategies: {', '.join(sorted(game_engine.STRATEGIES))} "
+                             "(default: one bot per strategy)")
+    parser.add_argument('-n', '--matches', type=int, default=100000)
+    parser.add_argument('--low', type=int, default=game_engine.MIN_NUMBER)
+    parser.add_argument('--high', type=int, default=game_engine.MAX_NUMBER)
+    parser.add_argument('-a', '--attempts', type=int, default=None,
+                        help=f"attempt limit (default: ceil(log2(range + 1)) + {game_engine.SLACK})")
+    parser.add_argument('-k', type=float, default=K_FACTOR, help="Elo K-factor")
+    parser.add_argument('--jobs', type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument('--chunk', type=int, default=CHUNK_MATCHES, help="matches per worker task")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('-o', '--output', help="also write the results here as JSON")
+    args = parser.parse_args()
+
+    try:
+        tournament = Tournament(args.player, args.matches, args.low, args.high, args.attempts,
+                                args.k, args.seed, args.chunk)
+    except ValueError as e:
+        parser.error(str(e))
+    start = time.perf_counter()
+    tournament.run(args.jobs)
+    elapsed = time.perf_counter() - start
+    report = tournament.to_dict()
+    report['seconds'] = round(elapsed, 3)
+    report['matches_per_second'] = round(tournament.played / elapsed) if elapsed else None
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
@@ -0,0 +1,415 @@
+"""Secondary windows: Statistics, Leaderboard and Tournament.
+
+Each window is built once, on first use, and then hidden instead of
+destroyed when closed. The leaderboard shows a page at a time through a
+fixed pool of row widgets whose text is swapped on scroll, so the cost of
+a redraw doesn't depend on how many scores there are. A tournament runs
+on a background thread and reports through a queue that the window polls,
+so the game stays responsive while it plays.
+"""
+import queue
+import threading
+import time
+import tkinter as tk
+
+import game_stats
+
+# Width of the longest bar in the attempts histogram
+HISTOGRAM_WIDTH = 20
+
+# Rows in the leaderboard widget pool
+PAGE_ROWS = 15
+
+MEDALS = {1: '🥇', 2: '🥈', 3: '🥉'}
+
+COLUMNS = (("Rank", 8), ("Score", 8), ("Player", 15), ("Date", 15))
+
+# Tournament window: milliseconds between queue polls, width of the
+# progress bar and players shown
+TOURNAMENT_POLL_MS = 100
+PROGRESS_WIDTH = 30
+STANDINGS_ROWS = 10
+TOURNAMENT_MATCHES = 100000
+
+
+class SecondaryWindow:
+    """A Toplevel that is created on first show() and hidden on close"""
+
+    title = ''
+    geometry = ''
+
+    def __init__(self, app):
+        self.app = app
+        self.window = None
+
+    @property
+    def visible(self):
+        return self.window is not None and self.window.winfo_viewable()
+
+    def show(self):
+        if self.window is None:
+            self.window = tk.Toplevel(self.app.root)
+            self.window.title(self.title)
+            self.window.geometry(self.geometry)
+            self.window.protocol("WM_DELETE_WINDOW", self.hide)
+            self.app.themed.register(self.window, bg='bg')
+            self.build()
+        else:
+            self.window.deiconify()
+            self.window.lift()
+        self.refresh()
+
+    def hide(self):
+        self.window.withdraw()
+
+    def close_button(self):
+        close_btn = tk.Button(
+            self.window,
+            text="❌ Close",
+            command=self.hide,
+            font=('Arial', 10, 'bold'),
+            fg='white',
+            relief='flat',
+            padx=20,
+            pady=10
+        )
+        self.app.themed.register(close_btn, bg='warning')
+        return close_btn
+
+    def build(self):
+        raise NotImplementedError
+
+    def refresh(self):
+        raise NotImplementedError
+
+
+class StatisticsView(SecondaryWindow):
+    """Detailed statistics window"""
+
+    title = "📊 Game Statistics"
+    geometry = "420x720"
+
+    def build(self):
+        self.stats_label = tk.Label(self.window, font=('Courier', 11), justify='left')
+        self.app.themed.register(self.stats_label, bg='bg', fg='text')
+        self.stats_label.pack(pady=20, padx=20)
+        self.close_button().pack(pady=10)
+
+    def refresh(self):
+        # One read; every figure below is kept up to date by game_stats, so
+        # nothing here depends on how many games have been played
+        stats = self.app.stats
+        win_rate = (stats['games_won'] / max(stats['games_played'], 1)) * 100
+        streak = stats['current_streak']
+        streak_text = (f"{streak} win{'s' if streak > 1 else ''}" if streak > 0 else
+                       f"{-streak} loss{'es' if streak < -1 else ''}" if streak < 0 else 'None')
+
+        histogram = stats['attempts_histogram']
+        peak = max(histogram, default=0)
+        bars = '\n'.join(f"  {attempts:>2} │{'█' * round(count * HISTOGRAM_WIDTH / peak)} {count}"
+                         for attempts, count in enumerate(histogram) if attempts and peak)
+
+        today = game_stats.rollup(stats, 'daily')[-1:]
+        today_text = (f"{today[0]['games_won']}/{today[0]['games_played']} won ({today[0]['period']})"
+                      if today else 'No games')
+
+        self.stats_label.config(text=f"""
+📊 GAME STATISTICS
+
+🎮 Games Played: {stats['games_played']}
+🏆 Games Won: {stats['games_won']}
+💔 Games Lost: {stats['games_lost']}
+📈 Win Rate: {win_rate:.1f}%
+🎯 Best Score: {stats['best_score'] if stats['best_score'] != float('inf') else 'None'}
+📊 Average Attempts: {stats['average_attempts']:.1f}
+🎲 Attempts to Win: p50 {stats['p50_attempts'] or '-'} · p90 {stats['p90_attempts'] or '-'}
+🔥 Current Streak: {streak_text}
+🏅 Longest Streaks: {stats['longest_win_streak']} wins · {stats['longest_losing_streak']} losses
+📆 Latest Day: {today_text}
+📅 Last Played: {stats['last_played'] or 'Never'}
+
+Wins by attempts:
+{bars or '  No wins yet'}
+        """)
+
+
+class LeaderboardView(SecondaryWindow):
+    """Paged leaderboard window with a player filter"""
+
+    title = "🏆 Leaderboard"
+    geometry = "560x620"
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.offset = 0
+        self.rows = []
+
+    def build(self):
+        themed = self.app.themed
+        title_label = tk.Label(self.window, text="🏆 TOP PLAYERS", font=('Arial', 16, 'bold'))
+        themed.register(title_label, bg='bg', fg='text')
+        title_label.pack(pady=10)
+
+        # Player filter
+        filter_frame = themed.register(tk.Frame(self.window), bg='bg')
+        filter_frame.pack(pady=5)
+        filter_label = tk.Label(filter_frame, text="🔍 Player:", font=('Arial', 10, 'bold'))
+        themed.register(filter_label, bg='bg', fg='text')
+        filter_label.pack(side='left')
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add('write', lambda *args: self.scroll_to(0))
+        filter_entry = tk.Entry(filter_frame, textvariable=self.filter_var, width=20, relief='flat')
+        themed.register(filter_entry, bg='entry_bg', fg='entry_fg', insertbackground='entry_fg')
+        filter_entry.pack(side='left', padx=5)
+
+        table = themed.register(tk.Frame(self.window), bg='bg')
+        table.pack(pady=10, padx=20, fill='both', expand=True)
+        lb_frame = themed.register(tk.Frame(table), bg='bg')
+        lb_frame.pack(side='left', fill='both', expand=True)
+        self.scrollbar = tk.Scrollbar(table, orient='vertical', command=self.on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+
+        # Headers
+        headers = themed.register(tk.Frame(lb_frame), bg='frame_bg')
+        headers.pack(fill='x', pady=5)
+        for text, width in COLUMNS:
+            header = tk.Label(headers, text=text, font=('Arial', 10, 'bold'), width=width)
+            themed.register(header, bg='frame_bg', fg='text')
+            header.pack(side='left')
+
+        # Fixed pool of rows; scrolling only changes their text
+        for _ in range(PAGE_ROWS):
+            row = themed.register(tk.Frame(lb_frame), bg='frame_bg')
+            cells = []
+            for _, width in COLUMNS:
+                cell = tk.Label(row, font=('Arial', 10), width=width)
+                themed.register(cell, bg='frame_bg', fg='text')
+                cell.pack(side='left')
+                cells.append(cell)
+            self.rows.append((row, cells))
+            for widget in [row] + cells:
+                widget.bind('<MouseWheel>', self.on_wheel)
+                widget.bind('<Button-4>', lambda e: self.scroll_to(self.offset - 3))
+                widget.bind('<Button-5>', lambda e: self.scroll_to(self.offset + 3))
+
+        self.status_label = tk.Label(self.window, font=('Arial', 10))
+        themed.register(self.status_label, bg='bg', fg='text')
+        self.status_label.pack(pady=5)
+
+        nav_frame = themed.register(tk.Frame(self.window), bg='bg')
+        nav_frame.pack(pady=5)
+        for text, step in (("⏮", None), ("◀ Prev", -PAGE_ROWS), ("Next ▶", PAGE_ROWS)):
+            nav_btn = tk.Button(nav_frame, text=text, font=('Arial', 9, 'bold'), fg='white',
+                                relief='flat', padx=10, pady=4,
+                                command=lambda s=step: self.scroll_to(0 if s is None else self.offset + s))
+            themed.register(nav_btn, bg='accent')
+            nav_btn.pack(side='left', padx=3)
+
+        self.close_button().pack(pady=10)
+
+    def on_wheel(self, event):
+        self.scroll_to(self.offset - 3 if event.delta > 0 else self.offset + 3)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.app.leaderboard)))
+        elif unit == 'pages':
+            self.scroll_to(self.offset + int(amount) * PAGE_ROWS)
+        else:
+            self.scroll_to(self.offset + int(amount))
+
+    def scroll_to(self, offset):
+        self.offset = max(offset, 0)
+        self.refresh()
+
+    def refresh(self):
+        """Fill the row pool with the page at the current offset"""
+        if self.window is None:
+            return
+        leaderboard = self.app.leaderboard
+        text = self.filter_var.get().strip()
+        if text:
+            page = leaderboard.search(text, self.offset, PAGE_ROWS)
+            if not page and self.offset:
+                # Scrolled past the last match, step back a page
+                self.offset = max(self.offset - PAGE_ROWS, 0)
+                page = leaderboard.search(text, self.offset, PAGE_ROWS)
+            total = None
+        else:
+            total = len(leaderboard)
+            self.offset = min(self.offset, max(total - PAGE_ROWS, 0))
+            entries = leaderboard.page(self.offset, PAGE_ROWS)
+            page = list(enumerate(entries, self.offset + 1))
+
+        for i, (row, cells) in enumerate(self.rows):
+            if i < len(page):
+                rank, entry = page[i]
+                values = (MEDALS.get(rank, f'{rank}.'), str(entry['score']),
+                          entry['player'], entry['date'])
+                for cell, value in zip(cells, values):
+                    cell.config(text=value)
+                if not row.winfo_manager():
+                    row.pack(fill='x', pady=2)
+            else:
+                row.pack_forget()
+
+        if total == 0:
+            self.status_label.config(text="No scores yet! Play some games to see the leaderboard.")
+            self.scrollbar.set(0, 1)
+        elif total is None:
+            self.status_label.config(text=f"Matches {self.offset + 1}–{self.offset + len(page)}"
+                                     if page else "No matching players.")
+            self.scrollbar.set(0, 1)
+        else:
+            self.status_label.config(text=f"Showing {self.offset + 1}–{self.offset + len(page)} of {total:,}")
+            self.scrollbar.set(self.offset / total, (self.offset + len(page)) / total)
+
+
+class TournamentView(SecondaryWindow):
+    """Runs a bot tournament on the game's range and shows the Elo standings"""
+
+    title = "🏅 Tournament"
+    geometry = "520x560"
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.thread = None
+        self.cancel_event = threading.Event()
+        self.updates = queue.Queue()
+        self.standings = []
+        self.status = "Bots play the current range; results are rated with Elo."
+        self.loaded_results = False
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def build(self):
+        themed = self.app.themed
+        title_label = tk.Label(self.window, text="🏅 TOURNAMENT", font=('Arial', 16, 'bold'))
+        themed.register(title_label, bg='bg', fg='text')
+        title_label.pack(pady=10)
+
+        settings = themed.register(tk.Frame(self.window), bg='bg')
+        settings.pack(pady=5)
+        matches_label = tk.Label(settings, text="Matches:", font=('Arial', 10, 'bold'))
+        themed.register(matches_label, bg='bg', fg='text')
+        matches_label.pack(side='left')
+        self.matches_var = tk.StringVar(value=f"{TOURNAMENT_MATCHES:,}")
+        matches_entry = tk.Entry(settings, textvariable=self.matches_var, width=12, relief='flat')
+        themed.register(matches_entry, bg='entry_bg', fg='entry_fg', insertbackground='entry_fg')
+        matches_entry.pack(side='left', padx=5)
+        self.start_button = tk.Button(settings, text="▶ Start", command=self.toggle,
+                                      font=('Arial', 10, 'bold'), fg='white', relief='flat',
+                                      padx=12, pady=4, cursor='hand2')
+        themed.register(self.start_button, bg='success')
+        self.start_button.pack(side='left', padx=5)
+
+        self.progress_label = tk.Label(self.window, font=('Courier', 10), justify='left')
+        themed.register(self.progress_label, bg='bg', fg='text')
+        self.progress_label.pack(pady=10, padx=20)
+        self.standings_label = tk.Label(self.window, font=('Courier', 11), justify='left')
+        themed.register(self.standings_label, bg='bg', fg='text')
+        self.standings_label.pack(pady=5, padx=20)
+        self.close_button().pack(pady=10)
+
+    def load_results(self):
+        """Show the last saved tournament until a new one starts"""
+        import tournament
+
+        self.loaded_results = True
+        results = tournament.load_results()
+        if not results or not results.get('standings'):
+            return
+        self.standings = results['standings'][:STANDINGS_ROWS]
+        self.status = (f"Last tournament ({self.standings[0]['date']}): "
+                       f"{results['matches']:,} matches in {results['rounds']:,} rounds.")
+
+    def refresh(self):
+        if self.window is None:
+            return
+        if not self.loaded_results and not self.running:
+            self.load_results()
+        self.progress_label.config(text=self.status)
+        self.start_button.config(text="■ Cancel" if self.running else "▶ Start")
+        rows = [f"{'':4}{'Player':<16}{'Rating':>7}  {'W/D/L':>22}"]
+        for rank, entry in enumerate(self.standings, 1):
+            record = f"{entry['wins']:,}/{entry['draws']:,}/{entry['losses']:,}"
+            rows.append(f"{MEDALS.get(rank, f'{rank}.'):<4}{entry['player'][:15]:<16}"
+                        f"{entry['score']:>7}  {record:>22}")
+        self.standings_label.config(text='\n'.join(rows) if self.standings else '')
+
+    def toggle(self):
+        if self.running:
+            self.cancel()
+        else:
+            self.start()
+
+    def start(self):
+        try:
+            matches = int(self.matches_var.get().replace(',', ''))
+        except ValueError:
+            matches = 0
+        if matches <= 0:
+            self.status = "⚠️ Enter a number of matches."
+            self.refresh()
+            return
+        # Imported here: the process pool machinery would slow down startup
+        import tournament
+
+        engine = self.app.engine
+        game = tournament.Tournament(matches=matches, low=engine.low, high=engine.high,
+                                     max_attempts=engine.max_attempts)
+        self.cancel_event.clear()
+        self.loaded_results = True  # This one replaces them
+        self.standings = []
+        self.status = "Starting worker processes..."
+        self.thread = threading.Thread(target=self.play, args=(game,), name='tournament', daemon=True)
+        self.thread.start()
+        self.refresh()
+        self.window.after(TOURNAMENT_POLL_MS, self.poll)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def play(self, game):
+        """Tournament thread: run it, sending progress and standings to the queue"""
+        started = time.perf_counter()
+
+        def progress(played, total):
+            rate = played / max(time.perf_counter() - started, 1e-9)
+            self.updates.put(('progress', played, total, rate,
+                              game.standings().top(STANDINGS_ROWS)))
+
+        try:
+            game.run(progress=progress, cancel=self.cancel_event)
+            if game.played:
+                game.save()
+        except Exception as e:
+            self.updates.put(('error', e))
+        else:
+            self.updates.put(('done', game.played, game.matches, game.rounds))
+
+    def poll(self):
+        """Apply queued updates on the Tk thread, then poll again while running"""
+        try:
+            while True:
+                update = self.updates.get_nowait()
+                kind = update[0]
+                if kind == 'progress':
+                    _, played, total, rate, self.standings = update
+                    filled = round(played * PROGRESS_WIDTH / total)
+                    self.status = (f"{'█' * filled}{'░' * (PROGRESS_WIDTH - filled)} {played / total:.0%}\n"
+                                   f"{played:,} of {total:,} matches · {rate:,.0f}/s")
+                elif kind == 'error':
+                    self.status = f"⚠️ Tournament failed: {update[1]}"
+                else:
+                    _, played, total, rounds = update
+                    verb = "Finished" if played == total else "Cancelled after"
+                    self.status = (f"{verb} {played:,} matches in {rounds:,} rounds"
+                                   f"{'; results saved.' if played else '.'}")
+        except queue.Empty:
+            pass
+        self.refresh()
+        if self.running or not self.updates.empty():
+            self.window.after(TOURNAMENT_POLL_MS, self.poll)